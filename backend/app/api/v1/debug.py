@@ -1,9 +1,10 @@
 from fastapi import APIRouter
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from app.modules.sw.easyberry.store import database
 from app.modules.sw.modbus.polling import packet_store
 from app.modules.sw.easyberry.packet_store import eb_packet_store
-from app.modules.sw.modbus.polling import start_example_polling, stop_example_polling, example_polling_status
+from app.modules.sw.modbus.polling import start_example_polling, stop_example_polling, example_polling_status, example_poller_status
+from app.modules.sw.modbus.profiling import profiler
 
 router = APIRouter()
 
@@ -111,4 +112,23 @@ async def api_stop_polling():
 
 @router.get('/polling/status')
 async def api_polling_status():
-    return {'running': bool(example_polling_status())}
+    lag = example_poller_status()
+    from app.modules.sw.modbus.dispatch import dispatcher
+    from app.modules.sw.modbus.connect import connector
+    return {'running': bool(example_polling_status()), 'pollers': lag, 'dispatch': dispatcher.stats(),
+            'connections': connector.stats()}
+
+
+@router.get('/profile')
+async def get_profile(poller: Optional[str] = None):
+    """Per-stage poll cycle timings (microseconds) over the recent window."""
+    return {'enabled': profiler.enabled, 'stages': profiler.summary(poller)}
+
+
+@router.post('/profile')
+async def set_profile(enabled: bool = True, reset: bool = False):
+    """Enable/disable per-stage poll cycle timing; `reset` drops collected samples."""
+    profiler.enable(enabled)
+    if reset:
+        profiler.reset()
+    return {'enabled': profiler.enabled}
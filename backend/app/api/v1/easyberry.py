@@ -1,6 +1,10 @@
 import os
+import json
+import itertools
 import logging
+from typing import Iterator, Optional
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
 from app.modules.sw.easyberry import auth as eb_auth
 from app.modules.sw.easyberry import runner as eb_runner
@@ -9,6 +13,7 @@ from app.modules.sw.easyberry import connector as eb_connector
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+_stream_ids = itertools.count(1)
 
 
 def _config_path():
@@ -43,6 +48,9 @@ async def login():
 
     try:
         token = eb_auth.login_and_persist_token(path)
+        # share the fresh token with running uploaders without another disk read
+        from app.modules.sw.easyberry.token_manager import get_token_manager
+        get_token_manager(path).set_token(token)
         # attempt to return the raw response payload saved by auth
         try:
             from pathlib import Path
@@ -92,15 +100,54 @@ async def status():
 
 
 @router.post("/send")
-async def send_once():
+async def send_once(target: Optional[str] = None):
     path = _config_path()
     if not os.path.exists(path):
         raise HTTPException(status_code=400, detail="easyberry_config.json not found")
     try:
         # import shared database and call send_once to post current database values
         from app.modules.sw.easyberry.store import database
-        status_code, body = eb_connector.send_once(path, database)
+        status_code, body = eb_connector.send_once(path, database, target=target)
         return {"status": int(status_code), "body": body}
     except Exception as e:
         logger.exception("easyberry send failed")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/history")
+async def history(thing: str, start: Optional[float] = None, end: Optional[float] = None, limit: int = 1000):
+    """Return stored samples for a thing between `start` and `end` (unix seconds)."""
+    from app.modules.sw.easyberry import historian as eb_historian
+    if eb_historian.historian is None:
+        raise HTTPException(status_code=404, detail="historian not enabled")
+    try:
+        samples = eb_historian.historian.query(thing, start=start, end=end, limit=limit)
+        return {"thing": thing, "samples": samples}
+    except Exception as e:
+        logger.exception("easyberry history query failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _change_stream(sub, keepalive: float = 15.0) -> Iterator[str]:
+    # one SSE event per change batch; the subscription ends when the client goes away
+    try:
+        while True:
+            batch = sub.get(timeout=keepalive)
+            if batch is None:
+                if sub.closed:
+                    return
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {json.dumps(batch, default=str)}\n\n"
+    finally:
+        sub.close()
+
+
+@router.get("/changes")
+def changes(names: Optional[str] = None):
+    """Stream change-of-value batches as server-sent events (comma separated `names` filters things)."""
+    from app.modules.sw.easyberry.cov import cov_bus
+    wanted = [n for n in names.split(",") if n] if names else None
+    sub = cov_bus.subscribe(f"sse-{next(_stream_ids)}", names=wanted)
+    return StreamingResponse(_change_stream(sub), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
@@ -1,12 +1,114 @@
-from fastapi import APIRouter, Depends
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+
 from app.core.security import get_current_user
 from app.modules.sw.modbus import default_store
+from app.modules.sw.modbus.polling import example_device_client
+from app.modules.sw.modbus.reads import reader
+from app.modules.sw.modbus.writes import get_write_queue
 
 router = APIRouter()
 
 
+class ReadRequest(BaseModel):
+    device: str
+    function: str = "holding"
+    address: int
+    count: int = 1
+
+
+class BulkReadRequest(BaseModel):
+    reads: List[ReadRequest]
+    # seconds a polled value may be old and still be served from the cache; 0 forces a live read
+    max_age: float = 1.0
+
+
+class RegisterWrite(BaseModel):
+    address: int
+    # one register, or `values` for consecutive registers from `address`
+    value: Optional[int] = None
+    values: Optional[List[int]] = None
+
+
+class WriteRequest(BaseModel):
+    writes: List[RegisterWrite]
+    # wait up to `timeout` seconds for the device to confirm; False returns once queued
+    wait: bool = True
+    timeout: float = 5.0
+
+
+def _flatten(writes: List[RegisterWrite]) -> Dict[int, int]:
+    out: Dict[int, int] = {}
+    for w in writes:
+        values = w.values if w.values is not None else ([w.value] if w.value is not None else [])
+        if not values:
+            raise ValueError(f"write at {w.address} has no value")
+        for i, v in enumerate(values):
+            if not 0 <= w.address + i <= 0xFFFF or not 0 <= v <= 0xFFFF:
+                raise ValueError(f"invalid write {w.address + i}={v}")
+            # later entries win, as in the queue
+            out[w.address + i] = v
+    if not out:
+        raise ValueError("no writes given")
+    return out
+
+
+def _read(req: ReadRequest, max_age: float) -> dict:
+    client = example_device_client(req.device)
+    if client is None:
+        raise LookupError(f"device {req.device!r} is not being polled")
+    return reader.read(client, req.function, req.address, req.count, max_age=max_age)
+
+
 @router.get("/status")
 async def modbus_status(user: dict = Depends(get_current_user)):
     """Return the current status of all pollers (in-memory)."""
     data = default_store.get_all()
     return data
+
+
+@router.get("/read/{device}")
+def modbus_read(device: str, address: int, count: int = 1, function: str = "holding", max_age: float = 1.0,
+                user: dict = Depends(get_current_user)):
+    """Read a register range, from the poll cache when fresh enough, else live."""
+    try:
+        return _read(ReadRequest(device=device, function=function, address=address, count=count), max_age)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@router.post("/read")
+def modbus_bulk_read(body: BulkReadRequest, user: dict = Depends(get_current_user)):
+    """Read several ranges; each entry gets its own result or error."""
+    results: List[dict] = []
+    for req in body.reads:
+        item: dict = req.model_dump()
+        try:
+            item.update(_read(req, body.max_age))
+        except Exception as e:
+            item["error"] = str(e)
+        results.append(item)
+    return {"results": results}
+
+
+@router.post("/write/{device}")
+def modbus_write(device: str, body: WriteRequest, user: dict = Depends(get_current_user)):
+    """Queue holding-register writes; adjacent registers are sent together and writes go before poll reads."""
+    client = example_device_client(device)
+    if client is None:
+        raise HTTPException(status_code=404, detail=f"device {device!r} is not being polled")
+    try:
+        writes = _flatten(body.writes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    ticket = get_write_queue(client).submit(writes)
+    if body.wait:
+        ticket.wait(body.timeout)
+    return {"queued": len(writes), "done": ticket.done, "ok": ticket.ok,
+            "errors": {str(a): msg for a, msg in ticket.errors.items()}}
@@ -1,12 +1,13 @@
 from fastapi import APIRouter
 from app.api.v1 import health, auth, points
 from app.api.v1 import modbus, debug, settings
-from app.api.v1 import easyberry
+from app.api.v1 import easyberry, metrics
 from app.modules.sw.cli import router as cli_router
 
 api_router = APIRouter()
 
 api_router.include_router(health.router, tags=["health"])
+api_router.include_router(metrics.router, tags=["metrics"])
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(points.router, prefix="/points", tags=["points"])
 api_router.include_router(modbus.router, prefix="/modbus", tags=["modbus"]) 
@@ -44,13 +44,14 @@ async def save_easyberry(req: Request):
     try:
         _write_json_file(p, body)
         # attempt to reload saved config into the in-memory easyberry database
+        counts = None
         try:
             from app.modules.sw.easyberry.loader import load_from_file
-            load_from_file(str(p))
+            counts = load_from_file(str(p))
         except Exception:
             import logging
             logging.getLogger(__name__).exception("Failed reloading easyberry_config.json after save")
-        return JSONResponse(content={'saved': True})
+        return JSONResponse(content={'saved': True, 'things': counts})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -64,8 +65,8 @@ async def reload_easyberry():
         raise HTTPException(status_code=404, detail='easyberry_config.json not found')
     try:
         from app.modules.sw.easyberry.loader import load_from_file
-        load_from_file(str(p))
-        return JSONResponse(content={'reloaded': True})
+        counts = load_from_file(str(p))
+        return JSONResponse(content={'reloaded': True, 'things': counts})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -88,8 +89,19 @@ async def save_polling(req: Request):
     root = _repo_backend_dir()
     p = root / 'polling_config.json'
     body = await req.json()
+    try:
+        from app.modules.sw.modbus.polling import poller_specs
+        poller_specs(body)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f'invalid polling config: {e}')
     try:
         _write_json_file(p, body)
-        return JSONResponse(content={'saved': True})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    # apply to running pollers: only changed pollers/devices are touched
+    try:
+        from app.modules.sw.modbus.polling import reload_example_polling
+        applied = reload_example_polling(str(p))
+    except Exception as e:
+        return JSONResponse(content={'saved': True, 'applied': None, 'error': str(e)})
+    return JSONResponse(content={'saved': True, 'applied': applied})
@@ -17,6 +17,19 @@ class Settings(BaseSettings):
     modbus_unit: int = 1
     modbus_timeout: float = 3.0
     modbus_retries: int = 1
+    # per-stage poll cycle timing (also switchable at runtime via /debug/profile)
+    poll_profiling: bool = False
+    # Easyberry historian (embedded SQLite time-series store)
+    historian_enabled: bool = False
+    historian_path: str = "history.db"
+    historian_flush_interval: float = 1.0
+    historian_retention_days: float = 30.0
+    historian_max_mb: float = 256.0
+    # Easyberry packet store (debug history of HTTP exchanges)
+    packet_store_max_kb: int = 2048
+    packet_store_body_limit: int = 16384
+    packet_store_compress: bool = False
+    packet_store_debug: bool = False  # also keep request/response headers
 
     class Config:
         env_file = ".env"
@@ -47,3 +47,41 @@ async def startup_event():
         # ignore if easyberry module is not available
         import logging
         logging.getLogger(__name__).debug("easyberry loader not available at startup")
+
+    # Start the on-disk historian so thing values survive restarts and cloud outages
+    if settings.historian_enabled:
+        try:
+            from pathlib import Path
+            from app.modules.sw.easyberry.historian import start_historian
+            hist_path = Path(settings.historian_path)
+            if not hist_path.is_absolute():
+                hist_path = Path(__file__).resolve().parents[1] / hist_path
+            start_historian(
+                str(hist_path),
+                flush_interval=settings.historian_flush_interval,
+                retention_seconds=settings.historian_retention_days * 86400,
+                max_bytes=int(settings.historian_max_mb * 1024 * 1024),
+            )
+        except Exception:
+            import logging
+            logging.getLogger(__name__).exception("Failed starting easyberry historian")
+
+    if settings.poll_profiling:
+        from app.modules.sw.modbus.profiling import profiler
+        profiler.enable(True)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    try:
+        from app.modules.sw.modbus.polling import stop_example_polling
+        stop_example_polling()
+    except Exception:
+        import logging
+        logging.getLogger(__name__).exception("Failed stopping pollers")
+    try:
+        from app.modules.sw.easyberry.historian import stop_historian
+        stop_historian()
+    except Exception:
+        import logging
+        logging.getLogger(__name__).exception("Failed stopping easyberry historian")
@@ -8,6 +8,7 @@ try:
     from . import getvar  # noqa: F401
     from . import last_req  # noqa: F401
     from . import pollers  # noqa: F401
+    from . import profile  # noqa: F401
 except Exception:
     # best-effort import; tests or environment may not execute submodule imports
     pass
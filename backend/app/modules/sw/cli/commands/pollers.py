@@ -26,6 +26,9 @@ def handler(args: Dict[str, Any], context=None):
                 'interval': float(interval) if interval is not None else None,
                 'alive': bool(alive),
                 'stopped': bool(stopped),
+                'overrun': getattr(p, 'overrun', None),
+                'lag': p.lag_stats.snapshot() if hasattr(p, 'lag_stats') else None,
+                'device': p.guard.stats() if getattr(p, 'guard', None) is not None else None,
             })
         except Exception:
             out.append({'error': 'failed reading poller info'})
@@ -0,0 +1,28 @@
+from ..registry import register_command
+from typing import Dict, Any
+
+
+def handler(args: Dict[str, Any], context=None):
+    try:
+        from app.modules.sw.modbus.profiling import profiler
+    except Exception as e:
+        raise RuntimeError(f'failed importing profiler: {e}')
+
+    action = (args.get('action') or 'show').lower()
+    if action in ('on', 'enable'):
+        profiler.enable(True)
+    elif action in ('off', 'disable'):
+        profiler.enable(False)
+    elif action == 'reset':
+        profiler.reset()
+    elif action != 'show':
+        raise ValueError(f'unknown action: {action}')
+
+    return {
+        'enabled': profiler.enabled,
+        'stages': profiler.summary(args.get('poller')),
+    }
+
+
+register_command('profile', handler, description='Show or toggle per-stage poll cycle timing (action: show|on|off|reset)',
+                 args_schema={'action': 'str', 'poller': 'str'})
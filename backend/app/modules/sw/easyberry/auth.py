@@ -5,7 +5,7 @@ from typing import Dict, Any, Optional
 
 import httpx
 
-from .config import read_config, write_config
+from .config import read_config, target_config, write_config
 from .packet_store import eb_packet_store
 
 logger = logging.getLogger(__name__)
@@ -42,8 +42,9 @@ def _discover_token(resp_json: Dict[str, Any]) -> Optional[str]:
     return _search(resp_json)
 
 
-def login_and_persist_token(config_path: str) -> str:
-    cfg = read_config(config_path)
+def request_token(config_path: str, target: Optional[str] = None) -> str:
+    """Log in with the configured credentials and return the token without persisting it."""
+    cfg = target_config(read_config(config_path), target)
     settings = cfg.get("settings", {})
     auth_path = settings.get("authPath", "auth")
     base = settings.get("url", "").rstrip("/")
@@ -117,13 +118,8 @@ def login_and_persist_token(config_path: str) -> str:
         except Exception:
             resp_headers = None
 
-        eb_packet_store.add(url, json.dumps(payload, ensure_ascii=False), r.text, request_headers=req_headers, response_headers=resp_headers, status=r.status_code, note='auth raw')
-        try:
-            with eb_packet_store._lock:
-                if len(eb_packet_store._deque) > 0:
-                    eb_packet_store._deque[-1]['content_type'] = r.headers.get('content-type')
-        except Exception:
-            pass
+        eb_packet_store.add(url, json.dumps(payload, ensure_ascii=False), r.text, request_headers=req_headers, response_headers=resp_headers,
+                            status=r.status_code, note='auth raw', content_type=r.headers.get('content-type'))
 
         # append a short record to backend/message.log for easier debugging
         try:
@@ -178,13 +174,8 @@ def login_and_persist_token(config_path: str) -> str:
             except Exception:
                 resp_headers = None
 
-            eb_packet_store.add(url, json.dumps(payload, ensure_ascii=False), r.text, request_headers=req_headers, response_headers=resp_headers, status=r.status_code, note='auth error')
-            try:
-                with eb_packet_store._lock:
-                    if len(eb_packet_store._deque) > 0:
-                        eb_packet_store._deque[-1]['content_type'] = r.headers.get('content-type')
-            except Exception:
-                pass
+            eb_packet_store.add(url, json.dumps(payload, ensure_ascii=False), r.text, request_headers=req_headers, response_headers=resp_headers,
+                                status=r.status_code, note='auth error', content_type=r.headers.get('content-type'))
         except Exception:
             pass
         raise RuntimeError(f"login failed: {r.status_code}")
@@ -198,11 +189,6 @@ def login_and_persist_token(config_path: str) -> str:
     if not token:
         raise RuntimeError("login succeeded but no token found in response")
 
-    # persist token masked in logs
-    settings["token"] = token
-    cfg["settings"] = settings
-    write_config(config_path, cfg)
-
     # record successful auth response for debugging/inspection
     try:
         req_headers = None
@@ -216,17 +202,22 @@ def login_and_persist_token(config_path: str) -> str:
         except Exception:
             resp_headers = None
 
-        eb_packet_store.add(url, json.dumps(payload, ensure_ascii=False), r.text, request_headers=req_headers, response_headers=resp_headers, status=r.status_code, note='auth success')
-        try:
-            with eb_packet_store._lock:
-                if len(eb_packet_store._deque) > 0:
-                    eb_packet_store._deque[-1]['content_type'] = r.headers.get('content-type')
-                    eb_packet_store._deque[-1]['request_headers'] = req_headers
-                    eb_packet_store._deque[-1]['response_headers'] = resp_headers
-        except Exception:
-            pass
+        eb_packet_store.add(url, json.dumps(payload, ensure_ascii=False), r.text, request_headers=req_headers, response_headers=resp_headers,
+                            status=r.status_code, note='auth success', content_type=r.headers.get('content-type'))
     except Exception:
         pass
 
-    logger.info("Easyberry: token persisted (masked) for user=%s", username)
+    logger.info("Easyberry: token obtained (masked) for user=%s", username)
+    return token
+
+
+def login_and_persist_token(config_path: str) -> str:
+    token = request_token(config_path)
+    # persist token masked in logs
+    cfg = read_config(config_path)
+    settings = cfg.get("settings", {})
+    settings["token"] = token
+    cfg["settings"] = settings
+    write_config(config_path, cfg)
+    logger.info("Easyberry: token persisted (masked)")
     return token
@@ -0,0 +1,63 @@
+"""Benchmark Easyberry payload wire encodings.
+
+Compares bytes on the wire and serialization CPU time for each
+settings.encoding / settings.compression / settings.things_format combination.
+
+Usage:
+  cd backend
+  python -m app.modules.sw.easyberry.bench_codec --things 1000 10000 --repeat 20
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+
+from .codec import encode_payload
+
+
+def make_payload(n: int) -> Dict[str, Any]:
+    rnd = random.Random(n)
+    things = {f"thing-{i:05d}": {"value": str(rnd.randint(0, 65535))} for i in range(n)}
+    return {"op": "put", "things": things}
+
+
+def _variants() -> List[Dict[str, Any]]:
+    out = []
+    for encoding in ("json", "json-compact", "msgpack", "cbor"):
+        for things_format in ("nested", "flat"):
+            for compression in (None, "gzip"):
+                out.append({"encoding": encoding, "things_format": things_format, "compression": compression})
+    return out
+
+
+def run(sizes: List[int], repeat: int) -> None:
+    print(f"{'things':>7} {'encoding':<13} {'layout':<7} {'gzip':<5} {'bytes':>10} {'ratio':>6} {'ms/op':>8}")
+    for n in sizes:
+        payload = make_payload(n)
+        baseline = None
+        for v in _variants():
+            try:
+                body, _ = encode_payload(payload, v)
+            except RuntimeError:
+                # optional dependency not installed
+                continue
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                encode_payload(payload, v)
+            ms = (time.perf_counter() - t0) * 1000.0 / repeat
+            if baseline is None:
+                baseline = len(body)
+            print(f"{n:>7} {v['encoding']:<13} {v['things_format']:<7} {('yes' if v['compression'] else 'no'):<5} "
+                  f"{len(body):>10} {len(body) / baseline:>6.2f} {ms:>8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Easyberry payload encodings")
+    parser.add_argument("--things", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.things, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
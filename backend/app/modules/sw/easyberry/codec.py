@@ -0,0 +1,68 @@
+import gzip
+import json
+from typing import Any, Dict, Tuple
+
+# settings.encoding values
+ENCODINGS = ("json", "json-compact", "msgpack", "cbor")
+# settings.compression values
+COMPRESSIONS = (None, "", "none", "gzip")
+
+
+def flatten_things(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of `payload` with things as {"name": value} instead of {"name": {"value": value}}.
+
+    Only use this when the Easyberry server accepts the flat layout (settings.things_format = "flat").
+    """
+    things = payload.get("things")
+    if not isinstance(things, dict):
+        return payload
+    flat = {}
+    for name, item in things.items():
+        flat[name] = item.get("value") if isinstance(item, dict) else item
+    out = dict(payload)
+    out["things"] = flat
+    return out
+
+
+def _serialize(payload: Dict[str, Any], encoding: str) -> Tuple[bytes, str]:
+    if encoding == "json":
+        # same bytes httpx produces for `json=payload`
+        return json.dumps(payload).encode("utf-8"), "application/json"
+    if encoding == "json-compact":
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), "application/json"
+    if encoding == "msgpack":
+        try:
+            import msgpack  # type: ignore
+        except ImportError:
+            raise RuntimeError("settings.encoding=msgpack requires the 'msgpack' package")
+        return msgpack.packb(payload, use_bin_type=True), "application/msgpack"
+    if encoding == "cbor":
+        try:
+            import cbor2  # type: ignore
+        except ImportError:
+            raise RuntimeError("settings.encoding=cbor requires the 'cbor2' package")
+        return cbor2.dumps(payload), "application/cbor"
+    raise ValueError(f"unknown settings.encoding: {encoding}")
+
+
+def encode_payload(payload: Dict[str, Any], settings: Dict[str, Any]) -> Tuple[bytes, Dict[str, str]]:
+    """Serialize (and optionally compress) an upload payload according to config settings.
+
+    Returns (body, headers) where headers carries Content-Type and, when
+    compressed, Content-Encoding.
+    """
+    encoding = (settings.get("encoding") or "json").lower()
+    compression = settings.get("compression")
+    compression = compression.lower() if isinstance(compression, str) else compression
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"unknown settings.compression: {compression}")
+    if settings.get("things_format") == "flat":
+        payload = flatten_things(payload)
+
+    body, ctype = _serialize(payload, encoding)
+    headers = {"Content-Type": ctype}
+    if compression == "gzip":
+        # mtime=0 keeps the output deterministic; a moderate level is plenty for repetitive JSON on a Pi
+        body = gzip.compress(body, compresslevel=int(settings.get("compression_level", 6)), mtime=0)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
@@ -1,7 +1,8 @@
 import json
 import os
 import tempfile
-from typing import Any, Dict
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 
 def read_config(path: str) -> Dict[str, Any]:
@@ -10,6 +11,53 @@ def read_config(path: str) -> Dict[str, Any]:
     return cfg
 
 
+# path -> (mtime_ns, size, cfg)
+_cache: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def read_config_cached(path: str) -> Dict[str, Any]:
+    """Like read_config but only re-parses the file when its mtime/size changed.
+
+    Returns a shared dict: callers must treat it as read-only.
+    """
+    st = os.stat(path)
+    with _cache_lock:
+        hit = _cache.get(path)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+    cfg = read_config(path)
+    with _cache_lock:
+        _cache[path] = (st.st_mtime_ns, st.st_size, cfg)
+    return cfg
+
+
+def target_names(cfg: Dict[str, Any]) -> List[Optional[str]]:
+    """Names of the configured upload targets; [None] when only the top-level settings are used."""
+    names = [t.get("name") for t in (cfg.get("targets") or []) if isinstance(t, dict) and t.get("name")]
+    return names or [None]
+
+
+def target_config(cfg: Dict[str, Any], name: Optional[str] = None) -> Dict[str, Any]:
+    """Return the effective config for upload target `name` (None is the top-level config).
+
+    A target entry in `targets` overrides top-level keys (duration, upload, queue,
+    outbox, chunking, ...) and its `settings` are merged over the top-level
+    `settings`, so url/context/credentials only need to be given where they differ.
+    """
+    if name is None:
+        return cfg
+    for t in cfg.get("targets") or []:
+        if isinstance(t, dict) and t.get("name") == name:
+            eff = {k: v for k, v in cfg.items() if k != "targets"}
+            eff.update({k: v for k, v in t.items() if k != "settings"})
+            settings = dict(cfg.get("settings") or {})
+            settings.update(t.get("settings") or {})
+            eff["settings"] = settings
+            return eff
+    raise KeyError(f"unknown easyberry target: {name}")
+
+
 def _validate_config(cfg: Dict[str, Any]) -> None:
     settings = cfg.get("settings")
     if not isinstance(settings, dict):
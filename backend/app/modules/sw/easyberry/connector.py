@@ -1,10 +1,20 @@
+import json
 import logging
+import threading
 import time
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 
-from .config import read_config
-from .transport import send_put
-from .auth import login_and_persist_token
+import httpx
+
+from .config import read_config, read_config_cached, target_config
+from .transport import send_put, send_timeout
+from .resilience import CircuitOpenError
+from .token_manager import get_token_manager
+from .outbox import Outbox, open_outbox
+from .scheduler import UploadScheduler
+from . import upload_queue
+from .upload_queue import UploadQueue, payload_from_batch
 
 logger = logging.getLogger(__name__)
 
@@ -31,15 +41,127 @@ def run_once(config_path: str, database) -> None:
         pass
 
 
-def send_once(config_path: str, database) -> tuple:
+def send_once(config_path: str, database, target: Optional[str] = None) -> tuple:
     """Build payload from `database` and send it once. Returns (status_code, body).
 
     If a 401/403 is received, attempts one re-login and retry.
     """
-    cfg = read_config(config_path)
     payload = build_payload_from_database(database)
+    if target is not None:
+        cfg = target_config(read_config_cached(config_path), target)
+        payload = filter_things(payload, cfg.get("things"))
+    return send_payload(config_path, payload, target=target)
+
+
+def filter_things(payload: Dict[str, Any], names) -> Dict[str, Any]:
+    """Keep only the things listed in `names` (a target's thing filter); None or "*" keeps all."""
+    if not names or names == "*":
+        return payload
+    wanted = set(names)
+    out = dict(payload)
+    out["things"] = {k: v for k, v in (payload.get("things") or {}).items() if k in wanted}
+    return out
+
+
+def split_payload(payload: Dict[str, Any], chunk_size: int) -> List[Dict[str, Any]]:
+    """Split a put payload into payloads of at most `chunk_size` things each."""
+    things = payload.get("things") or {}
+    if chunk_size <= 0 or len(things) <= chunk_size:
+        return [payload]
+    items = list(things.items())
+    chunks = []
+    for i in range(0, len(items), chunk_size):
+        chunk = dict(payload)
+        chunk["things"] = dict(items[i:i + chunk_size])
+        chunks.append(chunk)
+    return chunks
+
+
+def send_payload(config_path: str, payload: Dict[str, Any], client: Optional[httpx.Client] = None,
+                 target: Optional[str] = None, stop_event: Optional[threading.Event] = None) -> Tuple[int, str]:
+    """Send `payload`, split into concurrent chunks when the `chunking` config section asks for it.
+
+    Returns (status_code, body); for chunked sends the status is 200 only when every
+    chunk succeeded and the body is a JSON summary of the chunk results.
+
+    Each send already goes through the transport's `retry` policy, so a failing
+    chunk is attempted up to (`chunking.retries` + 1) x `retry.max_attempts`
+    times. Chunk rounds stop early once the circuit opens or `stop_event` is set.
+    """
+    try:
+        cfg = target_config(read_config_cached(config_path), target)
+    except Exception:
+        cfg = {}
+    ccfg = cfg.get("chunking") or {}
+    chunks = split_payload(payload, int(ccfg.get("chunk_size", 0) or 0))
+    if len(chunks) == 1:
+        return _send_with_relogin(config_path, payload, client=client, target=target, stop_event=stop_event)
+    max_parallel = max(1, int(ccfg.get("max_parallel", 4)))
+    retries = max(0, int(ccfg.get("retries", 2)))
+    if client is not None:
+        return _send_chunks(config_path, chunks, client, max_parallel, retries, target, stop_event)
+    limits = httpx.Limits(max_connections=max_parallel, max_keepalive_connections=max_parallel)
+    with httpx.Client(timeout=send_timeout(cfg), limits=limits) as shared:
+        return _send_chunks(config_path, chunks, shared, max_parallel, retries, target, stop_event)
+
+
+def _send_chunks(config_path: str, chunks: List[Dict[str, Any]], client: httpx.Client, max_parallel: int,
+                 retries: int, target: Optional[str] = None,
+                 stop_event: Optional[threading.Event] = None) -> Tuple[int, str]:
+    circuit_open = threading.Event()
+
+    def _one(chunk):
+        try:
+            return _send_with_relogin(config_path, chunk, client=client, target=target, stop_event=stop_event)
+        except CircuitOpenError as e:
+            circuit_open.set()
+            return None, str(e)
+        except Exception as e:
+            return None, str(e)
+
+    # index -> (status, body); only chunks that did not get a 2xx are sent again
+    results: Dict[int, Tuple[Optional[int], str]] = {}
+    pending = list(range(len(chunks)))
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(chunks))) as pool:
+        for attempt in range(retries + 1):
+            outcomes = list(pool.map(lambda i: _one(chunks[i]), pending))
+            failed = []
+            for i, res in zip(pending, outcomes):
+                results[i] = res
+                if res[0] is None or not (200 <= res[0] < 300):
+                    failed.append(i)
+            if not failed:
+                break
+            if circuit_open.is_set() or (stop_event is not None and stop_event.is_set()):
+                # another round would only be rejected (or delay shutdown)
+                break
+            logger.warning("Chunked send: %d/%d chunks failed (attempt %d)", len(failed), len(chunks), attempt + 1)
+            pending = failed
+
+    failed_info = [{"chunk": i, "status": results[i][0], "error": results[i][1][:200]}
+                   for i in sorted(results) if results[i][0] is None or not (200 <= results[i][0] < 300)]
+    summary = {"chunks": len(chunks), "ok": len(chunks) - len(failed_info), "failed": failed_info}
+    if not failed_info:
+        status = 200
+    else:
+        # surface the first real HTTP status, or 502 when the chunk never got a response
+        status = next((f["status"] for f in failed_info if f["status"] is not None), 502)
+    logger.info("Chunked send result status=%s chunks=%d failed=%d", status, len(chunks), len(failed_info))
+    return status, json.dumps(summary)
+
+
+def _send_with_relogin(config_path: str, payload: Dict[str, Any], client: Optional[httpx.Client] = None,
+                       target: Optional[str] = None, stop_event: Optional[threading.Event] = None) -> tuple:
+    # the token lives in memory and is refreshed ahead of its `exp`; a 401/403 still
+    # forces one (single-flight) re-login in case the server revoked it early
+    tokens = get_token_manager(config_path, target)
+    token = tokens.get_token()
     try:
-        status, body = send_put(config_path, payload)
+        status, body = send_put(config_path, payload, client=client, token=token, target=target,
+                                stop_event=stop_event)
+    except CircuitOpenError as e:
+        logger.info("Skipping send: %s", e)
+        raise
     except Exception as e:
         logger.exception("Failed to send payload: %s", e)
         raise
@@ -47,12 +169,13 @@ def send_once(config_path: str, database) -> tuple:
     if status in (401, 403):
         logger.info("Received %s, refreshing token and retrying once", status)
         try:
-            login_and_persist_token(config_path)
+            token = tokens.refresh(stale_token=token)
         except Exception as e:
             logger.exception("Re-login failed: %s", e)
             return status, body
         try:
-            status2, body2 = send_put(config_path, payload)
+            status2, body2 = send_put(config_path, payload, client=client, token=token, target=target,
+                                      stop_event=stop_event)
             logger.info("Retry status=%s", status2)
             return status2, body2
         except Exception as e:
@@ -63,44 +186,254 @@ def send_once(config_path: str, database) -> tuple:
         return status, body
 
 
-def run_loop(config_path: str, database, stop_event=None) -> None:
-    cfg = read_config(config_path)
-    duration = cfg.get("duration", 30)
-    iteration = 0
-    # Keep running until an external stop_event is set by the runner.stop() call.
-    # Use stop_event.wait(timeout) when available so the loop is interruptible
-    # and will stop promptly when the stop button is pressed.
-    while True:
-        iteration += 1
-        logger.debug("run_loop: starting iteration %d", iteration)
-        if stop_event is not None and getattr(stop_event, "is_set", lambda: False)():
-            logger.info("run_loop: stop event set, exiting")
-            break
-        try:
-            run_once(config_path, database)
-        except Exception:
-            # run_once already logs failures; continue looping so polling remains active
-            logger.exception("run_loop: run_once failed, continuing loop")
+def merge_payloads(entries: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[List[int], Dict[str, Any]]]:
+    """Merge consecutive plain `put` outbox entries into one payload each, later values winning.
+
+    Returns (entry ids, payload) groups in order; anything that is not a plain
+    `{"op": "put", "things": {...}}` payload stays a group of its own.
+    """
+    groups: List[Tuple[List[int], Dict[str, Any]]] = []
+    last_mergeable = False
+    for entry_id, payload in entries:
+        mergeable = (payload.get("op") == "put" and isinstance(payload.get("things"), dict)
+                     and set(payload) == {"op", "things"})
+        if mergeable and last_mergeable:
+            ids, merged = groups[-1]
+            ids.append(entry_id)
+            merged["things"].update(payload["things"])
         else:
-            logger.debug("run_loop: iteration %d completed successfully", iteration)
+            groups.append(([entry_id], {"op": "put", "things": dict(payload["things"])} if mergeable else payload))
+        last_mergeable = mergeable
+    return groups
+
+
+def _drain_outcome(status: int) -> str:
+    if 200 <= status < 300:
+        return "ok"
+    if 400 <= status < 500 and status not in (401, 403, 408, 429):
+        return "rejected"
+    return "retry"
+
 
-        # If a stop_event was provided, prefer waiting on it (interruptible).
-        if stop_event is not None:
-            # If duration is falsy (0, None, negative) wait indefinitely until stop
+def drain_outbox(config_path: str, outbox: Outbox, batch_size: int = 100, target: Optional[str] = None,
+                 stop_event: Optional[threading.Event] = None) -> int:
+    """Send pending outbox payloads oldest-first in bulk over one keep-alive connection.
+
+    Up to `batch_size` pending entries are merged into one upload (see
+    merge_payloads), which the `chunking` config section splits like any other
+    large payload, and are deleted together once the server confirms it.
+    Stops at the first transient failure so ordering is preserved; payloads the
+    server rejects permanently (4xx other than auth/throttling) are discarded,
+    after a rejected merge was resent entry by entry to isolate the bad one.
+    Returns the number of entries delivered.
+    """
+    sent = 0
+
+    def _deliver(client, ids: List[int], payload: Dict[str, Any]) -> bool:
+        # False: transient failure, stop draining to keep the order
+        nonlocal sent
+        status, _ = send_payload(config_path, payload, client=client, target=target, stop_event=stop_event)
+        outcome = _drain_outcome(status)
+        if outcome == "rejected" and len(ids) > 1:
+            # one of the merged entries is bad: resend them one by one to find it
+            logger.warning("Outbox merge of %d entries rejected with status=%s, resending singly", len(ids), status)
+            return all(_deliver(client, [i], by_id[i]) for i in ids)
+        if outcome == "retry":
+            logger.warning("Outbox drain paused at entry %s status=%s", ids[0], status)
+            return False
+        if outcome == "ok":
+            sent += len(ids)
+        else:
+            logger.error("Outbox entry %s rejected with status=%s, discarding", ids[0], status)
+        outbox.ack_many(ids)
+        return True
+
+    try:
+        timeout = send_timeout(target_config(read_config_cached(config_path), target))
+    except Exception:
+        timeout = 10.0
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            while True:
+                entries = outbox.peek(batch_size)
+                if not entries:
+                    break
+                by_id = dict(entries)
+                if not all(_deliver(client, ids, payload) for ids, payload in merge_payloads(entries)):
+                    break
+    except Exception as e:
+        logger.warning("Outbox drain interrupted after %d payloads: %s", sent, e)
+    if sent > 1:
+        logger.info("Outbox replayed %d payloads", sent)
+    return sent
+
+
+class Uploader:
+    """One Easyberry upload loop and the optional pieces configured for it.
+
+    Config sections (all optional) in easyberry_config.json:
+      - `queue`: send only changed things, taken from a bounded UploadQueue fed by
+        database commits; a full snapshot is still sent every `duration` seconds
+        when nothing changed
+      - `upload`: event-driven UploadScheduler for full snapshots (ignored when
+        the queue is enabled, which has its own size/time batching)
+      - `outbox`: journal payloads on disk and replay them in order
+    Without any of them this is the original fixed `duration` snapshot loop.
+    """
+
+    def __init__(self, config_path: str, database, cfg: Optional[Dict[str, Any]] = None,
+                 target: Optional[str] = None):
+        cfg = target_config(cfg if cfg is not None else read_config(config_path), target)
+        self.config_path = config_path
+        self.target = target
+        self.name = target or "default"
+        # optional thing filter: list of thing names this target receives
+        things = cfg.get("things") if target is not None else None
+        self.things = set(things) if isinstance(things, list) else None
+        self.database = database
+        self.duration = cfg.get("duration", 30)
+        # optional store-and-forward journal: every cycle's payload is committed to disk
+        # before sending and replayed in order once the cloud is reachable again
+        self.outbox = open_outbox(config_path, cfg, target)
+        self.drain_batch = int((cfg.get("outbox") or {}).get("drain_batch", 100))
+        # optional bounded change queue between database commits and the sender
+        self.queue = UploadQueue.from_config(cfg, name=self.name)
+        # optional event-driven schedule: upload on database changes (bounded by
+        # min/max intervals) instead of every `duration` seconds
+        self.scheduler = None if self.queue is not None else UploadScheduler.from_config(cfg)
+        self.tokens = get_token_manager(config_path, target)
+        self._bound = self._make_listeners()
+
+    def _make_listeners(self):
+        out = []
+        for fn in ((self.queue.offer if self.queue is not None else None),
+                   (self.scheduler.notify if self.scheduler is not None else None)):
+            if fn is None:
+                continue
+            if self.things is not None:
+                fn = self._filtered(fn)
+            out.append(fn)
+        return out
+
+    def _filtered(self, fn):
+        def _listener(poller_id, changes):
+            mine = [c for c in changes if c.get("name") in self.things]
+            if mine:
+                fn(poller_id, mine)
+        return _listener
+
+    def open(self) -> None:
+        if self.queue is not None:
+            upload_queue.active_queues[self.name] = self.queue
+        if self.database is not None:
+            for fn in self._bound:
+                self.database.add_listener(fn)
+        # refresh the token in the background before it expires
+        self.tokens.start()
+
+    def close(self) -> None:
+        self.tokens.stop()
+        if self.database is not None:
+            for fn in self._bound:
+                self.database.remove_listener(fn)
+        # a newer uploader for the same target may already have registered its queue
+        if upload_queue.active_queues.get(self.name) is self.queue:
+            upload_queue.active_queues.pop(self.name, None)
+        if self.outbox is not None:
+            self.outbox.close()
+
+    def deliver(self, payload: Dict[str, Any], stop_event=None) -> None:
+        if self.things is not None:
+            payload = filter_things(payload, self.things)
+            if not payload.get("things"):
+                return
+        if self.outbox is not None:
+            self.outbox.append(payload)
+            drain_outbox(self.config_path, self.outbox, self.drain_batch, self.target, stop_event)
+        else:
             try:
-                if duration is None or (isinstance(duration, (int, float)) and duration <= 0):
-                    logger.debug("run_loop: waiting indefinitely until stop_event")
-                    stop_event.wait()
-                    # loop will re-check is_set at top and exit
-                else:
-                    stop_event.wait(duration)
+                send_payload(self.config_path, payload, target=self.target, stop_event=stop_event)
             except Exception:
-                # In case stop_event.wait isn't available for some reason, fallback to sleep
-                time.sleep(duration if duration and duration > 0 else 1)
+                # send_payload already logs
+                pass
+
+    def _heartbeat(self) -> Optional[float]:
+        d = self.duration
+        return float(d) if isinstance(d, (int, float)) and d > 0 else None
+
+    def _snapshot(self) -> Dict[str, Any]:
+        if self.scheduler is not None:
+            # reset before building the payload so changes committed while sending trigger the next upload
+            self.scheduler.mark_sent()
+        return build_payload_from_database(self.database)
+
+    def next_payload(self, stop_event) -> Optional[Dict[str, Any]]:
+        """Wait for the next upload; returns None when the loop should stop."""
+        if self.queue is not None:
+            batch = self.queue.get_batch(stop_event, timeout=self._heartbeat())
+            if stop_event is not None and stop_event.is_set():
+                return None
+            if batch:
+                return payload_from_batch(batch)
+            # heartbeat: nothing changed for a whole period, resend the snapshot
+            return self._snapshot()
+        if self.scheduler is not None:
+            if not self.scheduler.wait(stop_event):
+                return None
         else:
-            # No stop_event available; fall back to sleeping
+            _wait_fixed(self.duration, stop_event)
+            if stop_event is not None and stop_event.is_set():
+                return None
+        return self._snapshot()
+
+    def run(self, stop_event=None) -> None:
+        iteration = 0
+        # the first cycle always sends the full snapshot
+        payload: Optional[Dict[str, Any]] = self._snapshot()
+        # Keep running until an external stop_event is set by the runner.stop() call.
+        while payload is not None:
+            iteration += 1
+            logger.debug("run_loop: starting iteration %d", iteration)
+            if stop_event is not None and getattr(stop_event, "is_set", lambda: False)():
+                break
             try:
-                time.sleep(duration if duration and duration > 0 else 1)
+                self.deliver(payload, stop_event)
             except Exception:
-                # ignore sleep interruptions and continue
-                pass
+                # continue looping so polling remains active
+                logger.exception("run_loop: upload failed, continuing loop")
+            else:
+                logger.debug("run_loop: iteration %d completed successfully", iteration)
+            payload = self.next_payload(stop_event)
+        logger.info("run_loop: stop event set, exiting")
+
+
+def run_loop(config_path: str, database, stop_event=None, target: Optional[str] = None) -> None:
+    uploader = Uploader(config_path, database, target=target)
+    uploader.open()
+    try:
+        uploader.run(stop_event)
+    finally:
+        uploader.close()
+
+
+def _wait_fixed(duration, stop_event) -> None:
+    # If a stop_event was provided, prefer waiting on it (interruptible).
+    if stop_event is not None:
+        # If duration is falsy (0, None, negative) wait indefinitely until stop
+        try:
+            if duration is None or (isinstance(duration, (int, float)) and duration <= 0):
+                logger.debug("run_loop: waiting indefinitely until stop_event")
+                stop_event.wait()
+                # loop will re-check is_set at top and exit
+            else:
+                stop_event.wait(duration)
+        except Exception:
+            # In case stop_event.wait isn't available for some reason, fallback to sleep
+            time.sleep(duration if duration and duration > 0 else 1)
+    else:
+        # No stop_event available; fall back to sleeping
+        try:
+            time.sleep(duration if duration and duration > 0 else 1)
+        except Exception:
+            # ignore sleep interruptions and continue
+            pass
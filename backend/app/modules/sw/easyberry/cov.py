@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from app.core.metrics import registry
+
+from .store import Database, database
+
+logger = logging.getLogger(__name__)
+
+COV_PUBLISHED = registry.counter("cov_changes_published_total", "Change-of-value events published")
+COV_SUPPRESSED = registry.counter("cov_changes_suppressed_total", "Updates filtered out by value or deadband")
+COV_DROPPED = registry.counter("cov_batches_dropped_total", "Change batches dropped from full subscriber queues", ("subscriber",))
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def exceeds_deadband(old: Any, new: Any, deadband: Optional[float] = None, deadband_pct: Optional[float] = None) -> bool:
+    """True when `new` differs from the last published `old` by more than the thing's deadband."""
+    if old is None:
+        return True
+    a, b = _as_number(old), _as_number(new)
+    if a is None or b is None:
+        return old != new
+    diff = abs(b - a)
+    if deadband is not None and diff <= float(deadband):
+        return False
+    if deadband_pct is not None and diff <= abs(a) * float(deadband_pct) / 100.0:
+        return False
+    return diff > 0
+
+
+class Subscription:
+    """Bounded queue of change batches for one in-process consumer.
+
+    When the consumer falls `max_batches` behind, the oldest batch is
+    dropped and counted; `get` returns the next batch or None on timeout.
+    """
+
+    def __init__(self, bus: "CovBus", name: str, max_batches: int = 256, names: Optional[Iterable[str]] = None):
+        self._bus = bus
+        self.name = name
+        self.names = set(names) if names is not None else None
+        self._cond = threading.Condition()
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self.max_batches = max(1, int(max_batches))
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+
+    def _put(self, batch: Dict[str, Any]) -> None:
+        if self.names is not None:
+            changes = [c for c in batch["changes"] if c["name"] in self.names]
+            if not changes:
+                return
+            batch = dict(batch, changes=changes)
+        with self._cond:
+            if len(self._queue) >= self.max_batches:
+                self._queue.popleft()
+                self.dropped += 1
+                COV_DROPPED.labels(self.name).inc()
+            self._queue.append(batch)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            if not self._queue:
+                return None
+            self.delivered += 1
+            return self._queue.popleft()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"pending": len(self._queue), "delivered": self.delivered, "dropped": self.dropped}
+
+
+class CovBus:
+    """Change-of-value publish/subscribe fed by Database commits.
+
+    Each commit is reduced to the things whose value moved past their
+    deadband since the last published value (`deadband` absolute or
+    `deadband_pct` percent, set per thing in the config) and published as
+    one batch {"poller_id", "ts", "changes": [{mbid, name, value, prev, ts}]}
+    to every subscriber. The bus only listens to the Database while it has
+    subscribers.
+    """
+
+    def __init__(self, db: Database):
+        self._db = db
+        self._lock = threading.Lock()
+        self._subs: List[Subscription] = []
+        # mbid -> last published value
+        self._last: Dict[str, Any] = {}
+        self._attached = False
+
+    def subscribe(self, name: str, max_batches: int = 256, names: Optional[Iterable[str]] = None) -> Subscription:
+        sub = Subscription(self, name, max_batches=max_batches, names=names)
+        with self._lock:
+            self._subs.append(sub)
+            attach = not self._attached
+            self._attached = True
+        if attach:
+            self._db.add_listener(self.publish)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+            detach = self._attached and not self._subs
+            if detach:
+                self._attached = False
+                # values may move unobserved while detached
+                self._last.clear()
+        if detach:
+            self._db.remove_listener(self.publish)
+
+    def publish(self, poller_id: Optional[str], changes: List[Dict[str, Any]]) -> None:
+        out = []
+        with self._lock:
+            subs = list(self._subs)
+            for c in changes:
+                mbid = c.get("mbid")
+                prev = self._last.get(mbid)
+                # change records carry the thing's deadband settings (see Database._apply_value)
+                if not exceeds_deadband(prev, c.get("value"), c.get("deadband"), c.get("deadband_pct")):
+                    continue
+                self._last[mbid] = c.get("value")
+                out.append({"mbid": mbid, "name": c.get("name"), "value": c.get("value"), "prev": prev, "ts": c.get("ts")})
+        if len(changes) > len(out):
+            COV_SUPPRESSED.inc(len(changes) - len(out))
+        if not out or not subs:
+            return
+        COV_PUBLISHED.inc(len(out))
+        batch = {"poller_id": poller_id, "ts": time.time(), "changes": out}
+        for sub in subs:
+            try:
+                sub._put(batch)
+            except Exception:
+                logger.exception("COV: delivery to %s failed", sub.name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subs = list(self._subs)
+        return {sub.name: sub.stats() for sub in subs}
+
+
+cov_bus = CovBus(database)
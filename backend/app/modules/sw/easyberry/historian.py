@@ -0,0 +1,289 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    thing TEXT NOT NULL,
+    ts REAL NOT NULL,
+    value
+);
+CREATE INDEX IF NOT EXISTS idx_samples_thing_ts ON samples(thing, ts);
+CREATE INDEX IF NOT EXISTS idx_samples_ts ON samples(ts);
+"""
+
+
+class Historian:
+    """Embedded SQLite (WAL) time-series store for thing values.
+
+    `record()` is meant to be registered as a `Database` listener: it only
+    enqueues the change records. A single writer thread drains the queue every
+    `flush_interval` seconds and commits it in transactions of up to `max_batch`
+    rows, so the SD card sees a few sequential writes per second instead of one
+    per value. Retention and size limits are applied
+    periodically by the same thread.
+    """
+
+    def __init__(self, path: str = "history.db", flush_interval: float = 1.0, max_batch: int = 5000,
+                 retention_seconds: Optional[float] = 30 * 86400, max_bytes: Optional[int] = 256 * 1024 * 1024,
+                 compact_interval: float = 300.0, max_pending: int = 100000):
+        self.path = path
+        self.flush_interval = float(flush_interval)
+        self.max_batch = int(max_batch)
+        self.retention_seconds = retention_seconds
+        self.max_bytes = max_bytes
+        self.compact_interval = float(compact_interval)
+        self._queue: "queue.Queue[List[tuple]]" = queue.Queue(maxsize=max_pending)
+        self._stop_ev = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self._reader: Optional[sqlite3.Connection] = None
+        self._dropped = 0
+        self._written = 0
+
+    # -- lifecycle -------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        # incremental auto-vacuum lets compaction hand pages back to the filesystem cheaply;
+        # SQLite ignores it once the journal is WAL, so it has to come first
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across application crashes in WAL mode and avoids an fsync per commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def start(self) -> bool:
+        if self._thread and self._thread.is_alive():
+            return False
+        dirn = os.path.dirname(self.path)
+        if dirn:
+            os.makedirs(dirn, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # file created without auto-vacuum: a one-time VACUUM converts it
+            logger.info("Easyberry: historian enabling incremental vacuum on %s", self.path)
+            conn.execute("VACUUM")
+        self._writer = conn
+        self._stop_ev.clear()
+        self._thread = threading.Thread(target=self._run, name="easyberry-historian", daemon=True)
+        self._thread.start()
+        logger.info("Easyberry: historian started path=%s", self.path)
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_ev.set()
+        t = self._thread
+        if t is not None:
+            t.join(timeout)
+        self._thread = None
+        with self._write_lock:
+            if self._writer is not None:
+                try:
+                    self._writer.close()
+                except Exception:
+                    pass
+                self._writer = None
+        with self._read_lock:
+            if self._reader is not None:
+                try:
+                    self._reader.close()
+                except Exception:
+                    pass
+                self._reader = None
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    # -- write path ------------------------------------------------------
+    def record(self, poller_id: Optional[str], changes: List[Dict[str, Any]]) -> None:
+        """Database listener: enqueue change records without touching the disk."""
+        rows = []
+        for c in changes:
+            thing = c.get("name") or c.get("mbid")
+            if thing is None:
+                continue
+            val = c.get("value")
+            if not isinstance(val, (int, float, str, bytes)) and val is not None:
+                val = str(val)
+            rows.append((str(thing), float(c.get("ts") or time.time()), val))
+        if not rows:
+            return
+        try:
+            self._queue.put_nowait(rows)
+        except queue.Full:
+            # never block the poll commit path; count and drop instead
+            self._dropped += len(rows)
+
+    def _drain(self) -> List[tuple]:
+        batch: List[tuple] = []
+        while len(batch) < self.max_batch:
+            try:
+                batch.extend(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush_pending(self) -> int:
+        written = 0
+        with self._write_lock:
+            if self._writer is None:
+                return 0
+            while True:
+                batch = self._drain()
+                if batch:
+                    self._write(self._writer, batch)
+                    written += len(batch)
+                if len(batch) < self.max_batch:
+                    break
+        return written
+
+    def _run(self) -> None:
+        last_compact = time.time()
+        try:
+            while True:
+                # collect whatever arrives during the flush window, then commit it in one go
+                stopping = self._stop_ev.wait(self.flush_interval)
+                self._flush_pending()
+                if time.time() - last_compact >= self.compact_interval:
+                    last_compact = time.time()
+                    with self._write_lock:
+                        self.compact(self._writer)
+                if stopping:
+                    break
+        except Exception:
+            logger.exception("Easyberry: historian writer crashed")
+
+    def _write(self, conn: sqlite3.Connection, batch: List[tuple]) -> None:
+        try:
+            with conn:
+                conn.executemany("INSERT INTO samples(thing, ts, value) VALUES (?, ?, ?)", batch)
+            self._written += len(batch)
+        except Exception:
+            logger.exception("Easyberry: historian failed writing %d rows", len(batch))
+
+    def flush(self) -> int:
+        """Commit everything queued so far without waiting for the flush window."""
+        return self._flush_pending()
+
+    # -- compaction ------------------------------------------------------
+    def _db_bytes(self) -> int:
+        # what the store occupies on the SD card: the database file plus its WAL
+        total = 0
+        for path in (self.path, self.path + "-wal"):
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        # executescript steps the pragma to completion; execute() would free a single page
+        conn.executescript("PRAGMA incremental_vacuum;")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def compact(self, conn: Optional[sqlite3.Connection] = None) -> int:
+        """Apply retention and size limits. Returns the number of rows removed."""
+        own = conn is None
+        if own:
+            conn = self._connect()
+        removed = 0
+        try:
+            if self.retention_seconds:
+                cutoff = time.time() - float(self.retention_seconds)
+                with conn:
+                    removed += conn.execute("DELETE FROM samples WHERE ts < ?", (cutoff,)).rowcount
+                if removed:
+                    self._release(conn)
+            if self.max_bytes:
+                # drop the oldest 10% of rows at a time until under budget
+                while self._db_bytes() > self.max_bytes:
+                    total = conn.execute("SELECT COUNT(*) FROM samples").fetchone()[0]
+                    if total == 0:
+                        break
+                    n = max(1, total // 10)
+                    row = conn.execute("SELECT ts FROM samples ORDER BY ts LIMIT 1 OFFSET ?", (n - 1,)).fetchone()
+                    if row is None:
+                        break
+                    with conn:
+                        n_deleted = conn.execute("DELETE FROM samples WHERE ts <= ?", (row[0],)).rowcount
+                    removed += n_deleted
+                    if n_deleted <= 0:
+                        break
+                    self._release(conn)
+            if removed:
+                logger.info("Easyberry: historian compacted %d rows", removed)
+        except Exception:
+            logger.exception("Easyberry: historian compaction failed")
+        finally:
+            if own:
+                conn.close()
+        return removed
+
+    # -- read path -------------------------------------------------------
+    def query(self, thing: str, start: Optional[float] = None, end: Optional[float] = None,
+              limit: int = 1000) -> List[Dict[str, Any]]:
+        """Return samples for `thing` in [start, end], oldest first.
+
+        Samples are keyed by thing name, or by mbid for things without a name.
+        """
+        sql = "SELECT ts, value FROM samples WHERE thing = ?"
+        params: List[Any] = [str(thing)]
+        if start is not None:
+            sql += " AND ts >= ?"
+            params.append(float(start))
+        if end is not None:
+            sql += " AND ts <= ?"
+            params.append(float(end))
+        sql += " ORDER BY ts LIMIT ?"
+        params.append(int(limit))
+        with self._read_lock:
+            if self._reader is None:
+                self._reader = self._connect()
+            rows = self._reader.execute(sql, params).fetchall()
+        return [{"ts": r[0], "value": r[1]} for r in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running(),
+            "path": self.path,
+            "pending": self._queue.qsize(),
+            "written": self._written,
+            "dropped": self._dropped,
+        }
+
+
+# global historian; started from app startup when enabled in settings
+historian: Optional[Historian] = None
+
+
+def start_historian(path: str, **kwargs) -> Historian:
+    """Create (if needed) and start the global historian and attach it to the database."""
+    global historian
+    from .store import database
+
+    if historian is None:
+        historian = Historian(path, **kwargs)
+    historian.start()
+    database.add_listener(historian.record)
+    return historian
+
+
+def stop_historian() -> None:
+    global historian
+    if historian is None:
+        return
+    from .store import database
+
+    database.remove_listener(historian.record)
+    historian.stop()
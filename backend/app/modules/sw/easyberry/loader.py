@@ -3,7 +3,7 @@ from typing import Dict
 from .store import database
 
 
-def load_from_file(path: str) -> None:
+def load_from_file(path: str) -> Dict[str, int]:
     with open(path, "r", encoding="utf-8") as f:
         cfg = json.load(f)
-    database.load_from_dict(cfg)
+    return database.load_from_dict(cfg)
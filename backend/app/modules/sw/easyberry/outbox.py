@@ -0,0 +1,116 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+
+class Outbox:
+    """Disk-backed FIFO journal of Easyberry upload payloads.
+
+    Every payload is committed here before it is sent and only removed once
+    the server acknowledged it, so uploads survive both cloud outages and
+    gateway restarts. When more than `max_entries` payloads are pending the
+    oldest ones are discarded.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+        dirn = os.path.dirname(path)
+        if dirn:
+            os.makedirs(dirn, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # FULL: an acknowledged append must survive a power cut, not just a crash
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._dropped = 0
+
+    def append(self, payload: Dict[str, Any]) -> int:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        with self._lock, self._conn:
+            cur = self._conn.execute("INSERT INTO outbox(ts, payload) VALUES (?, ?)", (time.time(), body))
+            new_id = int(cur.lastrowid)
+            if self.max_entries > 0:
+                excess = self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM outbox WHERE id IN (SELECT id FROM outbox ORDER BY id LIMIT ?)", (excess,))
+                    self._dropped += excess
+                    logger.warning("Easyberry: outbox full, dropped %d oldest payloads", excess)
+        return new_id
+
+    def peek(self, limit: int = 100) -> List[Tuple[int, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id, payload FROM outbox ORDER BY id LIMIT ?", (int(limit),)).fetchall()
+        out = []
+        for rid, body in rows:
+            try:
+                out.append((int(rid), json.loads(body)))
+            except Exception:
+                logger.error("Easyberry: discarding unreadable outbox entry id=%s", rid)
+                self.ack(rid)
+        return out
+
+    def ack(self, entry_id: int) -> None:
+        self.ack_many([entry_id])
+
+    def ack_many(self, entry_ids: List[int]) -> None:
+        """Delete delivered entries in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(int(i),) for i in entry_ids])
+
+    def depth(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0])
+
+    def oldest_ts(self) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute("SELECT ts FROM outbox ORDER BY id LIMIT 1").fetchone()
+        return float(row[0]) if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        oldest = self.oldest_ts()
+        return {
+            "depth": self.depth(),
+            "oldest_age": (time.time() - oldest) if oldest is not None else None,
+            "dropped": self._dropped,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+
+def open_outbox(config_path: str, cfg: Dict[str, Any], target: Optional[str] = None) -> Optional[Outbox]:
+    """Open the outbox described by the `outbox` section of the config, if enabled."""
+    ocfg = cfg.get("outbox") or {}
+    if not ocfg.get("enabled"):
+        return None
+    path = ocfg.get("path") or "easyberry_outbox.db"
+    if target is not None:
+        # every upload target keeps its own journal
+        root, ext = os.path.splitext(path)
+        path = f"{root}-{target}{ext}"
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(config_path)), path)
+    return Outbox(path, max_entries=int(ocfg.get("max_entries", 10000)))
@@ -1,46 +1,130 @@
+import itertools
 import threading
+import time
+import zlib
 from collections import deque
-from typing import Optional
+from typing import Any, Dict, Optional
 import logging
-import uuid
 
 logger = logging.getLogger(__name__)
 
+# rough fixed cost of one entry (dict, floats, endpoint/note strings)
+_ENTRY_OVERHEAD = 256
+
 
 class EasyberryPacketStore:
-    def __init__(self, maxlen: int = 500):
+    """Recent Easyberry HTTP exchanges kept for the debug UI and CLI.
+
+    The store is bounded both by entry count (`maxlen`) and by the total size
+    of what it holds (`max_bytes`); the oldest exchanges are evicted first.
+    Bodies longer than `body_limit` characters are truncated (0 = keep whole)
+    and, with `compress`, kept zlib-compressed until they are read back.
+    Header dicts are only kept when `capture_headers` is on (debug mode).
+    """
+
+    def __init__(self, maxlen: int = 500, max_bytes: int = 2 * 1024 * 1024, body_limit: int = 16384,
+                 compress: bool = False, capture_headers: bool = False):
         self._lock = threading.Lock()
-        self._deque = deque(maxlen=maxlen)
+        self._deque = deque()
+        self.maxlen = max(1, int(maxlen))
+        self.max_bytes = max(0, int(max_bytes))
+        self.body_limit = max(0, int(body_limit))
+        self.compress = bool(compress)
+        self.capture_headers = bool(capture_headers)
+        self._ids = itertools.count(1)
+        self._bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _pack_body(self, body: Optional[str]):
+        if body is None:
+            return None, 0
+        if self.body_limit and len(body) > self.body_limit:
+            body = f"{body[:self.body_limit]}... [truncated {len(body) - self.body_limit} chars]"
+        if self.compress:
+            packed = zlib.compress(body.encode("utf-8"), 1)
+            return packed, len(packed)
+        return body, len(body)
+
+    @staticmethod
+    def _unpack_body(body) -> Optional[str]:
+        if isinstance(body, bytes):
+            return zlib.decompress(body).decode("utf-8")
+        return body
 
-    def add(self, endpoint: str, request_body: Optional[str], response_body: Optional[str], status: Optional[int] = None, note: Optional[str] = None):
-        import time
+    @staticmethod
+    def _headers_size(headers: Optional[Dict[str, Any]]) -> int:
+        if not headers:
+            return 0
+        return sum(len(str(k)) + len(str(v)) for k, v in headers.items())
+
+    def add(self, endpoint: str, request_body: Optional[str], response_body: Optional[str], status: Optional[int] = None,
+            note: Optional[str] = None, request_headers: Optional[Dict[str, Any]] = None,
+            response_headers: Optional[Dict[str, Any]] = None, content_type: Optional[str] = None):
+        if not self.enabled:
+            return
+        req, req_size = self._pack_body(request_body)
+        resp, resp_size = self._pack_body(response_body)
+        if not self.capture_headers:
+            request_headers = None
+            response_headers = None
+        size = (_ENTRY_OVERHEAD + req_size + resp_size
+                + self._headers_size(request_headers) + self._headers_size(response_headers))
         entry = {
-            'id': str(uuid.uuid4()),
+            'id': next(self._ids),
             'ts': time.time(),
             'endpoint': endpoint,
-            'request': request_body,
-            'response': response_body,
-            'request_headers': None,
-            'response_headers': None,
-            'content_type': None,
+            'request': req,
+            'response': resp,
+            'request_headers': dict(request_headers) if request_headers else None,
+            'response_headers': dict(response_headers) if response_headers else None,
+            'content_type': content_type,
             'status': status,
             'note': note,
+            '_size': size,
         }
         with self._lock:
             self._deque.append(entry)
-            try:
-                logger.info("Easyberry: packet added endpoint=%s status=%s note=%s", endpoint, status, note)
-            except Exception:
-                pass
+            self._bytes += size
+            while self._deque and (len(self._deque) > self.maxlen or self._bytes > self.max_bytes):
+                self._bytes -= self._deque.popleft()['_size']
+        logger.debug("Easyberry: packet added endpoint=%s status=%s note=%s", endpoint, status, note)
 
     def get_last(self, limit: int = 200):
         with self._lock:
-            items = list(self._deque)[-limit:]
-            return [dict(i) for i in items]
+            items = list(self._deque)[-limit:] if limit > 0 else []
+        out = []
+        for i in items:
+            d = {k: v for k, v in i.items() if k != '_size'}
+            d['request'] = self._unpack_body(d['request'])
+            d['response'] = self._unpack_body(d['response'])
+            out.append(d)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._deque), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
 
     def clear(self):
         with self._lock:
             self._deque.clear()
+            self._bytes = 0
+
+
+def _store_from_settings() -> EasyberryPacketStore:
+    try:
+        from app.core.settings import settings
+        return EasyberryPacketStore(
+            max_bytes=int(settings.packet_store_max_kb * 1024),
+            body_limit=settings.packet_store_body_limit,
+            compress=settings.packet_store_compress,
+            capture_headers=settings.packet_store_debug,
+        )
+    except Exception:
+        logger.debug("packet store settings unavailable, using defaults")
+        return EasyberryPacketStore()
 
 
-eb_packet_store = EasyberryPacketStore()
+eb_packet_store = _store_from_settings()
@@ -0,0 +1,147 @@
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of sending while the circuit breaker considers the cloud down."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds from now."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if dt is None:
+        return None
+    return max(0.0, dt.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient upload failures.
+
+    A server supplied Retry-After (capped at `max_delay`) replaces the computed delay.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 30.0,
+                 retry_statuses=(408, 429, 500, 502, 503, 504)):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = max(0.0, float(base_delay))
+        self.max_delay = max(0.0, float(max_delay))
+        self.retry_statuses = frozenset(int(s) for s in retry_statuses)
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "RetryPolicy":
+        rcfg = cfg.get("retry") or {}
+        kwargs = {k: rcfg[k] for k in ("max_attempts", "base_delay", "max_delay", "retry_statuses") if k in rcfg}
+        return cls(**kwargs)
+
+    def is_retryable(self, status: Optional[int]) -> bool:
+        # None means no response at all (timeout, connection refused, ...)
+        return status is None or status in self.retry_statuses
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number `attempt` (1-based)."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0.0, cap)
+
+
+class CircuitBreaker:
+    """Stop sending while the cloud is down and probe it periodically.
+
+    closed: requests flow; `failure_threshold` consecutive failures open the circuit.
+    open: requests are rejected without touching the network for `reset_timeout` s.
+    half_open: a single probe request is let through; success closes the circuit,
+    failure opens it again for another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = max(0.0, float(reset_timeout))
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._rejected = 0
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "CircuitBreaker":
+        bcfg = cfg.get("circuit_breaker") or {}
+        return cls(failure_threshold=bcfg.get("failure_threshold", 5), reset_timeout=bcfg.get("reset_timeout", 30.0))
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = "half_open"
+                self._probe_in_flight = False
+            if self._state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != "closed":
+                logger.info("Easyberry: circuit closed, cloud reachable again")
+            self._state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    logger.warning("Easyberry: circuit opened after %d failures", self._failures)
+                self._state = "open"
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self._state, "failures": self._failures, "rejected": self._rejected}
+
+
+_breakers: Dict[Tuple[str, Optional[str]], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(config_path: str, target: Optional[str], cfg: Dict[str, Any]) -> CircuitBreaker:
+    """Return the shared breaker for a config file and upload target."""
+    key = (config_path, target)
+    with _breakers_lock:
+        br = _breakers.get(key)
+        if br is None:
+            br = CircuitBreaker.from_config(cfg)
+            _breakers[key] = br
+        return br
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        items = list(_breakers.items())
+    return {(target or "default"): br.stats() for (_, target), br in items}
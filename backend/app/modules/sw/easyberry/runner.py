@@ -1,14 +1,16 @@
 import threading
 import os
+import time
 import logging
-from typing import Optional
+from typing import Dict, Optional
 
+from .config import read_config, target_names
 from .connector import run_loop
 
 logger = logging.getLogger(__name__)
 
-# module-level runner state
-_thread: Optional[threading.Thread] = None
+# module-level runner state: one upload thread per configured target
+_threads: Dict[str, threading.Thread] = {}
 _stop_event: Optional[threading.Event] = None
 
 
@@ -16,36 +18,65 @@ def _config_path():
     return os.path.join(os.getcwd(), "easyberry_config.json")
 
 
+def _running() -> bool:
+    return any(t.is_alive() for t in _threads.values())
+
+
 def start():
-    global _thread, _stop_event
-    if _thread and _thread.is_alive():
+    global _threads, _stop_event
+    if _running():
         return False
     _stop_event = threading.Event()
     cfg_path = _config_path()
-    t = threading.Thread(target=run_loop, args=(cfg_path, __import__('app.modules.sw.easyberry.store', fromlist=['database']).modules.sw.easyberry.store.database if False else __import__('app.modules.sw.easyberry.store', fromlist=['database']).database, _stop_event), daemon=True)
-    # The above import trick is to avoid circular import at module load; simpler: import inside target by using run_loop which accepts database
-    # But we need to pass the database instance; import here properly
     try:
         from app.modules.sw.easyberry.store import database
-        t = threading.Thread(target=run_loop, args=(cfg_path, database, _stop_event), daemon=True)
     except Exception:
-        t = threading.Thread(target=run_loop, args=(cfg_path, None, _stop_event), daemon=True)
+        database = None
+    try:
+        targets = target_names(read_config(cfg_path))
+    except Exception:
+        logger.exception("Easyberry runner: failed reading targets, using default settings")
+        targets = [None]
 
-    _thread = t
-    t.start()
-    logger.info("Easyberry runner started")
+    # every target gets its own loop, so a slow or unreachable endpoint never delays the others
+    threads = {}
+    for target in targets:
+        name = target or "default"
+        t = threading.Thread(target=run_loop, args=(cfg_path, database, _stop_event, target),
+                             name=f"easyberry-{name}", daemon=True)
+        threads[name] = t
+    _threads = threads
+    for t in threads.values():
+        t.start()
+    logger.info("Easyberry runner started targets=%s", list(threads))
     return True
 
 
-def stop():
-    global _thread, _stop_event
+def stop(timeout: float = 5.0):
+    global _threads, _stop_event
     if _stop_event:
         _stop_event.set()
-    _thread = None
+    # wait for the loops to close their uploaders so a following start() never overlaps them
+    deadline = time.monotonic() + timeout
+    for name, t in _threads.items():
+        t.join(max(0.0, deadline - time.monotonic()))
+        if t.is_alive():
+            logger.warning("Easyberry runner: target %s did not stop within %.1fs", name, timeout)
+    _threads = {}
     _stop_event = None
     logger.info("Easyberry runner stopped")
     return True
 
 
 def status() -> dict:
-    return {"running": bool(_thread and _thread.is_alive())}
+    out = {"running": _running()}
+    if _threads:
+        out["targets"] = {name: t.is_alive() for name, t in _threads.items()}
+    from . import upload_queue
+    if upload_queue.active_queues:
+        out["queues"] = {name: q.stats() for name, q in upload_queue.active_queues.items()}
+    from .resilience import breaker_stats
+    breakers = breaker_stats()
+    if breakers:
+        out["circuit"] = breakers
+    return out
@@ -0,0 +1,78 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UploadScheduler:
+    """Decide when the Easyberry upload loop should send, driven by database commits.
+
+    Register `notify` as a `Database` listener. `wait()` then returns as soon as
+    an upload is due:
+      - changes are pending and at least `min_interval` passed since the last
+        send; with `flush_on_poll` the upload goes out right after the poll
+        commit, otherwise a burst of commits is coalesced for `min_interval`
+        starting at the first change;
+      - or nothing was sent for `max_interval` seconds (heartbeat, disabled
+        when falsy).
+    """
+
+    def __init__(self, min_interval: float = 1.0, max_interval: Optional[float] = 30.0, flush_on_poll: bool = True):
+        self.min_interval = max(0.0, float(min_interval or 0.0))
+        self.max_interval = float(max_interval) if max_interval and float(max_interval) > 0 else None
+        self.flush_on_poll = bool(flush_on_poll)
+        self._cond = threading.Condition()
+        self._dirty_since: Optional[float] = None
+        self._last_send = time.monotonic()
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["UploadScheduler"]:
+        """Build a scheduler from the `upload` config section; None keeps the fixed `duration` loop."""
+        ucfg = cfg.get("upload")
+        if not isinstance(ucfg, dict):
+            return None
+        return cls(
+            min_interval=float(ucfg.get("min_interval", 1.0)),
+            max_interval=ucfg.get("max_interval", cfg.get("duration", 30)),
+            flush_on_poll=bool(ucfg.get("flush_on_poll", True)),
+        )
+
+    def notify(self, poller_id: Optional[str] = None, changes: Optional[List[Dict[str, Any]]] = None) -> None:
+        with self._cond:
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            self._cond.notify_all()
+
+    def mark_sent(self) -> None:
+        with self._cond:
+            self._last_send = time.monotonic()
+            self._dirty_since = None
+
+    def _due_at(self) -> Optional[float]:
+        # caller holds self._cond
+        due = None
+        if self._dirty_since is not None:
+            if self.flush_on_poll:
+                due = max(self._last_send + self.min_interval, self._dirty_since)
+            else:
+                due = max(self._last_send, self._dirty_since) + self.min_interval
+        if self.max_interval is not None:
+            heartbeat = self._last_send + self.max_interval
+            due = heartbeat if due is None else min(due, heartbeat)
+        return due
+
+    def wait(self, stop_event: Optional[threading.Event] = None, poll: float = 0.25) -> bool:
+        """Block until an upload is due. Returns False if `stop_event` was set first."""
+        with self._cond:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                due = self._due_at()
+                now = time.monotonic()
+                if due is not None and now >= due:
+                    return True
+                timeout = poll if due is None else min(poll, due - now)
+                # wake up periodically so a stop request is honoured promptly
+                self._cond.wait(timeout)
@@ -1,12 +1,39 @@
 import json
 import threading
 import time
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
 
 import logging
 logger = logging.getLogger(__name__)
 
 from .error_logger import ErrorLogger
+from app.core.metrics import registry
+
+COMMIT_SECONDS = registry.histogram("easyberry_db_commit_seconds", "Time to apply one poll result to the Database")
+THINGS_CHANGED = registry.counter("easyberry_db_things_changed_total", "Thing values changed by poll results", ("poller",))
+
+
+# thing fields maintained at runtime rather than by the config file
+_LIVE_FIELDS = ("value", "updated_at", "meta")
+
+
+def _config_equal(live: Dict[str, Any], new: Dict[str, Any]) -> bool:
+    for k, v in new.items():
+        if k not in _LIVE_FIELDS and live.get(k) != v:
+            return False
+    for k in live:
+        if k not in _LIVE_FIELDS and k not in new:
+            return False
+    return True
+
+
+def _carry_live(old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    # only carry values that were actually read; a never-updated thing keeps the config's initial value
+    if "updated_at" not in old:
+        return
+    for k in _LIVE_FIELDS:
+        if k in old:
+            new[k] = old[k]
 
 
 class Database:
@@ -17,52 +44,156 @@ class Database:
         # mbid -> (poller_id, thing_dict)
         self.mbid_index: Dict[str, Tuple[str, Dict[str, Any]]] = {}
         self._error_logger = ErrorLogger()
+        # commit listeners: callback(poller_id, changes) where changes is a list of
+        # {"mbid", "name", "value", "ts"} dicts. Called outside the database lock.
+        self._listeners: List[Callable[[Optional[str], List[Dict[str, Any]]], None]] = []
+        # poller id -> last time its values were confirmed current (changed or not)
+        self._fresh_at: Dict[str, float] = {}
+        # poller id -> bumped when a reload changed its things; pollers that skip
+        # unchanged replies must do a full update when it moves (see generation())
+        self._generation: Dict[str, int] = {}
 
-    def load_from_dict(self, cfg: Dict[str, Any]) -> None:
+    def add_listener(self, fn: Callable[[Optional[str], List[Dict[str, Any]]], None]) -> None:
         with self._lock:
-            self.pollers = cfg.get("pollers", [])
+            if fn not in self._listeners:
+                self._listeners.append(fn)
+
+    def remove_listener(self, fn: Callable[[Optional[str], List[Dict[str, Any]]], None]) -> None:
+        with self._lock:
+            try:
+                self._listeners.remove(fn)
+            except ValueError:
+                pass
+
+    def _notify(self, poller_id: Optional[str], changes: List[Dict[str, Any]]) -> None:
+        if not changes:
+            return
+        with self._lock:
+            listeners = list(self._listeners)
+        for fn in listeners:
+            try:
+                fn(poller_id, changes)
+            except Exception:
+                logger.exception("Easyberry: database listener failed")
+
+    def load_from_dict(self, cfg: Dict[str, Any]) -> Dict[str, int]:
+        """Apply a (re)loaded config without losing live values.
+
+        Things are matched to the running ones by mbid (or, failing that, by
+        name). A thing whose configuration is unchanged keeps its existing
+        dict, so value, updated_at and meta survive and its index entry is
+        reused; a changed thing gets the new config with the live fields
+        carried forward. The index is rebuilt and swapped in at once, so
+        readers iterating the old one are never disturbed; pollers with added
+        or changed things get a new generation(). Returns counts of
+        kept/changed/added/removed things.
+        """
+        with self._lock:
+            pollers = cfg.get("pollers", [])
             # ensure each poller has an id
-            for p in self.pollers:
+            for p in pollers:
                 if "id" not in p:
                     p.setdefault("id", f"poller-{int(time.time()*1000)}")
                 p.setdefault("things", [])
-            self._build_index()
-
-    def _build_index(self) -> None:
-        idx: Dict[str, Tuple[str, Dict[str, Any]]] = {}
-        for p in self.pollers:
-            pid = p.get("id")
-            for t in p.get("things", []):
-                mbid = str(t.get("mbid"))
-                if not mbid:
-                    continue
-                idx[mbid] = (pid, t)
-        self.mbid_index = idx
-        logger.info("Easyberry: built mbid index with %d entries", len(self.mbid_index))
+            old_index = self.mbid_index
+            new_index: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+            by_name: Optional[Dict[str, Dict[str, Any]]] = None
+            seen = set()
+            dirty = set()
+            counts = {"kept": 0, "changed": 0, "added": 0, "removed": 0}
+            for p in pollers:
+                pid = p.get("id")
+                things = p["things"]
+                for i, t in enumerate(things):
+                    mbid = str(t.get("mbid"))
+                    if not mbid:
+                        continue
+                    seen.add(mbid)
+                    old = old_index.get(mbid)
+                    if old is None:
+                        if by_name is None:
+                            by_name = {th.get("name"): th for _, th in old_index.values() if th.get("name")}
+                        prev = by_name.get(t.get("name")) if t.get("name") else None
+                        if prev is not None:
+                            _carry_live(prev, t)
+                            counts["changed"] += 1
+                        else:
+                            counts["added"] += 1
+                        new_index[mbid] = (pid, t)
+                        dirty.add(pid)
+                        continue
+                    old_pid, old_thing = old
+                    if old_pid == pid and _config_equal(old_thing, t):
+                        # unchanged: keep the live dict (and its index entry) as is
+                        things[i] = old_thing
+                        new_index[mbid] = old
+                        counts["kept"] += 1
+                        continue
+                    _carry_live(old_thing, t)
+                    new_index[mbid] = (pid, t)
+                    dirty.add(pid)
+                    counts["changed"] += 1
+            counts["removed"] = sum(1 for m in old_index if m not in seen)
+            self.mbid_index = new_index
+            self.pollers = pollers
+            for pid in dirty:
+                self._generation[pid] = self._generation.get(pid, 0) + 1
+        logger.info("Easyberry: config applied %s", counts)
+        return counts
+
+    def touch(self, poller_id: str) -> None:
+        """Mark a poller's values as still current without rewriting them (unchanged poll)."""
+        self._fresh_at[poller_id] = time.time()
+
+    def fresh_at(self, poller_id: str) -> Optional[float]:
+        return self._fresh_at.get(poller_id)
+
+    def generation(self, poller_id: str) -> int:
+        """Changes whenever a reload added or remapped things of `poller_id`."""
+        return self._generation.get(poller_id, 0)
 
     def get_pollers(self) -> List[Dict[str, Any]]:
         with self._lock:
             return list(self.pollers)
 
+    def dumps(self, **kwargs: Any) -> str:
+        """Serialize the pollers/things tree as JSON under the lock (safe from any thread)."""
+        with self._lock:
+            return json.dumps(self.pollers, **kwargs)
+
     def get_thing_by_mbid(self, mbid: str) -> Optional[Tuple[str, Dict[str, Any]]]:
         with self._lock:
             return self.mbid_index.get(str(mbid))
 
+    def _apply_value(self, mbid_s: str, new_value: Any, meta: Optional[Dict] = None) -> Optional[Dict[str, Any]]:
+        # caller must hold self._lock; returns a change record or None if mbid is unknown
+        entry = self.mbid_index.get(mbid_s)
+        if not entry:
+            # log missing mbid
+            self._error_logger.log_missing_mbid(mbid_s, meta)
+            return None
+        pid, thing = entry
+        # update fields
+        ts = time.time()
+        thing["value"] = new_value
+        thing["updated_at"] = ts
+        if meta:
+            thing.setdefault("meta", {}).update(meta)
+        change = {"mbid": mbid_s, "name": thing.get("name"), "value": new_value, "ts": ts}
+        # carried along so change-of-value filtering needs no second lookup
+        for key in ("deadband", "deadband_pct"):
+            if thing.get(key) is not None:
+                change[key] = thing[key]
+        return change
+
     def update_thing_value_by_mbid(self, mbid: str, new_value: Any, meta: Optional[Dict] = None) -> bool:
         mbid_s = str(mbid)
         with self._lock:
-            entry = self.mbid_index.get(mbid_s)
-            if not entry:
-                # log missing mbid
-                self._error_logger.log_missing_mbid(mbid_s, meta)
-                return False
-            pid, thing = entry
-            # update fields
-            thing["value"] = new_value
-            thing["updated_at"] = time.time()
-            if meta:
-                thing.setdefault("meta", {}).update(meta)
-            return True
+            change = self._apply_value(mbid_s, new_value, meta=meta)
+        if change is None:
+            return False
+        self._notify(None, [change])
+        return True
 
     def update_from_poll_result(self, poller_id: str, values: List[Any], meta: Optional[Dict] = None) -> int:
         """Update things for a poller using their configured `register_index`.
@@ -70,7 +201,9 @@ class Database:
         Expects each thing in poller to have optional `register_index` int.
         Returns number of things updated.
         """
+        t0 = time.perf_counter()
         updated = 0
+        changes: List[Dict[str, Any]] = []
         with self._lock:
             # First, attempt to update using poller's configured `register_index` if the poller is known
             poller = next((p for p in self.pollers if p.get("id") == poller_id), None)
@@ -85,9 +218,11 @@ class Database:
                     except Exception:
                         continue
                     mbid_s = str(thing.get("mbid"))
-                    if self.update_thing_value_by_mbid(mbid_s, val, meta=meta):
+                    change = self._apply_value(mbid_s, val, meta=meta)
+                    if change is not None:
                         updated += 1
                         updated_mbids.add(mbid_s)
+                        changes.append(change)
 
             # Secondly, if meta provides a base_address, try matching mbid == absolute_address
             # (absolute_address = base_address + index). This allows updating things by 'mbid'
@@ -104,9 +239,17 @@ class Database:
                     abs_addr = str(base + int(idx))
                     if abs_addr in updated_mbids:
                         continue
-                    if self.update_thing_value_by_mbid(abs_addr, val, meta=meta):
+                    change = self._apply_value(abs_addr, val, meta=meta)
+                    if change is not None:
                         updated += 1
                         updated_mbids.add(abs_addr)
+                        changes.append(change)
+            self._fresh_at[poller_id] = time.time()
+        COMMIT_SECONDS.observe(time.perf_counter() - t0)
+        if changes:
+            THINGS_CHANGED.labels(poller_id).inc(len(changes))
+        # listeners (historian, uploaders) run outside the lock so they cannot stall pollers
+        self._notify(poller_id, changes)
         return updated
 
 
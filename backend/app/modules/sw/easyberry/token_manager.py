@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import jwt
+
+from .auth import request_token
+from .config import read_config, target_config
+
+logger = logging.getLogger(__name__)
+
+
+def token_expiry(token: Optional[str]) -> Optional[float]:
+    """Return the `exp` claim of a JWT (unix seconds), or None for opaque/undecodable tokens."""
+    if not token:
+        return None
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except Exception:
+        return None
+    exp = claims.get("exp")
+    try:
+        return float(exp) if exp is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenManager:
+    """Keep the Easyberry token in memory and refresh it before it expires.
+
+    The token is read from the config file once; afterwards senders call
+    `get_token()` which only hits the network when the token is missing or
+    within `refresh_margin` seconds of its `exp`. Refreshes are single-flight:
+    concurrent callers wait for the one login in progress and share its
+    result. `start()` runs a background thread that refreshes ahead of expiry
+    so the upload path normally never waits for a login; start/stop are
+    reference-counted because every uploader of a target shares one manager,
+    and the thread only stops when the last of them calls `stop()`.
+    """
+
+    def __init__(self, config_path: str, refresh_margin: float = 60.0, retry_interval: float = 30.0,
+                 target: Optional[str] = None):
+        self.config_path = config_path
+        self.target = target
+        self.refresh_margin = float(refresh_margin)
+        self.retry_interval = float(retry_interval)
+        self._token: Optional[str] = None
+        self._exp: Optional[float] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._login_lock = threading.Lock()
+        self._refreshed_at = 0.0
+        self._stop_ev = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._users = 0
+        self._run_lock = threading.Lock()
+
+    def _load(self) -> None:
+        # caller holds self._lock
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            cfg = target_config(read_config(self.config_path), self.target)
+            token = cfg.get("settings", {}).get("token") or None
+        except Exception:
+            token = None
+        self._token = token
+        self._exp = token_expiry(token)
+
+    def set_token(self, token: Optional[str]) -> None:
+        with self._lock:
+            self._loaded = True
+            self._token = token or None
+            self._exp = token_expiry(self._token)
+
+    def _needs_refresh(self) -> bool:
+        # caller holds self._lock
+        if not self._token:
+            return True
+        return self._exp is not None and time.time() >= self._exp - self.refresh_margin
+
+    def get_token(self) -> Optional[str]:
+        with self._lock:
+            self._load()
+            token = self._token
+            stale = self._needs_refresh()
+        if not stale:
+            return token
+        try:
+            return self.refresh(stale_token=token)
+        except Exception as e:
+            logger.warning("Easyberry: token refresh failed: %s", e)
+            # an about-to-expire token is still better than none
+            return token
+
+    def refresh(self, stale_token: Optional[str] = None) -> Optional[str]:
+        """Log in and replace the token; callers that waited on an in-flight login reuse its result."""
+        with self._login_lock:
+            with self._lock:
+                self._load()
+                if self._token and self._token != stale_token and not self._needs_refresh():
+                    return self._token
+            token = request_token(self.config_path, self.target)
+            self.set_token(token)
+            self._refreshed_at = time.time()
+            logger.info("Easyberry: token refreshed, exp=%s", self._exp)
+            return token
+
+    # -- background refresh ----------------------------------------------
+    def start(self) -> bool:
+        with self._run_lock:
+            self._users += 1
+            if self._thread and self._thread.is_alive():
+                return False
+            # a fresh event per thread: a stopped generation still winding down keeps its own
+            self._stop_ev = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop_ev,),
+                                            name="easyberry-token", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, timeout: float = 1.0) -> None:
+        with self._run_lock:
+            self._users = max(0, self._users - 1)
+            if self._users:
+                return
+            self._stop_ev.set()
+            t = self._thread
+            self._thread = None
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout)
+
+    def _run(self, stop_ev: threading.Event) -> None:
+        while not stop_ev.is_set():
+            with self._lock:
+                self._load()
+                exp = self._exp
+                token = self._token
+            if token and exp is None:
+                # opaque token: nothing to schedule, rely on 401 handling
+                stop_ev.wait(3600)
+                continue
+            wait = 0.0 if exp is None else (exp - self.refresh_margin) - time.time()
+            if wait <= 0 and time.time() - self._refreshed_at < self.retry_interval:
+                # token lifetime shorter than the margin: do not spin on logins
+                wait = self.retry_interval
+            if wait > 0:
+                stop_ev.wait(wait)
+                continue
+            try:
+                self.refresh(stale_token=token)
+            except Exception as e:
+                logger.warning("Easyberry: background token refresh failed: %s", e)
+                stop_ev.wait(self.retry_interval)
+
+
+_managers: Dict[Tuple[str, Optional[str]], TokenManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(config_path: str, target: Optional[str] = None) -> TokenManager:
+    """Return the shared TokenManager for a config file and upload target."""
+    key = (config_path, target)
+    with _managers_lock:
+        tm = _managers.get(key)
+        if tm is None:
+            tm = TokenManager(config_path, target=target)
+            _managers[key] = tm
+        return tm
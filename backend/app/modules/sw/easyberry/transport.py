@@ -1,12 +1,20 @@
 
 import logging
-from typing import Dict, Any, Tuple
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
 import json
 
 import httpx
 
-from .config import read_config
+from .config import read_config_cached, target_config
 from .packet_store import eb_packet_store
+from .codec import encode_payload
+from .resilience import CircuitOpenError, RetryPolicy, get_breaker, parse_retry_after
+from app.core.metrics import registry
+
+UPLOAD_SECONDS = registry.histogram("easyberry_upload_seconds", "Easyberry upload request latency", ("target",))
+UPLOADS = registry.counter("easyberry_uploads_total", "Easyberry upload requests by outcome", ("target", "status"))
 
 logger = logging.getLogger(__name__)
 
@@ -22,60 +30,117 @@ def build_endpoint_from_config(cfg: Dict[str, Any]) -> str:
     return base
 
 
-def send_put(config_path: str, payload: Dict[str, Any]) -> Tuple[int, str]:
-    cfg = read_config(config_path)
+def send_timeout(cfg: Dict[str, Any]) -> float:
+    """Per-request timeout (seconds) from `settings.timeout` of a (target) config."""
+    return float(cfg.get("settings", {}).get("timeout", 10.0))
+
+
+def send_put(config_path: str, payload: Dict[str, Any], client: Optional[httpx.Client] = None,
+             token: Optional[str] = None, target: Optional[str] = None,
+             stop_event: Optional[threading.Event] = None) -> Tuple[int, str]:
+    """POST `payload` to the configured endpoint. Returns (status_code, body).
+
+    Pass a shared `client` to reuse its keep-alive connection across sends,
+    `token` to use an in-memory token instead of `settings.token` and `target`
+    to send to one of the configured `targets` instead of the top-level settings.
+    Setting `stop_event` cuts a retry backoff short and returns the last outcome.
+    """
+    cfg = target_config(read_config_cached(config_path), target)
     settings = cfg.get("settings", {})
-    token = settings.get("token")
+    if token is None:
+        token = settings.get("token")
     endpoint = build_endpoint_from_config(cfg)
-    headers = {"Content-Type": "application/json"}
+    # wire format (json / json-compact / msgpack / cbor, optional gzip) comes from settings
+    content, headers = encode_payload(payload, settings)
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
-    logger.info("Easyberry: sending PUT to %s", endpoint)
+    retry = RetryPolicy.from_config(cfg)
+    breaker = get_breaker(config_path, target, cfg)
+    timeout = send_timeout(cfg)
+    label = target or "default"
+    attempt = 0
+    while True:
+        attempt += 1
+        if not breaker.allow():
+            # the cloud is known to be down: fail fast instead of paying the full timeout
+            UPLOADS.labels(label, "circuit_open").inc()
+            raise CircuitOpenError(f"circuit open for {endpoint}")
+        t0 = time.perf_counter()
+        try:
+            r = _post_once(endpoint, content, headers, payload, client, timeout)
+        except Exception as e:
+            UPLOAD_SECONDS.labels(label).observe(time.perf_counter() - t0)
+            UPLOADS.labels(label, "error").inc()
+            breaker.record_failure()
+            if attempt >= retry.max_attempts:
+                raise
+            delay = retry.delay(attempt)
+            logger.warning("Easyberry: send attempt %d failed (%s), retrying in %.2fs", attempt, e, delay)
+            if _backoff(delay, stop_event):
+                raise
+            continue
+        UPLOAD_SECONDS.labels(label).observe(time.perf_counter() - t0)
+        UPLOADS.labels(label, str(r.status_code)).inc()
+        if retry.is_retryable(r.status_code):
+            breaker.record_failure()
+            if attempt < retry.max_attempts:
+                delay = retry.delay(attempt, parse_retry_after(r.headers.get("retry-after")))
+                logger.warning("Easyberry: send attempt %d got status=%s, retrying in %.2fs", attempt, r.status_code, delay)
+                if not _backoff(delay, stop_event):
+                    continue
+        else:
+            breaker.record_success()
+        return r.status_code, r.text
+
+
+def _backoff(delay: float, stop_event: Optional[threading.Event]) -> bool:
+    """Wait `delay` seconds before a retry; True when `stop_event` was set meanwhile."""
+    if stop_event is None:
+        time.sleep(delay)
+        return False
+    return stop_event.wait(delay)
+
+
+def _request_text(content: bytes, headers: Dict[str, str], payload: Dict[str, Any]) -> str:
+    # plain JSON bodies are recorded as sent; binary/compressed ones are re-rendered for display
+    if headers.get("Content-Type") == "application/json" and "Content-Encoding" not in headers:
+        try:
+            return content.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
     try:
-        with httpx.Client(timeout=10.0) as client:
-            r = client.post(endpoint, json=payload, headers=headers)
+        return json.dumps(payload, ensure_ascii=False)
+    except Exception:
+        return str(payload)
+
+
+def _post_once(endpoint: str, content: bytes, headers: Dict[str, str], payload: Dict[str, Any],
+               client: Optional[httpx.Client], timeout: float) -> httpx.Response:
+    logger.info("Easyberry: sending PUT to %s (%d bytes)", endpoint, len(content))
+    try:
+        if client is not None:
+            r = client.post(endpoint, content=content, headers=headers)
+        else:
+            with httpx.Client(timeout=timeout) as own_client:
+                r = own_client.post(endpoint, content=content, headers=headers)
     except Exception as e:
-        logger.exception("transport error: %s", e)
+        logger.warning("transport error: %s", e)
         # record exception in easyberry packet store
         try:
-            eb_packet_store.add(endpoint, json.dumps(payload, ensure_ascii=False), None, status=None, note=str(e))
+            eb_packet_store.add(endpoint, _request_text(content, headers, payload), None, status=None, note=str(e))
         except Exception:
             logger.debug("transport: failed to record exception payload in packet store")
         raise
 
     # record successful exchange
-    try:
-        import json as _json
-        req_body = _json.dumps(payload, ensure_ascii=False)
-    except Exception:
-        req_body = str(payload)
-    try:
-        # capture content-type header when present
-        ctype = None
+    if eb_packet_store.enabled:
         try:
-            ctype = r.headers.get('content-type')
-        except Exception:
-            ctype = None
-        # store request and response bodies and headers
-        try:
-            resp_headers = None
-            try:
-                resp_headers = dict(r.headers)
-            except Exception:
-                resp_headers = None
-            eb_packet_store.add(endpoint, req_body, r.text, status=r.status_code, note=None)
-            try:
-                with eb_packet_store._lock:
-                    if len(eb_packet_store._deque) > 0:
-                        eb_packet_store._deque[-1]['content_type'] = ctype
-                        eb_packet_store._deque[-1]['request_headers'] = headers
-                        eb_packet_store._deque[-1]['response_headers'] = resp_headers
-            except Exception:
-                logger.debug("transport: failed to attach headers/content_type to last packet")
+            resp_headers = dict(r.headers) if eb_packet_store.capture_headers else None
+            eb_packet_store.add(endpoint, _request_text(content, headers, payload), r.text, status=r.status_code,
+                                note=None, request_headers=headers, response_headers=resp_headers,
+                                content_type=r.headers.get('content-type'))
         except Exception as e:
             logger.exception("transport: failed to record successful exchange: %s", e)
-    except Exception:
-        pass
 
-    return r.status_code, r.text
+    return r
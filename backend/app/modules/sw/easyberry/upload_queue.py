@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.metrics import registry
+
+QUEUE_DEPTH = registry.gauge("easyberry_upload_queue_depth", "Change batches waiting for upload", ("target",))
+QUEUE_THINGS = registry.gauge("easyberry_upload_queue_pending_things", "Thing values waiting for upload", ("target",))
+QUEUE_OLDEST = registry.gauge("easyberry_upload_queue_oldest_timestamp_seconds",
+                              "Enqueue time of the oldest pending batch (0 when empty)", ("target",))
+QUEUE_DROPPED = registry.counter("easyberry_upload_queue_dropped_total", "Change batches dropped from a full upload queue", ("target",))
+QUEUE_MERGED = registry.counter("easyberry_upload_queue_merged_total", "Change batches merged into a pending one because the queue was full", ("target",))
+
+logger = logging.getLogger(__name__)
+
+# what to do with a new change batch when `max_batches` are already pending
+POLICIES = ("merge", "drop_oldest", "drop_newest")
+
+
+class UploadQueue:
+    """Bounded queue of change batches between database commits and the Easyberry sender.
+
+    `offer` is a `Database` listener: each commit becomes one batch of
+    {thing name: (value, ts)}. When the queue is full the `policy` decides:
+      - merge: fold the batch into the newest pending one (latest value wins per thing)
+      - drop_oldest: discard the oldest pending batch
+      - drop_newest: discard the incoming batch
+    The sender calls `get_batch`, which waits until `batch_size` things are
+    pending or `batch_interval` seconds passed since the first pending change,
+    and returns everything collected merged into a single batch.
+
+    Depth, pending things, oldest entry and drops are exported as metrics
+    labelled with the upload target `name`.
+    """
+
+    def __init__(self, max_batches: int = 1000, batch_size: int = 500, batch_interval: float = 1.0,
+                 policy: str = "merge", name: str = "default"):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown queue policy: {policy}")
+        self.max_batches = max(1, int(max_batches))
+        self.batch_size = max(1, int(batch_size))
+        self.batch_interval = max(0.0, float(batch_interval))
+        self.policy = policy
+        self.name = name
+        self._cond = threading.Condition()
+        # (enqueued_at, {name: (value, ts)})
+        self._batches: Deque[Tuple[float, Dict[str, Tuple[Any, float]]]] = deque()
+        self._pending_things = 0
+        self._enqueued = 0
+        self._merged = 0
+        self._dropped = 0
+        self._delivered = 0
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any], name: str = "default") -> Optional["UploadQueue"]:
+        qcfg = cfg.get("queue")
+        if not isinstance(qcfg, dict) or not qcfg.get("enabled"):
+            return None
+        return cls(
+            max_batches=int(qcfg.get("max_batches", 1000)),
+            batch_size=int(qcfg.get("batch_size", 500)),
+            batch_interval=float(qcfg.get("batch_interval", 1.0)),
+            policy=str(qcfg.get("policy", "merge")),
+            name=name,
+        )
+
+    def offer(self, poller_id: Optional[str], changes: List[Dict[str, Any]]) -> None:
+        batch: Dict[str, Tuple[Any, float]] = {}
+        for c in changes:
+            name = c.get("name")
+            if name is None:
+                continue
+            batch[name] = (c.get("value"), c.get("ts") or time.time())
+        if not batch:
+            return
+        with self._cond:
+            self._enqueued += 1
+            if len(self._batches) >= self.max_batches:
+                if self.policy == "drop_newest":
+                    self._dropped += 1
+                    QUEUE_DROPPED.labels(self.name).inc()
+                    return
+                if self.policy == "drop_oldest":
+                    _, old = self._batches.popleft()
+                    self._pending_things -= len(old)
+                    self._dropped += 1
+                    QUEUE_DROPPED.labels(self.name).inc()
+                else:
+                    _, newest = self._batches[-1]
+                    before = len(newest)
+                    newest.update(batch)
+                    self._pending_things += len(newest) - before
+                    self._merged += 1
+                    QUEUE_MERGED.labels(self.name).inc()
+                    self._publish()
+                    self._cond.notify_all()
+                    return
+            self._batches.append((time.time(), batch))
+            self._pending_things += len(batch)
+            self._publish()
+            self._cond.notify_all()
+
+    def get_batch(self, stop_event: Optional[threading.Event] = None, timeout: Optional[float] = None,
+                  poll: float = 0.25) -> Dict[str, Tuple[Any, float]]:
+        """Wait for a size- or time-triggered batch. Returns {} on timeout or stop."""
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return {}
+                now = time.monotonic()
+                if self._batches:
+                    age = time.time() - self._batches[0][0]
+                    if self._pending_things >= self.batch_size or age >= self.batch_interval:
+                        return self._take()
+                    wait = self.batch_interval - age
+                else:
+                    wait = poll
+                if end is not None:
+                    if now >= end:
+                        return {}
+                    wait = min(wait, end - now)
+                self._cond.wait(max(0.0, min(wait, poll)))
+
+    def _take(self) -> Dict[str, Tuple[Any, float]]:
+        # caller holds self._cond; merge pending batches oldest-first so later values win
+        out: Dict[str, Tuple[Any, float]] = {}
+        while self._batches and len(out) < self.batch_size:
+            _, batch = self._batches.popleft()
+            self._pending_things -= len(batch)
+            out.update(batch)
+        self._delivered += len(out)
+        self._publish()
+        return out
+
+    def _publish(self) -> None:
+        # caller holds self._cond
+        QUEUE_DEPTH.labels(self.name).set(len(self._batches))
+        QUEUE_THINGS.labels(self.name).set(self._pending_things)
+        QUEUE_OLDEST.labels(self.name).set(self._batches[0][0] if self._batches else 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            oldest = self._batches[0][0] if self._batches else None
+            return {
+                "depth": len(self._batches),
+                "pending_things": self._pending_things,
+                "oldest_age": (time.time() - oldest) if oldest is not None else None,
+                "enqueued": self._enqueued,
+                "merged": self._merged,
+                "dropped": self._dropped,
+                "delivered": self._delivered,
+                "policy": self.policy,
+            }
+
+
+def payload_from_batch(batch: Dict[str, Tuple[Any, float]]) -> Dict[str, Any]:
+    """Build an upload payload containing only the things in `batch`."""
+    things = {name: {"value": str(val) if val is not None else ""} for name, (val, _) in batch.items()}
+    return {"op": "put", "things": things}
+
+
+# queues used by the running upload loops (target name -> queue), exposed for status/metrics
+active_queues: Dict[str, UploadQueue] = {}
@@ -1,7 +1,7 @@
 """Modbus subpackage exposing common symbols for convenience."""
 from .modbus_tcp_client import MockModbusClient, TcpModbusClient, get_modbus_client
 from .interfaces import IModbusTcpClient
-from .polling import ModbusManager, Poller, default_store, polling_example
+from .polling import ModbusManager, Poller, default_store, polling_example, stop_pollers
 
 __all__ = [
     "MockModbusClient",
@@ -12,4 +12,5 @@ __all__ = [
     "Poller",
     "default_store",
     "polling_example",
+    "stop_pollers",
 ]
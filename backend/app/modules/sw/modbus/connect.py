@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CONNECT_ATTEMPTS = registry.counter("modbus_connect_attempts_total", "Background Modbus connect attempts", ("device", "result"))
+DEVICES_DOWN = registry.gauge("modbus_devices_down", "Devices whose last background connect failed")
+
+
+def _device(client: Any) -> str:
+    return f"{getattr(client, 'host', '?')}:{getattr(client, 'port', '?')}"
+
+
+class _Target:
+    __slots__ = ("client", "state", "attempts", "next_at", "last_error", "done")
+
+    def __init__(self, client: Any):
+        self.client = client
+        # pending -> connecting -> up | down; down targets are retried at next_at
+        self.state = "pending"
+        self.attempts = 0
+        self.next_at = 0.0
+        self.last_error: Optional[str] = None
+        # set once the first attempt finished, whatever its outcome
+        self.done = threading.Event()
+
+
+class Connector:
+    """Connect Modbus clients in the background, at most `max_parallel` at a time.
+
+    `request` queues a client and returns at once, so neither the manager lock
+    nor the pollers of other devices wait for a slow or dead host. Failed
+    connects are retried with exponential backoff (`retry_min` doubling up to
+    `retry_max` seconds) until the client connects or is forgotten. Worker
+    threads start on the first request.
+    """
+
+    def __init__(self, max_parallel: int = 8, retry_min: float = 1.0, retry_max: float = 30.0):
+        self.max_parallel = max(1, int(max_parallel))
+        self.retry_min = float(retry_min)
+        self.retry_max = float(retry_max)
+        self._cond = threading.Condition()
+        # id(client) -> target
+        self._targets: Dict[int, _Target] = {}
+        self._threads: List[threading.Thread] = []
+
+    def request(self, client: Any) -> None:
+        """Make sure a connect of `client` is queued or running (no-op while it is)."""
+        with self._cond:
+            t = self._targets.get(id(client))
+            if t is None or t.client is not client:
+                t = self._targets[id(client)] = _Target(client)
+            elif t.state in ("pending", "connecting", "down"):
+                # already on its way; down targets keep their backoff
+                return
+            else:
+                t.state = "pending"
+                t.next_at = 0.0
+            if not self._threads:
+                self._start()
+            self._cond.notify()
+
+    def ready(self, client: Any) -> bool:
+        """True when `client` can be used now; otherwise queue a (re)connect and return False."""
+        is_connected = getattr(client, "is_connected", None)
+        if is_connected is None or is_connected():
+            return True
+        self.request(client)
+        return False
+
+    def wait(self, client: Any, timeout: Optional[float] = None, cancel: Optional[threading.Event] = None) -> bool:
+        """Wait until the first connect attempt of `client` finished; True if it is connected.
+
+        Setting `cancel` ends the wait early.
+        """
+        with self._cond:
+            t = self._targets.get(id(client))
+        if t is not None and t.client is client:
+            if cancel is None:
+                t.done.wait(timeout)
+            else:
+                end = None if timeout is None else time.monotonic() + timeout
+                while not t.done.is_set() and not cancel.is_set():
+                    left = 0.05 if end is None else min(0.05, end - time.monotonic())
+                    if left <= 0:
+                        break
+                    t.done.wait(left)
+        is_connected = getattr(client, "is_connected", None)
+        return is_connected is None or bool(is_connected())
+
+    def forget(self, client: Any) -> None:
+        """Stop retrying `client` (it is being closed)."""
+        with self._cond:
+            t = self._targets.get(id(client))
+            if t is not None and t.client is client:
+                del self._targets[id(client)]
+                t.done.set()
+            self._update_down()
+
+    def _start(self) -> None:
+        # caller holds self._cond
+        for i in range(self.max_parallel):
+            th = threading.Thread(target=self._work, name=f"modbus-connect-{i}", daemon=True)
+            th.start()
+            self._threads.append(th)
+
+    def _next_due(self) -> Optional[_Target]:
+        # caller holds self._cond; returns a due target or waits for one
+        now = time.monotonic()
+        wake = None
+        for t in self._targets.values():
+            if t.state not in ("pending", "down"):
+                continue
+            if t.next_at <= now:
+                return t
+            wake = t.next_at if wake is None else min(wake, t.next_at)
+        self._cond.wait(None if wake is None else wake - now)
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                t = self._next_due()
+                if t is None:
+                    continue
+                t.state = "connecting"
+            device = _device(t.client)
+            try:
+                t.client.ensure_connected()
+                error = None
+            except Exception as e:
+                error = str(e)
+            with self._cond:
+                if self._targets.get(id(t.client)) is not t:
+                    # forgotten while connecting
+                    continue
+                if error is None:
+                    if t.attempts:
+                        logger.info("Connected to %s after %d failed attempts", device, t.attempts)
+                    t.state = "up"
+                    t.attempts = 0
+                    t.last_error = None
+                    CONNECT_ATTEMPTS.labels(device, "ok").inc()
+                else:
+                    t.attempts += 1
+                    delay = min(self.retry_max, self.retry_min * 2 ** (t.attempts - 1))
+                    t.state = "down"
+                    t.next_at = time.monotonic() + delay
+                    t.last_error = error
+                    CONNECT_ATTEMPTS.labels(device, "error").inc()
+                    log = logger.warning if t.attempts == 1 else logger.debug
+                    log("Connect to %s failed (%s); retrying in %.1fs", device, error, delay)
+                self._update_down()
+                t.done.set()
+
+    def _update_down(self) -> None:
+        # caller holds self._cond
+        DEVICES_DOWN.set(sum(1 for t in self._targets.values() if t.state == "down"))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._cond:
+            return {
+                _device(t.client): {
+                    "state": t.state,
+                    "attempts": t.attempts,
+                    "last_error": t.last_error,
+                    "retry_in": round(max(0.0, t.next_at - now), 1) if t.state == "down" else None,
+                }
+                for t in self._targets.values()
+            }
+
+
+connector = Connector()
@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# what submit() does when a consumer already has `max_queue` items pending
+#   drop_oldest: discard the oldest pending item (consumers that only need the latest state)
+#   drop_newest: discard the incoming item
+#   block:       wait up to `block_timeout` for room, then drop the incoming item
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+DISPATCH_LAG = registry.histogram("dispatch_lag_seconds", "Time from submit to the start of a consumer call", ("consumer",))
+DISPATCH_DROPPED = registry.counter("dispatch_dropped_total", "Items dropped by a full consumer queue", ("consumer",))
+DISPATCH_ERRORS = registry.counter("dispatch_errors_total", "Consumer calls that raised", ("consumer",))
+
+
+class _Consumer:
+    __slots__ = ("name", "fn", "max_queue", "policy", "block_timeout", "queue", "scheduled",
+                 "submitted", "delivered", "dropped", "errors", "last_lag", "max_lag", "m_lag", "m_dropped")
+
+    def __init__(self, name: str, fn: Callable[..., Any], max_queue: int, policy: str, block_timeout: float):
+        self.name = name
+        self.fn = fn
+        self.max_queue = max(1, int(max_queue))
+        self.policy = policy
+        self.block_timeout = float(block_timeout)
+        # (submitted_at, args)
+        self.queue: Deque[Tuple[float, tuple]] = deque()
+        # True while the consumer is on the ready list or running on a worker
+        self.scheduled = False
+        self.submitted = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.m_lag = DISPATCH_LAG.labels(name)
+        self.m_dropped = DISPATCH_DROPPED.labels(name)
+
+
+class CallbackDispatcher:
+    """Run poll callbacks and other post-poll consumers off the acquisition threads.
+
+    Every consumer has its own bounded queue and its items run in order, one
+    at a time; a small pool of `workers` threads serves all consumers round
+    robin, so a slow consumer only delays itself. Workers start on the first
+    submit.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = max(1, int(workers))
+        self._cond = threading.Condition()
+        self._consumers: Dict[str, _Consumer] = {}
+        self._ready: Deque[_Consumer] = deque()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def register(self, name: str, fn: Callable[..., Any], max_queue: int = 64, policy: str = "drop_oldest",
+                 block_timeout: float = 0.1) -> None:
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy: {policy}")
+        with self._cond:
+            self._consumers[name] = _Consumer(name, fn, max_queue, policy, block_timeout)
+
+    def unregister(self, name: str, fn: Optional[Callable[..., Any]] = None) -> None:
+        """Remove consumer `name`; with `fn`, only while it is still registered with that function.
+
+        A replacement registered under the same name is left alone then.
+        """
+        with self._cond:
+            c = self._consumers.get(name)
+            if c is None or (fn is not None and c.fn != fn):
+                return
+            del self._consumers[name]
+            c.queue.clear()
+
+    def submit(self, name: str, *args: Any) -> bool:
+        """Queue a call of consumer `name` with `args`; False when the item was dropped."""
+        with self._cond:
+            c = self._consumers.get(name)
+            if c is None:
+                return False
+            if not self._threads:
+                self._start()
+            c.submitted += 1
+            if len(c.queue) >= c.max_queue:
+                if c.policy == "block":
+                    end = time.monotonic() + c.block_timeout
+                    while len(c.queue) >= c.max_queue and not self._stopping:
+                        left = end - time.monotonic()
+                        if left <= 0:
+                            break
+                        self._cond.wait(left)
+                if len(c.queue) >= c.max_queue:
+                    c.dropped += 1
+                    c.m_dropped.inc()
+                    if c.policy != "drop_oldest":
+                        return False
+                    c.queue.popleft()
+            c.queue.append((time.monotonic(), args))
+            if not c.scheduled:
+                c.scheduled = True
+                self._ready.append(c)
+                self._cond.notify_all()
+            return True
+
+    def _start(self) -> None:
+        # caller holds self._cond
+        self._stopping = False
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"poll-dispatch-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._ready and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                c = self._ready.popleft()
+                if not c.queue:
+                    c.scheduled = False
+                    continue
+                submitted_at, args = c.queue.popleft()
+                # room was freed for blocked submitters
+                self._cond.notify_all()
+            lag = time.monotonic() - submitted_at
+            c.m_lag.observe(lag)
+            try:
+                c.fn(*args)
+            except Exception:
+                c.errors += 1
+                DISPATCH_ERRORS.labels(c.name).inc()
+                logger.exception("Dispatcher: consumer %s failed", c.name)
+            with self._cond:
+                c.delivered += 1
+                c.last_lag = lag
+                c.max_lag = max(c.max_lag, lag)
+                # one item per turn keeps consumers fair; requeue at the back if more is pending
+                if c.queue and self._consumers.get(c.name) is c:
+                    self._ready.append(c)
+                    self._cond.notify()
+                else:
+                    c.scheduled = False
+
+    def stop(self, timeout: float = 1.0) -> None:
+        with self._cond:
+            self._stopping = True
+            threads, self._threads = self._threads, []
+            self._ready.clear()
+            for c in self._consumers.values():
+                c.scheduled = False
+            self._cond.notify_all()
+        for t in threads:
+            if t is not threading.current_thread():
+                t.join(timeout)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            return {
+                name: {
+                    "pending": len(c.queue),
+                    "submitted": c.submitted,
+                    "delivered": c.delivered,
+                    "dropped": c.dropped,
+                    "errors": c.errors,
+                    "last_lag": round(c.last_lag, 4),
+                    "max_lag": round(c.max_lag, 4),
+                    "policy": c.policy,
+                }
+                for name, c in self._consumers.items()
+            }
+
+
+dispatcher = CallbackDispatcher()
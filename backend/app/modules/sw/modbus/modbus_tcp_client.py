@@ -1,9 +1,65 @@
 from .interfaces import IModbusTcpClient
 
+import logging
 import socket
 import struct
 import threading
-from typing import List, Sequence, Optional
+import time
+from typing import Any, List, Sequence, Optional
+
+from app.core.metrics import registry
+
+from .scheduling import PriorityLock, current_priority
+
+logger = logging.getLogger(__name__)
+
+# a reply whose transaction id is at most this far behind the current one is a late
+# answer to an earlier (timed out) request and is discarded; anything else means desync
+MAX_LATE_AGE = 16
+# late frames drained per transaction before giving up on the stream
+MAX_DRAIN = 8
+
+LOCK_WAIT = registry.histogram("modbus_lock_wait_seconds", "Time a transaction waited for the device connection", ("device", "priority"))
+REQUEST_SECONDS = registry.histogram("modbus_request_seconds", "Modbus TCP request round-trip time", ("device",))
+REQUEST_ERRORS = registry.counter("modbus_request_errors_total", "Failed Modbus TCP request attempts", ("device",))
+RECONNECTS = registry.counter("modbus_reconnects_total", "Modbus TCP reconnect attempts after a failure", ("device",))
+LATE_FRAMES = registry.counter("modbus_late_frames_total", "Late replies to earlier transactions that were drained", ("device",))
+DESYNCS = registry.counter("modbus_desync_total", "Replies that did not belong to any recent transaction", ("device",))
+TIMEOUT_SECONDS = registry.gauge("modbus_timeout_seconds", "Current adaptive Modbus transaction timeout", ("device",))
+
+
+class RttEstimator:
+    """Smoothed round-trip time and derived timeout, as TCP computes its RTO (RFC 6298).
+
+    srtt/rttvar follow each measured RTT with gains 1/8 and 1/4 and the
+    timeout is srtt + 4 * rttvar clamped to [floor, ceiling]. Until the first
+    sample the timeout is `initial`. A timeout doubles the current value
+    (backoff) until the next successful sample resets it.
+    """
+
+    def __init__(self, initial: float, floor: float, ceiling: float):
+        self.floor = float(floor)
+        self.ceiling = max(self.floor, float(ceiling))
+        self.initial = min(self.ceiling, max(self.floor, float(initial)))
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self._backoff = 1.0
+
+    def observe(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2.0
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self._backoff = 1.0
+
+    def on_timeout(self) -> None:
+        self._backoff = min(self._backoff * 2.0, 64.0)
+
+    def timeout(self) -> float:
+        base = self.initial if self.srtt is None else self.srtt + 4.0 * self.rttvar
+        return min(self.ceiling, max(self.floor, base) * self._backoff)
 
 
 class ModbusException(Exception):
@@ -13,6 +69,10 @@ class ModbusException(Exception):
         super().__init__(message or f"Modbus exception {hex(function_code)}:{exception_code}")
 
 
+class ModbusDesyncError(ConnectionError):
+    """The byte stream no longer lines up with MBAP frames; only a reconnect recovers it."""
+
+
 class MockModbusClient(IModbusTcpClient):
     def read_holding_registers(self, address: int, count: int, unit_id: Optional[int] = None):
         # return simulated register values (zeros)
@@ -24,19 +84,44 @@ class MockModbusClient(IModbusTcpClient):
 
 
 class TcpModbusClient(IModbusTcpClient):
-    def __init__(self, host: str = "localhost", port: int = 502, timeout: float = 3.0, unit_id: int = 1, retries: int = 1):
+    """Modbus TCP client with one socket shared by all callers.
+
+    `timeout` bounds connect and is the ceiling of the adaptive per-transaction
+    timeout, which follows the measured RTT but never drops below
+    `min_timeout`; `max_timeout` raises the ceiling for slow links.
+
+    Callers waiting for the socket are served by priority class (see
+    `scheduling.transaction_priority`), with waiters aging up one class per
+    `priority_aging` seconds.
+
+    A broken connection is closed and, when `connector` is set, reconnected
+    in the background; until then requests fail fast with ConnectionError.
+    A standalone client (no `connector`) reconnects lazily on its next
+    transaction instead, outside the transaction lock.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 502, timeout: float = 3.0, unit_id: int = 1, retries: int = 1,
+                 min_timeout: float = 0.2, max_timeout: Optional[float] = None, priority_aging: float = 1.0):
         self.host = host
         self.port = port
         self.timeout = timeout
         self.unit_id = unit_id
         self.retries = retries
         self._sock: Optional[socket.socket] = None
-        # use RLock so _next_transaction_id can be called while holding the lock
-        self._lock = threading.RLock()
+        # re-entrant so _next_transaction_id can be called while holding the lock
+        self._lock = PriorityLock(aging=priority_aging)
         self._transaction_id = 0
         # last raw request/response bytes (may be None)
         self._last_request: Optional[bytes] = None
         self._last_response: Optional[bytes] = None
+        self.rtt = RttEstimator(initial=timeout, floor=min_timeout,
+                                ceiling=max_timeout if max_timeout is not None else timeout)
+        # set by abort(): transactions fail at once instead of reconnecting, until connect()
+        self._aborted = False
+        # reconnects after a failure (set by ModbusManager); without one, call connect() again
+        self.connector: Optional[Any] = None
+        # per calling thread: seconds it held the connection, reset by take_busy()
+        self._held = threading.local()
 
     def connect(self, host: Optional[str] = None, port: Optional[int] = None, timeout: Optional[float] = None) -> None:
         if host:
@@ -46,7 +131,12 @@ class TcpModbusClient(IModbusTcpClient):
         if timeout:
             self.timeout = timeout
 
+        self._aborted = False
         self.close()
+        self._install(self._open_socket())
+
+    def _open_socket(self) -> socket.socket:
+        # runs without the transaction lock: a slow or dead host must not hold up callers
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         s.settimeout(self.timeout)
         try:
@@ -54,7 +144,19 @@ class TcpModbusClient(IModbusTcpClient):
         except Exception as e:
             s.close()
             raise ConnectionError(f"Failed to connect to {self.host}:{self.port}: {e}")
-        self._sock = s
+        return s
+
+    def _install(self, s: socket.socket) -> None:
+        with self._lock:
+            if self._aborted or self._sock is not None:
+                # aborted while connecting, or someone else connected first
+                s.close()
+            else:
+                self._sock = s
+        if self._aborted:
+            # abort() raced the install above; it may have read _sock before we set it
+            self.close()
+            raise ConnectionError("Modbus client was aborted")
 
     def close(self) -> None:
         if self._sock:
@@ -64,9 +166,45 @@ class TcpModbusClient(IModbusTcpClient):
                 pass
         self._sock = None
 
+    def take_busy(self) -> float:
+        """Return and reset the time the calling thread held the connection.
+
+        Waiting for the connection behind other callers is not included.
+        """
+        held = getattr(self._held, "seconds", 0.0)
+        self._held.seconds = 0.0
+        return held
+
+    def abort(self) -> None:
+        """Close the connection from any thread, interrupting a transaction blocked in recv.
+
+        Later transactions fail immediately (no reconnect) until connect() is
+        called again.
+        """
+        self._aborted = True
+        s = self._sock
+        if s is not None:
+            try:
+                # wakes up a recv/send in progress on another thread; close() alone does not
+                s.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.close()
+
     def is_connected(self) -> bool:
         return self._sock is not None
 
+    def ensure_connected(self) -> None:
+        """Connect unless already connected or aborted; safe against concurrent transactions.
+
+        The connect itself runs outside the transaction lock, so transactions
+        fail fast with ConnectionError meanwhile instead of queueing behind it.
+        """
+        if self._aborted:
+            raise ConnectionError("Modbus client was aborted")
+        if self._sock is None:
+            self._install(self._open_socket())
+
     def _next_transaction_id(self) -> int:
         with self._lock:
             self._transaction_id = (self._transaction_id + 1) & 0xFFFF
@@ -82,59 +220,136 @@ class TcpModbusClient(IModbusTcpClient):
         if unit_id is None:
             unit_id = self.unit_id
 
-        if not self._sock:
-            self.connect()
+        if self._aborted:
+            raise ConnectionError("Modbus client was aborted")
 
+        device = f"{self.host}:{self.port}"
         # ensure only one thread uses the socket at a time for send/recv
         last_exc = None
         for attempt in range(max(1, self.retries)):
+            sock = None
             try:
+                if self.connector is None and self._sock is None:
+                    # standalone client: nobody reconnects in the background
+                    self.ensure_connected()
+                priority = current_priority()
+                t_wait = time.perf_counter()
                 with self._lock:
-                    tid = self._next_transaction_id()
-                    mbap = self._build_mbap_header(tid, len(pdu) + 1, unit_id)
-                    packet = mbap + pdu
-                    # store raw request
+                    t_held = time.perf_counter()
+                    LOCK_WAIT.labels(device, priority).observe(t_held - t_wait)
                     try:
-                        self._last_request = packet
-                    except Exception:
-                        self._last_request = None
-
-                    self._sock.sendall(packet)
-                    # read MBAP header first (7 bytes)
-                    hdr = self._recv_all(7)
-                    if not hdr or len(hdr) < 7:
-                        raise ConnectionError("Incomplete MBAP header")
-                    recv_tid, proto_id, length = struct.unpack(
-                        ">HHH", hdr[:6]
-                    )
-                    unit = hdr[6]
-                    # length includes unit id + pdu
-                    remaining = length - 1
-                    body = self._recv_all(remaining) if remaining > 0 else b""
-                    resp = hdr + body
-                    # verify transaction id
-                    if recv_tid != tid:
-                        raise ConnectionError("Transaction id mismatch")
-                    # store raw response
-                    try:
-                        self._last_response = resp
-                    except Exception:
-                        self._last_response = None
-                    return resp
+                        if self._aborted:
+                            raise ConnectionError("Modbus client was aborted")
+                        sock = self._sock
+                        if sock is None:
+                            # never connect on the caller's thread; see `connector`
+                            if self.connector is not None:
+                                self.connector.request(self)
+                            raise ConnectionError(f"Modbus {device} not connected")
+                        t0 = time.perf_counter()
+                        # one deadline for the whole transaction, however the reply is chunked
+                        deadline = time.monotonic() + self.rtt.timeout()
+                        tid = self._next_transaction_id()
+                        mbap = self._build_mbap_header(tid, len(pdu) + 1, unit_id)
+                        packet = mbap + pdu
+                        # store raw request
+                        try:
+                            self._last_request = packet
+                        except Exception:
+                            self._last_request = None
+
+                        self._sock.settimeout(max(0.001, deadline - time.monotonic()))
+                        try:
+                            self._sock.sendall(packet)
+                        except socket.timeout as e:
+                            # part of the request may already be on the wire: the stream is not aligned
+                            DESYNCS.labels(device).inc()
+                            raise ModbusDesyncError("Modbus request send timed out") from e
+                        resp = self._read_reply(tid, deadline, device)
+                        # store raw response
+                        try:
+                            self._last_response = resp
+                        except Exception:
+                            self._last_response = None
+                        rtt = time.perf_counter() - t0
+                        self.rtt.observe(rtt)
+                        REQUEST_SECONDS.labels(device).observe(rtt)
+                        TIMEOUT_SECONDS.labels(device).set(self.rtt.timeout())
+                        return resp
+                    finally:
+                        # device busy time as seen by the saturation guard (see take_busy)
+                        self._held.seconds = getattr(self._held, "seconds", 0.0) + time.perf_counter() - t_held
             except Exception as e:
                 last_exc = e
-                # attempt reconnect once
-                try:
-                    self.close()
-                    self.connect()
-                except Exception:
-                    pass
+                if self._aborted:
+                    raise ConnectionError("Modbus client was aborted") from e
+                REQUEST_ERRORS.labels(device).inc()
+                if isinstance(e, socket.timeout):
+                    # only raised while waiting for the first header byte (send and mid-frame
+                    # timeouts are desyncs): the stream is still aligned, so keep the
+                    # connection and let the next transaction drain the late reply
+                    self.rtt.on_timeout()
+                    TIMEOUT_SECONDS.labels(device).set(self.rtt.timeout())
+                    continue
+                if sock is not None:
+                    RECONNECTS.labels(device).inc()
+                    # drop the broken connection (unless someone already replaced it) and
+                    # let the connector reconnect in the background
+                    with self._lock:
+                        if self._sock is sock:
+                            self.close()
+                    if self.connector is not None:
+                        self.connector.request(self)
+                raise
         raise last_exc or ConnectionError("Failed to send modbus request")
 
-    def _recv_all(self, count: int) -> bytes:
+    def _read_reply(self, tid: int, deadline: float, device: str) -> bytes:
+        """Read frames until the reply to `tid`, discarding late replies to earlier requests."""
+        drained = 0
+        while True:
+            # read MBAP header first (7 bytes)
+            hdr = self._recv_all(7, deadline)
+            if not hdr or len(hdr) < 7:
+                raise ConnectionError("Incomplete MBAP header")
+            recv_tid, proto_id, length = struct.unpack(
+                ">HHH", hdr[:6]
+            )
+            # length includes unit id + pdu
+            if proto_id != 0 or not 2 <= length <= 254:
+                DESYNCS.labels(device).inc()
+                raise ModbusDesyncError(f"Invalid MBAP header proto={proto_id} length={length}")
+            remaining = length - 1
+            body = self._recv_all(remaining, deadline, mid_frame=True)
+            if len(body) < remaining:
+                raise ConnectionError("Incomplete Modbus frame")
+            if recv_tid == tid:
+                return hdr + body
+            age = (tid - recv_tid) & 0xFFFF
+            if 0 < age <= MAX_LATE_AGE and drained < MAX_DRAIN:
+                drained += 1
+                LATE_FRAMES.labels(device).inc()
+                logger.debug("Modbus %s: drained late reply tid=%d (current %d)", device, recv_tid, tid)
+                continue
+            DESYNCS.labels(device).inc()
+            raise ModbusDesyncError(f"Transaction id mismatch: got {recv_tid}, expected {tid}")
+
+    def _recv_all(self, count: int, deadline: Optional[float] = None, mid_frame: bool = False) -> bytes:
         buf = b""
         while len(buf) < count:
-            chunk = self._sock.recv(count - len(buf))
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    if buf or mid_frame:
+                        # part of a frame is consumed: the stream cannot be resynchronised
+                        raise ModbusDesyncError("Modbus transaction timed out mid-frame")
+                    raise socket.timeout("Modbus transaction timed out")
+                self._sock.settimeout(remaining)
+            try:
+                chunk = self._sock.recv(count - len(buf))
+            except socket.timeout:
+                if buf or mid_frame:
+                    raise ModbusDesyncError("Modbus transaction timed out mid-frame")
+                raise
             if not chunk:
                 break
             buf += chunk
@@ -3,11 +3,26 @@ import threading
 import time
 import json	
 import os
-from typing import Callable, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from .modbus_tcp_client import MockModbusClient, TcpModbusClient
 from .interfaces import IModbusTcpClient
 from app.modules.sw.easyberry.store import database
+from app.core.metrics import registry
+from .profiling import profiler
+from .connect import Connector, connector as default_connector
+from .reads import register_cache
+from .writes import add_write_listener, wait_writes
+from .dispatch import OVERFLOW_POLICIES, CallbackDispatcher, dispatcher as default_dispatcher
+from .scheduling import (FAST_POLL_INTERVAL, OVERRUN_POLICIES, PRIORITIES, DeviceGuard, LagStats,
+                         get_device_guard, plan_next, transaction_priority)
+
+CYCLE_SECONDS = registry.histogram("poll_cycle_seconds", "Duration of one poll cycle", ("poller",))
+CYCLE_ERRORS = registry.counter("poll_errors_total", "Poll cycles that ended in an error", ("poller",))
+CYCLE_LAG = registry.gauge("poll_schedule_lag_seconds", "How late the last poll cycle started", ("poller",))
+CYCLE_OVERRUNS = registry.counter("poll_overruns_total", "Poll cycles that ended after the next slot was due", ("poller",))
+UNCHANGED = registry.counter("poll_unchanged_total", "Poll cycles that returned the same values as the previous one", ("poller",))
+MISSED_SLOTS = registry.counter("poll_missed_slots_total", "Scheduled poll slots that were overrun", ("poller",))
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +76,14 @@ class StatusStore:
             item['last_updated'] = time.time()
             self._data[poller_id] = item
 
+    def touch(self, poller_id: str) -> None:
+        """Refresh `last_updated` for a poll that returned the same values as before."""
+        import time
+        with self._lock:
+            item = self._data.setdefault(poller_id, {})
+            item['last_updated'] = time.time()
+            item['last_error'] = None
+
     def get_all(self) -> Dict[str, Dict]:
         with self._lock:
             # return a shallow copy
@@ -104,41 +127,76 @@ class PacketStore:
 packet_store = PacketStore(maxlen=2000)
 
 
+def _dump_database() -> None:
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Easyberry database: %s", database.dumps(indent=2, ensure_ascii=False))
+
+
+# debug dump of the whole database after each commit, only with DEBUG logging (it serializes the
+# whole tree under the Database lock); only the latest one matters
+default_dispatcher.register("database-dump", _dump_database, max_queue=1, policy="drop_oldest")
+
+
 class ModbusManager:
     """Manage Modbus client instances keyed by connection params.
 
     This allows reusing a single TCP connection for multiple pollers
-    or creating separate connections when desired.
+    or creating separate connections when desired. New clients are handed
+    to `connector`, which connects them in the background, so get_client
+    never waits for the network.
     """
 
-    def __init__(self):
+    def __init__(self, connector: Optional[Connector] = None):
         self._clients: Dict[Tuple[str, int, int, float, int], IModbusTcpClient] = {}
         self._lock = threading.Lock()
+        self.connector = connector or default_connector
 
     def _key_for(self, host: str, port: int, unit_id: int, timeout: float, retries: int):
         return (host, port, unit_id, float(timeout), int(retries))
 
     def get_client(self, hw_mode: str = "mock", host: str = "localhost", port: int = 502,
-                   timeout: float = 3.0, unit_id: int = 1, retries: int = 1) -> IModbusTcpClient:
+                   timeout: float = 3.0, unit_id: int = 1, retries: int = 1,
+                   min_timeout: float = 0.2, max_timeout: Optional[float] = None,
+                   priority_aging: float = 1.0) -> IModbusTcpClient:
         if hw_mode == "mock":
             return MockModbusClient()
 
         key = self._key_for(host, port, unit_id, timeout, retries)
         with self._lock:
-            if key not in self._clients:
-                client = TcpModbusClient(host=host, port=port, timeout=timeout, unit_id=unit_id, retries=retries)
-                try:
-                    client.connect()
-                except Exception as e:
-                    logger.warning("Failed initial connect for %s:%s -> %s", host, port, e)
+            client = self._clients.get(key)
+            created = client is None
+            if created:
+                client = TcpModbusClient(host=host, port=port, timeout=timeout, unit_id=unit_id, retries=retries,
+                                         min_timeout=min_timeout, max_timeout=max_timeout,
+                                         priority_aging=priority_aging)
+                client.connector = self.connector
                 self._clients[key] = client
-            return self._clients[key]
+        if created:
+            # connect outside the lock; a dead host must not hold up other devices
+            self.connector.request(client)
+        return client
+
+    def close_unused(self, in_use) -> None:
+        """Close and forget clients whose id() is not in `in_use`."""
+        with self._lock:
+            for key, c in list(self._clients.items()):
+                if id(c) in in_use:
+                    continue
+                self.connector.forget(c)
+                try:
+                    c.close()
+                except Exception:
+                    pass
+                del self._clients[key]
 
     def close_all(self) -> None:
+        """Close every client, interrupting transactions still blocked on the network."""
         with self._lock:
             for c in list(self._clients.values()):
+                self.connector.forget(c)
                 try:
-                    c.close()
+                    abort = getattr(c, "abort", None)
+                    abort() if abort is not None else c.close()
                 except Exception:
                     pass
             self._clients.clear()
@@ -148,6 +206,24 @@ class Poller(threading.Thread):
     """Poll registers periodically and call a user callback with results.
 
     callback signature: callback(result: Optional[list[int]], error: Optional[Exception])
+
+    `overrun` selects what happens when a cycle ends after the next slot was
+    due (see `scheduling.OVERRUN_POLICIES`); intervals are multiplied by the
+    device guard's factor while the device is saturated.
+
+    The callback runs on `dispatcher` (shared worker pool) from a queue of
+    `callback_queue` results handled with `callback_policy`, so a slow
+    callback never delays the next read.
+
+    With `skip_unchanged`, a reply identical to the previous one only
+    refreshes the "still fresh" timestamps; status/packet stores and the
+    Database are rewritten at most every `full_refresh` seconds then.
+
+    A disconnected client is never connected from the poll thread: the cycle
+    fails fast and `connector` reconnects the device in the background.
+
+    Reads run with transaction class `priority` (see scheduling.PRIORITIES);
+    by default "fast" up to FAST_POLL_INTERVAL seconds and "slow" above.
     """
 
     def __init__(self,
@@ -160,8 +236,23 @@ class Poller(threading.Thread):
                  unit_id: Optional[int] = None,
                  name: Optional[str] = None,
                  status_store: Optional[StatusStore] = None,
-                 poller_id: Optional[str] = None):
+                 poller_id: Optional[str] = None,
+                 overrun: str = "skip",
+                 guard: Optional[DeviceGuard] = None,
+                 skip_unchanged: bool = True,
+                 full_refresh: float = 60.0,
+                 dispatcher: Optional[CallbackDispatcher] = None,
+                 callback_queue: int = 16,
+                 callback_policy: str = "drop_oldest",
+                 connector: Optional[Connector] = None,
+                 priority: Optional[str] = None):
         super().__init__(daemon=True)
+        if overrun not in OVERRUN_POLICIES:
+            raise ValueError(f"unknown overrun policy: {overrun}")
+        if callback_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown callback policy: {callback_policy}")
+        if priority is not None and priority not in PRIORITIES:
+            raise ValueError(f"unknown priority class: {priority}")
         self.client = client
         self.function = function  # 'holding' or 'input'
         self.address = address
@@ -169,13 +260,35 @@ class Poller(threading.Thread):
         self.interval = float(interval)
         self.callback = callback
         self.unit_id = unit_id
+        self.overrun = overrun
+        self.priority = priority
+        self.guard = guard or get_device_guard(client)
+        self.lag_stats = LagStats()
+        # config entry this poller was built from (see poller_specs), used by hot reload
+        self.spec: Optional[Dict] = None
+        self.skip_unchanged = bool(skip_unchanged)
+        self.full_refresh = float(full_refresh)
+        # registers of the last fully processed reply and when it was processed
+        self._last_values: Optional[tuple] = None
+        self._last_full = 0.0
+        # Database.generation() seen by the last full update; a reload of the things forces another
+        self._db_generation = 0
+        # set by write-through (another thread): the next reply takes the full path
+        self._written = threading.Event()
+        self._dispatcher = dispatcher or default_dispatcher
+        self._connector = connector or default_connector
         self._stop_ev = threading.Event()
+        # set by stop() and hot reload (another thread) to cut the wait for the next slot short
+        self._wake = threading.Event()
         if name:
             self.name = name
         # status store to report last values/errors
         self._status_store = status_store or default_store
         # unique id to identify this poller in the store
         self._poller_id = poller_id or getattr(self, 'name', None) or f"poller-{id(self)}"
+        self._callback_name = f"callback:{self._poller_id}"
+        self._callback_queue = callback_queue
+        self._callback_policy = callback_policy
         # initialize status
         try:
             self._status_store.update(self._poller_id, last_request={
@@ -189,76 +302,167 @@ class Poller(threading.Thread):
 
     def stop(self) -> None:
         self._stop_ev.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        """Settings changed; re-plan the pending wait with the current interval."""
+        self._wake.set()
+
+    def mark_written(self) -> None:
+        """Registers of this poller were written; process the next reply in full."""
+        self._written.set()
+
+    def _run_callback(self, res, err) -> None:
+        # runs on a dispatcher worker
+        try:
+            self.callback(res, err)
+        except Exception:
+            if err is None:
+                logger.exception("Poller callback failed")
+            else:
+                logger.exception("Poller callback error handler failed")
 
     def stopped(self) -> bool:
         return self._stop_ev.is_set()
 
     def run(self) -> None:
         # fixed-period scheduling: run work immediately, then aim to run at start_time + n*interval
-        next_run = time.time()
+        m_cycle = CYCLE_SECONDS.labels(self._poller_id)
+        m_errors = CYCLE_ERRORS.labels(self._poller_id)
+        m_lag = CYCLE_LAG.labels(self._poller_id)
+        m_overruns = CYCLE_OVERRUNS.labels(self._poller_id)
+        m_missed = MISSED_SLOTS.labels(self._poller_id)
+        m_unchanged = UNCHANGED.labels(self._poller_id)
+        self._dispatcher.register(self._callback_name, self._run_callback,
+                                  max_queue=self._callback_queue, policy=self._callback_policy)
+        # give the initial connect the chance to finish before the first read
+        if not self._connector.ready(self.client):
+            self._connector.wait(self.client, getattr(self.client, "timeout", 0.0), cancel=self._stop_ev)
+        next_run = time.monotonic()
         while not self._stop_ev.is_set():
-            # schedule next run based on fixed period
-            next_run += self.interval
+            cycle_start = time.monotonic()
+            lag = max(0.0, cycle_start - next_run)
+            m_lag.set(lag)
+            # per-stage timing; None (and skipped) unless profiling is enabled
+            prof = profiler.cycle(self._poller_id)
+            take_busy = io_start = None
             try:
-                if self.function == "holding":
-                    res = self.client.read_holding_registers(self.address, self.count, unit_id=self.unit_id)
-                elif self.function == "input":
-                    res = self.client.read_input_registers(self.address, self.count, unit_id=self.unit_id)
-                else:
-                    raise ValueError("Unknown function: %s" % (self.function,))
-                # update status store including raw request/response if available
                 try:
-                    raw_req = getattr(self.client, '_last_request', None)
-                    raw_resp = getattr(self.client, '_last_response', None)
-                    last_req_info = {
-                        'function': self.function,
-                        'address': self.address,
-                        'count': self.count,
-                        'unit_id': self.unit_id,
-                    }
-                    rq_hex = _format_hex_grouped(raw_req)
-                    rp_hex = _format_hex_grouped(raw_resp)
-                    if rq_hex is not None:
-                        last_req_info['raw_request_hex'] = rq_hex
-                    if rp_hex is not None:
-                        last_req_info['raw_response_hex'] = rp_hex
-                    self._status_store.update(self._poller_id, last_value=res, last_request=last_req_info)
+                    # queued setpoint writes go before periodic reads
+                    wait_writes(self.client, getattr(self.client, "timeout", 1.0))
+                    if not self._connector.ready(self.client):
+                        raise ConnectionError(f"device {getattr(self.client, 'host', '?')}:{getattr(self.client, 'port', '?')} "
+                                              "not connected; reconnecting in background")
+                    priority = self.priority or ("fast" if self.interval <= FAST_POLL_INTERVAL else "slow")
+                    take_busy = getattr(self.client, "take_busy", None)
+                    if take_busy is not None:
+                        take_busy()
+                    # cleared before the read: a write landing during it forces the next cycle too
+                    written = self._written.is_set()
+                    self._written.clear()
+                    io_start = time.monotonic()
+                    with transaction_priority(priority):
+                        if self.function == "holding":
+                            res = self.client.read_holding_registers(self.address, self.count, unit_id=self.unit_id)
+                        elif self.function == "input":
+                            res = self.client.read_input_registers(self.address, self.count, unit_id=self.unit_id)
+                        else:
+                            raise ValueError("Unknown function: %s" % (self.function,))
+                finally:
+                    # time the device was busy with this poller, failed requests included; clients
+                    # that track it leave out time spent queued for the connection
+                    if take_busy is not None:
+                        self.guard.record(take_busy())
+                    elif io_start is not None:
+                        self.guard.record(time.monotonic() - io_start)
+                if prof is not None:
+                    prof.mark("io")
+                values = tuple(res) if isinstance(res, (list, tuple)) else None
+                if (self.skip_unchanged and values is not None and values == self._last_values
+                        and time.monotonic() - self._last_full < self.full_refresh
+                        and database.generation(self._poller_id) == self._db_generation
+                        and not written):
+                    # same registers as last time: skip formatting and store writes, only confirm freshness
+                    register_cache.record(self.client, self.function, self.address, values)
+                    self._status_store.touch(self._poller_id)
+                    database.touch(self._poller_id)
+                    m_unchanged.inc()
+                    if prof is not None:
+                        prof.mark("unchanged")
+                else:
+                    self._last_values = values
+                    self._last_full = time.monotonic()
+                    self._db_generation = database.generation(self._poller_id)
+                    if values is not None:
+                        register_cache.record(self.client, self.function, self.address, values)
+                    # update status store including raw request/response if available
                     try:
-                        packet_store.add(self._poller_id, rq_hex, rp_hex, note=None)
-                        # mark successful exchange
+                        raw_req = getattr(self.client, '_last_request', None)
+                        raw_resp = getattr(self.client, '_last_response', None)
+                        last_req_info = {
+                            'function': self.function,
+                            'address': self.address,
+                            'count': self.count,
+                            'unit_id': self.unit_id,
+                        }
+                        rq_hex = _format_hex_grouped(raw_req)
+                        rp_hex = _format_hex_grouped(raw_resp)
+                        if rq_hex is not None:
+                            last_req_info['raw_request_hex'] = rq_hex
+                        if rp_hex is not None:
+                            last_req_info['raw_response_hex'] = rp_hex
+                        if prof is not None:
+                            prof.mark("hex")
+                        self._status_store.update(self._poller_id, last_value=res, last_request=last_req_info)
+                        if prof is not None:
+                            prof.mark("status")
                         try:
-                            # last entry is the one we just added; set status to OK
-                            with packet_store._lock:
-                                if len(packet_store._deque) > 0:
-                                    packet_store._deque[-1]['status'] = 'OK'
+                            packet_store.add(self._poller_id, rq_hex, rp_hex, note=None)
+                            # mark successful exchange
+                            try:
+                                # last entry is the one we just added; set status to OK
+                                with packet_store._lock:
+                                    if len(packet_store._deque) > 0:
+                                        packet_store._deque[-1]['status'] = 'OK'
+                            except Exception:
+                                pass
                         except Exception:
-                            pass
+                            logger.exception("Failed to add packet to packet_store")
+                        if prof is not None:
+                            prof.mark("packet_store")
                     except Exception:
-                        logger.exception("Failed to add packet to packet_store")
-                except Exception:
-                    logger.exception("Failed to update status store")
+                        logger.exception("Failed to update status store")
 
-                # update easyberry database if available and poller_id present
-                try:
-                    if res is not None and isinstance(res, (list, tuple)):
-                        updated = database.update_from_poll_result(self._poller_id, list(res), meta={
-                            "request": _format_hex_grouped(raw_req),
-                            "response": _format_hex_grouped(raw_resp),
-                            "base_address": int(self.address),
-                        })
-                        # always log how many things were updated for visibility
-                        logger.info("Easyberry: poller=%s updated=%d things", self._poller_id, updated)
-                except Exception:
-                    logger.exception("Easyberry update failed")
-                    
-                #print(json.dumps(database.pollers))
-                print(json.dumps(database.pollers, indent=2, ensure_ascii=False))
-                    
-                try:
-                    self.callback(res, None)
-                except Exception:
-                    logger.exception("Poller callback failed")
+                    # update easyberry database if available and poller_id present
+                    try:
+                        if res is not None and isinstance(res, (list, tuple)):
+                            updated = database.update_from_poll_result(self._poller_id, list(res), meta={
+                                "request": _format_hex_grouped(raw_req),
+                                "response": _format_hex_grouped(raw_resp),
+                                "base_address": int(self.address),
+                            })
+                            # always log how many things were updated for visibility
+                            logger.info("Easyberry: poller=%s updated=%d things", self._poller_id, updated)
+                    except Exception:
+                        logger.exception("Easyberry update failed")
+                    if prof is not None:
+                        prof.mark("database")
+
+                    if logger.isEnabledFor(logging.DEBUG):
+                        self._dispatcher.submit("database-dump")
+                    if prof is not None:
+                        prof.mark("dump")
+
+                self._dispatcher.submit(self._callback_name, res, None)
+                if prof is not None:
+                    prof.mark("callback")
             except Exception as e:
+                if self._stop_ev.is_set():
+                    # interrupted by shutdown (see ModbusManager.close_all); not a device error
+                    break
+                m_errors.inc()
+                # the next successful reply must go through the full path again
+                self._last_values = None
                 # record error in store and notify callback
                 try:
                     raw_req = getattr(self.client, '_last_request', None)
@@ -289,19 +493,145 @@ class Poller(threading.Thread):
                         logger.exception("Failed to add packet to packet_store")
                 except Exception:
                     logger.exception("Failed to update status store with error")
-                try:
-                    self.callback(None, e)
-                except Exception:
-                    logger.exception("Poller callback error handler failed")
-
-            # wait until the next scheduled run (allow early exit)
+                self._dispatcher.submit(self._callback_name, None, e)
+                if prof is not None:
+                    prof.mark("error")
+
+            if prof is not None:
+                prof.done()
+            now = time.monotonic()
+            elapsed = now - cycle_start
+            m_cycle.observe(elapsed)
+            # fixed-period grid, stretched while the device is saturated
+            next_run, missed = plan_next(self.overrun, next_run, now, self.interval * self.guard.factor)
+            self.lag_stats.record(lag, elapsed, missed)
+            if missed:
+                m_overruns.inc()
+                m_missed.inc(missed)
+
+            # wait until the next scheduled run; stop() and wake() cut the wait short
             while not self._stop_ev.is_set():
-                now = time.time()
-                remaining = next_run - now
-                if remaining <= 0:
+                remaining = next_run - time.monotonic()
+                if remaining <= 0 or not self._wake.wait(remaining):
                     break
-                # sleep in small increments so we can exit quickly
-                time.sleep(min(0.1, remaining))
+                self._wake.clear()
+                # retuned: a shorter interval counts from the start of the last cycle
+                next_run = min(next_run, cycle_start + self.interval * self.guard.factor)
+        # a replacement poller may already have registered the same name
+        self._dispatcher.unregister(self._callback_name, self._run_callback)
+
+
+def stop_pollers(pollers: Iterable["Poller"], manager: Optional[ModbusManager] = None,
+                 timeout: float = 2.0) -> List[str]:
+    """Stop `pollers` together and wait for them; returns the ids still running after `timeout`.
+
+    All stop flags are set first, then `manager`'s connections are aborted so
+    pollers blocked in a read return at once, then the threads are joined
+    against one shared deadline.
+    """
+    pollers = list(pollers)
+    for p in pollers:
+        p.stop()
+    if manager is not None:
+        manager.close_all()
+    deadline = time.monotonic() + timeout
+    for p in pollers:
+        if p.is_alive() and p is not threading.current_thread():
+            p.join(max(0.0, deadline - time.monotonic()))
+    stuck = [p._poller_id for p in pollers if p.is_alive()]
+    if stuck:
+        logger.warning("Pollers still running after %.1fs: %s", timeout, stuck)
+    return stuck
+
+
+def _log_callback(name):
+    def _cb(res, err):
+        if err:
+            logger.warning("%s poll error: %s", name, err)
+        else:
+            logger.info("%s poll result: %s", name, res)
+    return _cb
+
+
+def _check_overrun(policy: str, poller_id: str) -> str:
+    if policy not in OVERRUN_POLICIES:
+        raise ValueError(f"poller {poller_id}: unknown overrun policy {policy!r}")
+    return policy
+
+
+def _check_priority(priority: Optional[str], poller_id: str) -> Optional[str]:
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"poller {poller_id}: unknown priority class {priority!r}")
+    return priority
+
+
+def poller_specs(cfg: Dict) -> Dict[str, Dict]:
+    """Flatten a polling config into {poller id: spec}.
+
+    A spec has the config id of its "device", the connection parameters
+    under "client", the device "saturation" guard settings and the
+    per-poller settings under "poller".
+    """
+    specs: Dict[str, Dict] = {}
+    for dev in cfg.get("devices", []):
+        dev_id = dev.get("id") or "<unknown>"
+        unit = int(dev.get("unit_id", 1))
+        client_spec = {
+            "hw_mode": dev.get("hw_mode", "tcp"),
+            "host": dev.get("host", "127.0.0.1"),
+            "port": int(dev.get("port", 502)),
+            "timeout": float(dev.get("timeout", 3.0)),
+            "unit_id": unit,
+            "retries": int(dev.get("retries", 1)),
+            # adaptive transaction timeout bounds; `timeout` stays the connect timeout and default ceiling
+            "min_timeout": float(dev.get("min_timeout", 0.2)),
+            "max_timeout": float(dev["max_timeout"]) if dev.get("max_timeout") is not None else None,
+            # seconds a queued transaction waits before it is bumped up one priority class
+            "priority_aging": float(dev.get("priority_aging", 1.0)),
+        }
+
+        for pconf in dev.get("pollers", []):
+            local_pid = pconf.get("id") or pconf.get("name") or f"poller-{len(specs)+1}"
+            if "unit_id" in pconf:
+                logger.warning("Poller %s in device %s contains 'unit_id'; ignoring and using device unit_id=%s", local_pid, dev_id, unit)
+
+            full_pid = f"{unit}-{local_pid}"
+            if full_pid in specs:
+                logger.warning("Duplicate poller id %s in device %s; the last definition wins", full_pid, dev_id)
+            specs[full_pid] = {
+                "device": dev_id,
+                "client": client_spec,
+                "saturation": dev.get("saturation"),
+                "poller": {
+                    "function": pconf.get("function", "holding"),
+                    "address": int(pconf.get("address", 0)),
+                    "count": int(pconf.get("count", 1)),
+                    "interval": float(pconf.get("interval", 1.0)),
+                    "overrun": _check_overrun(pconf.get("overrun", dev.get("overrun", "skip")), full_pid),
+                    "skip_unchanged": bool(pconf.get("skip_unchanged", dev.get("skip_unchanged", True))),
+                    "full_refresh": float(pconf.get("full_refresh", dev.get("full_refresh", 60.0))),
+                    "priority": _check_priority(pconf.get("priority"), full_pid),
+                },
+            }
+    return specs
+
+
+def build_poller(manager: "ModbusManager", poller_id: str, spec: Dict) -> "Poller":
+    """Create (not start) the poller described by a `poller_specs` entry."""
+    cspec = spec["client"]
+    client = manager.get_client(**cspec)
+    poller = Poller(
+        client,
+        callback=_log_callback(poller_id),
+        unit_id=cspec["unit_id"],
+        name=poller_id,
+        poller_id=poller_id,
+        guard=get_device_guard(client, spec.get("saturation")),
+        connector=manager.connector,
+        **spec["poller"],
+    )
+    poller.spec = spec
+    return poller
 
 
 def polling_example(config_path: str = "polling_config.json"):
@@ -329,59 +659,14 @@ def polling_example(config_path: str = "polling_config.json"):
         return None, []
 
     manager = ModbusManager()
-    pollers = []
-
-    def cb(name):
-        def _cb(res, err):
-            if err:
-                logger.warning("%s poll error: %s", name, err)
-            else:
-                logger.info("%s poll result: %s", name, res)
-        return _cb
-
-    for dev in cfg.get("devices", []):
-        dev_id = dev.get("id") or "<unknown>"
-        hw_mode = dev.get("hw_mode", "tcp")
-        host = dev.get("host", "127.0.0.1")
-        port = int(dev.get("port", 502))
-        timeout = float(dev.get("timeout", 3.0))
-        retries = int(dev.get("retries", 1))
-        unit = int(dev.get("unit_id", 1))
-
-        for pconf in dev.get("pollers", []):
-            local_pid = pconf.get("id") or pconf.get("name") or f"poller-{len(pollers)+1}"
-            if "unit_id" in pconf:
-                logger.warning("Poller %s in device %s contains 'unit_id'; ignoring and using device unit_id=%s", local_pid, dev_id, unit)
-
-            full_pid = f"{unit}-{local_pid}"
-
-            client = manager.get_client(
-                hw_mode=hw_mode,
-                host=host,
-                port=port,
-                timeout=timeout,
-                unit_id=unit,
-                retries=retries,
-            )
-
-            poller = Poller(
-                client,
-                pconf.get("function", "holding"),
-                address=int(pconf.get("address", 0)),
-                count=int(pconf.get("count", 1)),
-                interval=float(pconf.get("interval", 1.0)),
-                callback=cb(full_pid),
-                unit_id=unit,
-                name=full_pid,
-                poller_id=full_pid,
-            )
-            try:
-                logger.info("Created poller %s interval=%s", full_pid, pconf.get("interval"))
-                # also print to stdout to ensure visibility in all environments
-                print(f"[polling-debug] Created poller {full_pid} interval={pconf.get('interval')}")
-            except Exception:
-                pass
-            pollers.append(poller)
+    pollers = [build_poller(manager, pid, spec) for pid, spec in poller_specs(cfg).items()]
+    for p in pollers:
+        try:
+            logger.info("Created poller %s interval=%s", p._poller_id, p.interval)
+            # also print to stdout to ensure visibility in all environments
+            print(f"[polling-debug] Created poller {p._poller_id} interval={p.interval}")
+        except Exception:
+            pass
 
     for p in pollers:
         try:
@@ -401,38 +686,90 @@ def polling_example(config_path: str = "polling_config.json"):
 # Example polling controller (start/stop) for debug endpoints
 _example_manager = None
 _example_pollers = None
+# serializes start, stop and reload; readers take list() snapshots without it
+_example_lock = threading.Lock()
 
 def start_example_polling():
     global _example_manager, _example_pollers
-    if _example_manager is not None:
-        return False
-    manager, pollers = polling_example()
-    _example_manager = manager
-    _example_pollers = pollers
-    return True
+    with _example_lock:
+        if _example_manager is not None:
+            return False
+        manager, pollers = polling_example()
+        _example_manager = manager
+        _example_pollers = pollers
+        return True
 
 
 def stop_example_polling():
     global _example_manager, _example_pollers
-    if _example_manager is None:
-        return False
-    try:
-        for p in (_example_pollers or []):
-            try:
-                p.stop()
-            except Exception:
-                pass
-        # give threads a short time to exit
-        time.sleep(0.2)
+    with _example_lock:
+        if _example_manager is None:
+            return False
         try:
-            _example_manager.close_all()
+            stop_pollers(_example_pollers or [], _example_manager)
         except Exception:
-            pass
-    finally:
-        _example_manager = None
-        _example_pollers = None
-    return True
+            logger.exception("Failed stopping example pollers")
+        finally:
+            _example_manager = None
+            _example_pollers = None
+        return True
+
+
+def reload_example_polling(config_path: str = "polling_config.json") -> Optional[Dict]:
+    """Apply `config_path` to the running example pollers without restarting them.
+
+    Returns the reconcile summary, or None when polling is not running.
+    Raises on an unreadable or invalid config, leaving the pollers as they were.
+    """
+    global _example_pollers
+    from .reconcile import reconcile
+    cfg_path = config_path
+    if not os.path.isabs(cfg_path):
+        cfg_path = os.path.join(os.getcwd(), cfg_path)
+    with _example_lock:
+        if _example_manager is None:
+            return None
+        with open(cfg_path, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        _example_pollers, summary = reconcile(_example_manager, list(_example_pollers or []), cfg)
+        return summary
+
+
+def _write_through(client, address: int, values) -> None:
+    """Show written holding registers at once in the caches the UI reads."""
+    register_cache.update(client, "holding", address, list(values))
+    end = address + len(values)
+    for p in list(_example_pollers or []):
+        if p.client is not client or p.function != "holding":
+            continue
+        lo, hi = max(p.address, address), min(p.address + p.count, end)
+        if lo >= hi or p._last_values is None:
+            continue
+        regs = list(p._last_values)
+        regs[lo - p.address:hi - p.address] = values[lo - address:hi - address]
+        # _last_values belongs to the poller thread; it re-checks the registers in full next cycle
+        p.mark_written()
+        p._status_store.update(p._poller_id, last_value=regs)
+        database.update_from_poll_result(p._poller_id, regs, meta={"base_address": int(p.address), "write": True})
+
+
+add_write_listener(_write_through)
+
+
+def example_device_client(device: str) -> Optional[IModbusTcpClient]:
+    """Client the running example pollers use for config device `device`, if any."""
+    for p in list(_example_pollers or []):
+        if (p.spec or {}).get("device") == device:
+            return p.client
+    return None
 
 
 def example_polling_status() -> bool:
     return _example_manager is not None
+
+
+def example_poller_status() -> Dict[str, Dict[str, Any]]:
+    """Schedule lag, overrun policy and device guard stats of each running example poller."""
+    with _example_lock:
+        pollers = list(_example_pollers or [])
+    return {p._poller_id: dict(p.lag_stats.snapshot(), overrun=p.overrun, device=p.guard.stats()) for p in pollers}
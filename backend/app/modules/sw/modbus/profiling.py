@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+class _Cycle:
+    """Timing of one poll cycle: each `mark` records the time spent since the previous mark."""
+
+    __slots__ = ("_profiler", "_poller_id", "_last", "_start", "_stages")
+
+    def __init__(self, profiler: "StageProfiler", poller_id: str):
+        self._profiler = profiler
+        self._poller_id = poller_id
+        self._start = self._last = time.perf_counter_ns()
+        self._stages = []
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter_ns()
+        self._stages.append((stage, now - self._last))
+        self._last = now
+
+    def done(self) -> None:
+        self._stages.append(("total", time.perf_counter_ns() - self._start))
+        self._profiler._record(self._poller_id, self._stages)
+
+
+class StageProfiler:
+    """Optional per-stage timing of the poll cycle.
+
+    Disabled by default: `cycle()` then returns None and the poller skips all
+    timing calls, so the only cost is one attribute check per cycle. When
+    enabled, the last `window` durations of every (poller, stage) pair are
+    kept and `summary()` reports count/mean/p50/p95/max in microseconds.
+    """
+
+    def __init__(self, window: int = 200):
+        self.enabled = False
+        self.window = max(1, int(window))
+        self._lock = threading.Lock()
+        self._samples: Dict[Tuple[str, str], Deque[int]] = {}
+
+    def enable(self, on: bool = True) -> None:
+        self.enabled = bool(on)
+
+    def cycle(self, poller_id: str) -> Optional[_Cycle]:
+        if not self.enabled:
+            return None
+        return _Cycle(self, poller_id)
+
+    def _record(self, poller_id: str, stages) -> None:
+        with self._lock:
+            for stage, ns in stages:
+                key = (poller_id, stage)
+                dq = self._samples.get(key)
+                if dq is None:
+                    dq = self._samples[key] = deque(maxlen=self.window)
+                dq.append(ns)
+
+    def summary(self, poller_id: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        with self._lock:
+            snapshot = [(k, list(v)) for k, v in self._samples.items() if poller_id is None or k[0] == poller_id]
+        out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (pid, stage), samples in snapshot:
+            if not samples:
+                continue
+            samples.sort()
+            n = len(samples)
+            out.setdefault(pid, {})[stage] = {
+                "count": n,
+                "mean_us": round(sum(samples) / n / 1000.0, 1),
+                "p50_us": round(samples[n // 2] / 1000.0, 1),
+                "p95_us": round(samples[min(n - 1, int(n * 0.95))] / 1000.0, 1),
+                "max_us": round(samples[-1] / 1000.0, 1),
+            }
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+profiler = StageProfiler()
@@ -0,0 +1,172 @@
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.metrics import registry
+
+from .scheduling import transaction_priority
+
+logger = logging.getLogger(__name__)
+
+READ_FUNCTIONS = ("holding", "input")
+# registers per read request (FC3/FC4 limit)
+MAX_READ_COUNT = 125
+
+READS = registry.counter("modbus_api_reads_total", "On-demand register reads by where the answer came from", ("source",))
+
+
+class RegisterCache:
+    """Latest register blocks read from each client, as written by the pollers.
+
+    Blocks are kept per client (weakly, like the device guards) and function,
+    keyed by (address, count); a range is answered from one block or stitched
+    from several, and is only as fresh as its oldest register. Blocks older
+    than `max_age` seconds are dropped, and at most `max_adhoc` ranges read
+    through the API are kept per client and function (least recently read
+    go first), so ad-hoc reads cannot grow the cache without bound.
+    """
+
+    def __init__(self, max_age: float = 300.0, max_adhoc: int = 64):
+        self.max_age = float(max_age)
+        self.max_adhoc = max(0, int(max_adhoc))
+        self._lock = threading.Lock()
+        # client -> {function: {(address, count): (values, ts, adhoc)}}, oldest record first
+        self._blocks: "weakref.WeakKeyDictionary[Any, Dict[str, OrderedDict]]" = weakref.WeakKeyDictionary()
+
+    def record(self, client: Any, function: str, address: int, values: tuple, ts: Optional[float] = None,
+               adhoc: bool = False) -> None:
+        now = time.time()
+        with self._lock:
+            per_fn = self._blocks.setdefault(client, {}).setdefault(function, OrderedDict())
+            key = (address, len(values))
+            if key in per_fn:
+                # a poller block stays a poller block when the API reads the same range
+                adhoc = adhoc and per_fn[key][2]
+                del per_fn[key]
+            per_fn[key] = (values, now if ts is None else ts, adhoc)
+            while per_fn:
+                first = next(iter(per_fn.values()))
+                if first[1] >= now - self.max_age:
+                    break
+                per_fn.popitem(last=False)
+            if adhoc:
+                adhoc_keys = [k for k, v in per_fn.items() if v[2]]
+                for k in adhoc_keys[:max(0, len(adhoc_keys) - self.max_adhoc)]:
+                    del per_fn[k]
+
+    def update(self, client: Any, function: str, address: int, values: List[int]) -> None:
+        """Patch registers inside cached blocks (write-through), keeping their timestamps."""
+        end = address + len(values)
+        with self._lock:
+            per_fn = self._blocks.get(client, {}).get(function, {})
+            for (a, n), (vals, ts, adhoc) in list(per_fn.items()):
+                lo, hi = max(a, address), min(a + n, end)
+                if lo >= hi:
+                    continue
+                patched = list(vals)
+                patched[lo - a:hi - a] = values[lo - address:hi - address]
+                per_fn[(a, n)] = (tuple(patched), ts, adhoc)
+
+    def lookup(self, client: Any, function: str, address: int, count: int,
+               max_age: float) -> Optional[Tuple[List[int], float]]:
+        """Return (values, ts of the oldest register) if the range is cached and younger than `max_age`."""
+        oldest_ok = time.time() - max_age
+        with self._lock:
+            per_fn = self._blocks.get(client, {}).get(function)
+            if not per_fn:
+                return None
+            out: List[Optional[int]] = [None] * count
+            missing = count
+            oldest = None
+            # most recently recorded blocks first so overlapping registers take the latest value
+            for (a, n), (vals, ts, _) in reversed(per_fn.items()):
+                if ts < oldest_ok:
+                    continue
+                lo, hi = max(a, address), min(a + n, address + count)
+                for reg in range(lo, hi):
+                    if out[reg - address] is None:
+                        out[reg - address] = vals[reg - a]
+                        missing -= 1
+                        oldest = ts if oldest is None else min(oldest, ts)
+                if missing == 0:
+                    return out, oldest
+        return None
+
+    def size(self, client: Any) -> int:
+        with self._lock:
+            return sum(len(v) for v in self._blocks.get(client, {}).values())
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[List[int]] = None
+        self.error: Optional[BaseException] = None
+
+
+class Reader:
+    """On-demand register reads answered from `cache` when fresh enough.
+
+    Misses go to the device, and identical concurrent misses (same client,
+    function, range and unit) share a single transaction, so UI and
+    integration reads do not multiply the load on the PLC.
+    """
+
+    def __init__(self, cache: RegisterCache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[int, str, int, int, Optional[int]], _Call] = {}
+
+    def read(self, client: Any, function: str, address: int, count: int, unit_id: Optional[int] = None,
+             max_age: float = 1.0) -> Dict[str, Any]:
+        """Return {"values", "source": cache|live|shared, "ts"}; raises on a failed live read."""
+        if function not in READ_FUNCTIONS:
+            raise ValueError(f"unknown function: {function}")
+        if not 1 <= count <= MAX_READ_COUNT or not 0 <= address <= 0xFFFF - count + 1:
+            raise ValueError(f"invalid range: address={address} count={count}")
+        if max_age > 0:
+            hit = self.cache.lookup(client, function, address, count, max_age)
+            if hit is not None:
+                READS.labels("cache").inc()
+                return {"values": hit[0], "source": "cache", "ts": hit[1]}
+
+        key = (id(client), function, address, count, unit_id)
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+        if not leader:
+            call.done.wait()
+            READS.labels("shared").inc()
+            if call.error is not None:
+                raise call.error
+            return {"values": list(call.result), "source": "shared", "ts": time.time()}
+
+        try:
+            # ad-hoc reads yield to writes and pollers
+            with transaction_priority("diagnostic"):
+                if function == "holding":
+                    res = client.read_holding_registers(address, count, unit_id=unit_id)
+                else:
+                    res = client.read_input_registers(address, count, unit_id=unit_id)
+            call.result = list(res)
+            self.cache.record(client, function, address, tuple(call.result), adhoc=True)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+        READS.labels("live").inc()
+        return {"values": list(call.result), "source": "live", "ts": time.time()}
+
+
+register_cache = RegisterCache()
+reader = Reader(register_cache)
@@ -0,0 +1,76 @@
+import logging
+from typing import Dict, List, Tuple
+
+from .polling import ModbusManager, Poller, build_poller, poller_specs
+
+logger = logging.getLogger(__name__)
+
+# poller settings that can change on a running poller; they take effect on its next cycle
+_RETUNABLE = ("function", "address", "count", "interval", "overrun", "skip_unchanged", "full_refresh", "priority")
+_GUARD_KEYS = ("window", "high", "low", "step", "max_factor")
+
+
+def reconcile(manager: ModbusManager, running: List[Poller], cfg: Dict) -> Tuple[List[Poller], Dict[str, List[str]]]:
+    """Bring the running pollers in line with polling config `cfg`.
+
+    Pollers missing from `cfg` are stopped, new ones are started, pollers
+    whose device connection settings changed are replaced, and pollers with
+    only poller-level changes (interval, address, overrun policy, ...) are
+    retuned in place so they keep their connection and schedule. Connections
+    no poller uses any more are closed. Returns (pollers now running, summary).
+    """
+    wanted = poller_specs(cfg)
+    current = {p._poller_id: p for p in running}
+    summary: Dict[str, List[str]] = {"started": [], "stopped": [], "replaced": [], "retuned": [], "unchanged": []}
+    out: List[Poller] = []
+
+    for pid, p in current.items():
+        if pid not in wanted:
+            p.stop()
+            summary["stopped"].append(pid)
+
+    for pid, spec in wanted.items():
+        p = current.get(pid)
+        old = getattr(p, "spec", None) if p is not None else None
+        if p is not None and old is not None and old["client"] == spec["client"]:
+            if old == spec:
+                summary["unchanged"].append(pid)
+            else:
+                _retune(p, spec)
+                summary["retuned"].append(pid)
+            out.append(p)
+            continue
+        if p is not None:
+            p.stop()
+            summary["replaced"].append(pid)
+        else:
+            summary["started"].append(pid)
+        try:
+            new = build_poller(manager, pid, spec)
+            new.start()
+            out.append(new)
+        except Exception:
+            logger.exception("Reconcile: failed to start poller %s", pid)
+
+    manager.close_unused({id(p.client) for p in out})
+    logger.info("Polling config applied: %s", {k: len(v) for k, v in summary.items()})
+    return out, summary
+
+
+def _retune(p: Poller, spec: Dict) -> None:
+    params = spec["poller"]
+    old = p.spec["poller"]
+    for key in _RETUNABLE:
+        if params.get(key) != old.get(key):
+            setattr(p, key, params[key])
+    if params["function"] != old["function"] or params["address"] != old["address"] or params["count"] != old["count"]:
+        # a different register block must go through the full update path once;
+        # _last_values belongs to the poller thread, so only flag it
+        p.mark_written()
+    sat = spec.get("saturation") or {}
+    for key in _GUARD_KEYS:
+        if key in sat:
+            setattr(p.guard, key, float(sat[key]))
+    p.spec = spec
+    # apply a shortened interval now rather than after the current wait
+    p.wake()
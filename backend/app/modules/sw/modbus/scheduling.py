@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# what a poller does when a cycle ends after its next slot was due
+#   skip:     drop the missed slots and stay on the original time grid
+#   coalesce: run once immediately for all missed slots, then restart the grid from now
+#   stretch:  wait a full interval after the late cycle (the period grows to duration + interval)
+#   catchup:  legacy behaviour, fire back-to-back until the grid is reached again
+OVERRUN_POLICIES = ("skip", "coalesce", "stretch", "catchup")
+
+STRETCH_FACTOR = registry.gauge("modbus_device_stretch_factor", "Interval multiplier applied to a saturated device", ("device",))
+UTILIZATION = registry.gauge("modbus_device_utilization", "Share of wall time a device spent answering requests", ("device",))
+
+
+def plan_next(policy: str, scheduled: float, now: float, interval: float) -> Tuple[float, int]:
+    """Return (next run time, missed slots) for a cycle scheduled at `scheduled` that ended at `now`."""
+    nxt = scheduled + interval
+    if nxt >= now or interval <= 0:
+        return nxt, 0
+    missed = int((now - nxt) // interval) + 1
+    if policy == "skip":
+        return nxt + missed * interval, missed
+    if policy == "coalesce":
+        return now, missed
+    if policy == "stretch":
+        return now + interval, missed
+    return nxt, missed
+
+
+class LagStats:
+    """Per-poller schedule lag and overrun counters."""
+
+    def __init__(self, alpha: float = 0.2):
+        self._lock = threading.Lock()
+        self.alpha = alpha
+        self.cycles = 0
+        self.overruns = 0
+        self.missed_slots = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.avg_lag = 0.0
+        self.last_duration = 0.0
+
+    def record(self, lag: float, duration: float, missed: int) -> None:
+        with self._lock:
+            self.cycles += 1
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.avg_lag += self.alpha * (lag - self.avg_lag)
+            self.last_duration = duration
+            if missed:
+                self.overruns += 1
+                self.missed_slots += missed
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cycles": self.cycles,
+                "overruns": self.overruns,
+                "missed_slots": self.missed_slots,
+                "last_lag": round(self.last_lag, 4),
+                "avg_lag": round(self.avg_lag, 4),
+                "max_lag": round(self.max_lag, 4),
+                "last_duration": round(self.last_duration, 4),
+            }
+
+
+class DeviceGuard:
+    """Stretch all poll intervals of a device while it is saturated.
+
+    Pollers report how long each request kept the device busy. Once per
+    `window` seconds the busy share is compared to `high`/`low`: above
+    `high` the interval factor grows by `step` (up to `max_factor`), below
+    `low` it shrinks back towards 1. `clock` is the time source (tests).
+    """
+
+    def __init__(self, name: str = "", window: float = 10.0, high: float = 0.8, low: float = 0.5,
+                 step: float = 1.5, max_factor: float = 4.0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.window = max(0.1, float(window))
+        self.high = float(high)
+        self.low = float(low)
+        self.step = max(1.0, float(step))
+        self.max_factor = max(1.0, float(max_factor))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._window_start = clock()
+        self._busy = 0.0
+        self.utilization = 0.0
+        self.factor = 1.0
+
+    def record(self, busy: float) -> None:
+        with self._lock:
+            self._busy += max(0.0, busy)
+            now = self._clock()
+            span = now - self._window_start
+            if span < self.window:
+                return
+            self.utilization = min(1.0, self._busy / span)
+            self._busy = 0.0
+            self._window_start = now
+            old = self.factor
+            if self.utilization > self.high:
+                self.factor = min(self.max_factor, self.factor * self.step)
+            elif self.utilization < self.low:
+                self.factor = max(1.0, self.factor / self.step)
+            factor, util = self.factor, self.utilization
+        if factor > old:
+            logger.warning("Device %s saturated (%.0f%% busy), stretching intervals x%.2f", self.name, util * 100, factor)
+        elif factor < old:
+            logger.info("Device %s recovering (%.0f%% busy), interval factor x%.2f", self.name, util * 100, factor)
+        STRETCH_FACTOR.labels(self.name).set(factor)
+        UTILIZATION.labels(self.name).set(util)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"utilization": round(self.utilization, 3), "factor": round(self.factor, 3)}
+
+
+_guards: "weakref.WeakKeyDictionary[Any, DeviceGuard]" = weakref.WeakKeyDictionary()
+_guards_lock = threading.Lock()
+
+
+def get_device_guard(client: Any, cfg: Optional[Dict[str, Any]] = None) -> DeviceGuard:
+    """Return the guard shared by all pollers using `client` (one connection = one device)."""
+    with _guards_lock:
+        guard = _guards.get(client)
+        if guard is None:
+            host = getattr(client, "host", None)
+            name = f"{host}:{getattr(client, 'port', '')}" if host else type(client).__name__
+            kwargs = {k: v for k, v in (cfg or {}).items()
+                      if k in ("window", "high", "low", "step", "max_factor")}
+            guard = DeviceGuard(name, **kwargs)
+            _guards[client] = guard
+        return guard
+
+
+# transaction classes competing for one device connection, most urgent first
+PRIORITIES = {"write": 0, "fast": 1, "slow": 2, "diagnostic": 3}
+# pollers at or below this interval (seconds) are "fast" unless configured otherwise
+FAST_POLL_INTERVAL = 5.0
+
+_current = threading.local()
+
+
+@contextmanager
+def transaction_priority(name: str) -> Iterator[None]:
+    """Run the Modbus transactions of this thread inside the block with priority class `name`."""
+    if name not in PRIORITIES:
+        raise ValueError(f"unknown priority class: {name}")
+    prev = getattr(_current, "name", None)
+    _current.name = name
+    try:
+        yield
+    finally:
+        _current.name = prev
+
+
+def current_priority() -> str:
+    """Priority class of the calling thread; unclassified traffic counts as diagnostics."""
+    return getattr(_current, "name", None) or "diagnostic"
+
+
+class _Waiter:
+    __slots__ = ("ident", "rank", "since", "seq", "event")
+
+    def __init__(self, ident: int, rank: int, seq: int):
+        self.ident = ident
+        self.rank = rank
+        self.since = time.monotonic()
+        self.seq = seq
+        self.event = threading.Event()
+
+
+class PriorityLock:
+    """Re-entrant lock granted by priority class instead of arrival order.
+
+    On release the lock goes to the waiter with the best rank, where a
+    waiter's rank improves by one class for every `aging` seconds it has
+    waited, so a steady stream of urgent requests cannot starve slow
+    pollers or diagnostics. Equal ranks are served first come, first
+    served. Used as a context manager it takes the calling thread's
+    `transaction_priority`.
+    """
+
+    def __init__(self, aging: float = 1.0):
+        self.aging = float(aging)
+        self._mutex = threading.Lock()
+        self._owner: Optional[int] = None
+        self._count = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = 0
+
+    def acquire(self, priority: Optional[str] = None) -> None:
+        me = threading.get_ident()
+        with self._mutex:
+            if self._owner == me:
+                self._count += 1
+                return
+            if self._owner is None:
+                self._owner = me
+                self._count = 1
+                return
+            self._seq += 1
+            w = _Waiter(me, PRIORITIES[priority or current_priority()], self._seq)
+            self._waiters.append(w)
+        # release() hands the lock over before setting the event
+        w.event.wait()
+
+    def release(self) -> None:
+        with self._mutex:
+            if self._owner != threading.get_ident():
+                raise RuntimeError("cannot release un-acquired lock")
+            self._count -= 1
+            if self._count:
+                return
+            if not self._waiters:
+                self._owner = None
+                return
+            now = time.monotonic()
+            aging = self.aging if self.aging > 0 else float("inf")
+            w = min(self._waiters, key=lambda x: (x.rank - (now - x.since) / aging, x.seq))
+            self._waiters.remove(w)
+            self._owner = w.ident
+            self._count = 1
+        w.event.set()
+
+    def waiting(self) -> int:
+        with self._mutex:
+            return len(self._waiters)
+
+    def __enter__(self) -> "PriorityLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.metrics import registry
+
+from .scheduling import transaction_priority
+
+logger = logging.getLogger(__name__)
+
+# registers per FC16 request
+MAX_WRITE_COUNT = 123
+
+WRITE_TRANSACTIONS = registry.counter("modbus_write_transactions_total", "Modbus write transactions sent", ("device", "result"))
+WRITES_COALESCED = registry.counter("modbus_writes_coalesced_total", "Register writes merged away (same register rewritten before sending)", ("device",))
+
+
+def coalesce(writes: Dict[int, int], max_count: int = MAX_WRITE_COUNT) -> List[Tuple[int, List[int]]]:
+    """Group {address: value} into (start address, values) runs of adjacent registers, at most `max_count` long."""
+    runs: List[Tuple[int, List[int]]] = []
+    for addr in sorted(writes):
+        if runs and addr == runs[-1][0] + len(runs[-1][1]) and len(runs[-1][1]) < max_count:
+            runs[-1][1].append(writes[addr])
+        else:
+            runs.append((addr, [writes[addr]]))
+    return runs
+
+
+class WriteTicket:
+    """Outcome of one submit(); `errors` maps register address -> error message."""
+
+    def __init__(self, addresses: List[int]):
+        self.addresses = addresses
+        self.errors: Dict[int, str] = {}
+        self._done = threading.Event()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def ok(self) -> bool:
+        return self.done and not self.errors
+
+
+class WriteQueue:
+    """Pending register writes for one client, sent by a worker thread.
+
+    Writes submitted while the worker is busy accumulate: a register written
+    again before it was sent keeps only its last value, and adjacent
+    registers go out together as FC16 requests of up to MAX_WRITE_COUNT
+    registers (a lone register uses FC6). Writes run in the "write" priority
+    class, and pollers of the client hold back their reads while writes are
+    pending (see `wait_writes`).
+    """
+
+    def __init__(self, client: Any, unit_id: Optional[int] = None):
+        self._client = weakref.ref(client)
+        self.unit_id = unit_id
+        self.device = f"{getattr(client, 'host', '?')}:{getattr(client, 'port', '?')}"
+        self._cond = threading.Condition()
+        self._pending: Dict[int, int] = {}
+        self._tickets: List[WriteTicket] = []
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self.transactions = 0
+        self.coalesced = 0
+
+    def submit(self, writes: Dict[int, int]) -> WriteTicket:
+        ticket = WriteTicket(sorted(writes))
+        if not writes:
+            # nothing for the worker to send, and so nothing would ever finish the ticket
+            ticket._done.set()
+            return ticket
+        with self._cond:
+            overwritten = sum(1 for a in writes if a in self._pending)
+            if overwritten:
+                self.coalesced += overwritten
+                WRITES_COALESCED.labels(self.device).inc(overwritten)
+            self._pending.update(writes)
+            self._tickets.append(ticket)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name=f"modbus-write-{self.device}", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return ticket
+
+    def busy(self) -> bool:
+        return self._busy or bool(self._pending)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is pending or being written; False on timeout."""
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._busy or self._pending:
+                left = None if end is None else end - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                if not self._pending:
+                    # exit when idle; submit() starts a new worker
+                    self._thread = None
+                    return
+                pending, self._pending = self._pending, {}
+                tickets, self._tickets = self._tickets, []
+                self._busy = True
+            with transaction_priority("write"):
+                errors = self._flush(pending)
+            for t in tickets:
+                t.errors = {a: errors[a] for a in t.addresses if a in errors}
+                t._done.set()
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _flush(self, pending: Dict[int, int]) -> Dict[int, str]:
+        errors: Dict[int, str] = {}
+        client = self._client()
+        for start, values in coalesce(pending):
+            try:
+                if client is None:
+                    raise ConnectionError("client is closed")
+                if len(values) == 1:
+                    client.write_single_register(start, values[0], unit_id=self.unit_id)
+                else:
+                    client.write_multiple_registers(start, values, unit_id=self.unit_id)
+            except Exception as e:
+                WRITE_TRANSACTIONS.labels(self.device, "error").inc()
+                logger.warning("Modbus write %s@%d (%d registers) failed: %s", self.device, start, len(values), e)
+                for i in range(len(values)):
+                    errors[start + i] = str(e)
+                continue
+            finally:
+                self.transactions += 1
+            WRITE_TRANSACTIONS.labels(self.device, "ok").inc()
+            for fn in list(_listeners):
+                try:
+                    fn(client, start, values)
+                except Exception:
+                    logger.exception("Write listener failed")
+        return errors
+
+
+_queues: "weakref.WeakKeyDictionary[Any, WriteQueue]" = weakref.WeakKeyDictionary()
+_queues_lock = threading.Lock()
+# fn(client, start address, values) after every successful write transaction
+_listeners: List[Callable[[Any, int, List[int]], None]] = []
+
+
+def get_write_queue(client: Any) -> WriteQueue:
+    with _queues_lock:
+        q = _queues.get(client)
+        if q is None:
+            q = _queues[client] = WriteQueue(client)
+        return q
+
+
+def wait_writes(client: Any, timeout: float) -> bool:
+    """Let queued writes for `client` go first; False if they were still running after `timeout`."""
+    q = _queues.get(client)
+    if q is None or not q.busy():
+        return True
+    return q.wait_idle(timeout)
+
+
+def add_write_listener(fn: Callable[[Any, int, List[int]], None]) -> None:
+    if fn not in _listeners:
+        _listeners.append(fn)
@@ -27,7 +27,7 @@ import argparse
 import json
 from typing import Dict
 
-from app.modules.sw.modbus import ModbusManager, Poller
+from app.modules.sw.modbus import ModbusManager, Poller, stop_pollers
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 logger = logging.getLogger("run_polling_example")
 
@@ -76,10 +76,7 @@ def main():
     except KeyboardInterrupt:
         logger.info("Interrupted by user")
     finally:
-        for p in (p1, p2):
-            p.stop()
-            p.join(timeout=1.0)
-        manager.close_all()
+        stop_pollers((p1, p2), manager)
         logger.info("Stopped")
 
 
@@ -198,10 +195,7 @@ def main():
     except KeyboardInterrupt:
         logger.info("Interrupted by user")
     finally:
-        for p in pollers:
-            p.stop()
-            p.join(timeout=1.0)
-        manager.close_all()
+        stop_pollers(pollers, manager)
         logger.info("Stopped")
 
 
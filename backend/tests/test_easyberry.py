@@ -70,3 +70,35 @@ def test_update_from_poll_result(tmp_path):
     assert cnt == 2
     assert database.get_thing_by_mbid("1001")[1]["value"] == 10
     assert database.get_thing_by_mbid("1002")[1]["value"] == 20
+
+
+def test_reload_keeps_live_values_of_unchanged_things():
+    from app.modules.sw.easyberry.store import Database
+
+    cfg = {"pollers": [{"id": "p1", "things": [
+        {"mbid": str(i), "name": f"T{i}", "value": 0, "register_index": i} for i in range(3)
+    ]}]}
+    db = Database()
+    db.load_from_dict(json.loads(json.dumps(cfg)))
+    db.update_from_poll_result("p1", [10, 11, 12])
+    kept = db.get_thing_by_mbid("0")[1]
+
+    new_cfg = json.loads(json.dumps(cfg))
+    new_cfg["pollers"][0]["things"][1]["deadband"] = 1          # changed config
+    new_cfg["pollers"][0]["things"][2]["mbid"] = "20"            # renumbered, same name
+    new_cfg["pollers"][0]["things"].append({"mbid": "3", "name": "T3", "value": 0})
+    before = db.mbid_index
+    counts = db.load_from_dict(new_cfg)
+
+    # the index is swapped, never mutated under a concurrent reader
+    assert db.mbid_index is not before and sorted(before) == ["0", "1", "2"]
+
+    assert counts == {"kept": 1, "changed": 2, "added": 1, "removed": 1}
+    assert db.get_thing_by_mbid("0")[1] is kept
+    assert kept["value"] == 10
+    changed = db.get_thing_by_mbid("1")[1]
+    assert changed["value"] == 11 and changed["deadband"] == 1
+    assert db.get_thing_by_mbid("20")[1]["value"] == 12
+    assert db.get_thing_by_mbid("2") is None
+    assert db.get_thing_by_mbid("3")[1]["value"] == 0
+    assert "updated_at" not in db.get_thing_by_mbid("3")[1]
@@ -26,3 +26,147 @@ def test_build_payload_from_database(tmp_path):
     payload = eb_conn.build_payload_from_database(DummyDB())
     assert payload["op"] == "put"
     assert payload["things"]["T1"]["value"] == "1"
+
+
+def test_uploader_queue_mode_sends_changed_things(tmp_path, monkeypatch):
+    import threading
+    import httpx
+    from app.modules.sw.easyberry.store import Database
+
+    cfg = {
+        "settings": {"url": "http://testserver", "username": "u", "password": "p", "context": "put", "token": "t"},
+        "duration": 60,
+        "queue": {"enabled": True, "batch_size": 10, "batch_interval": 0.05},
+    }
+    p = tmp_path / "cfg.json"
+    p.write_text(json.dumps(cfg))
+    db = Database()
+    db.load_from_dict({"pollers": [{"id": "p1", "things": [
+        {"mbid": "1", "name": "A", "register_index": 0},
+        {"mbid": "2", "name": "B", "register_index": 1},
+    ]}]})
+
+    sent = []
+    stop = threading.Event()
+
+    def handler(request: httpx.Request):
+        sent.append(json.loads(request.content.decode())["things"])
+        if len(sent) == 2:
+            stop.set()
+        return httpx.Response(200, content="ok")
+
+    mt = httpx.MockTransport(handler)
+    original_client = httpx.Client
+    monkeypatch.setattr(httpx, "Client", lambda *a, **k: original_client(transport=mt, **k))
+
+    uploader = eb_conn.Uploader(str(p), db)
+    uploader.open()
+    try:
+        t = threading.Thread(target=uploader.run, args=(stop,), daemon=True)
+        t.start()
+        db.update_thing_value_by_mbid("1", 7)
+        t.join(5)
+    finally:
+        uploader.close()
+    # first upload is the full snapshot, the second only carries the change
+    assert set(sent[0]) == {"A", "B"}
+    assert sent[1] == {"A": {"value": "7"}}
+
+
+def test_chunked_send_retries_only_failed_chunks(tmp_path, monkeypatch):
+    import threading
+    import httpx
+
+    cfg = {
+        "settings": {"url": "http://testserver", "username": "u", "password": "p", "context": "put", "token": "t"},
+        "chunking": {"chunk_size": 2, "max_parallel": 3, "retries": 1},
+    }
+    p = tmp_path / "cfg.json"
+    p.write_text(json.dumps(cfg))
+
+    seen = []
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request):
+        names = sorted(json.loads(request.content.decode())["things"])
+        with lock:
+            seen.append(names)
+            first_try = seen.count(names) == 1
+        if names == ["T3", "T4"] and first_try:
+            return httpx.Response(503)
+        return httpx.Response(200, content="ok")
+
+    mt = httpx.MockTransport(handler)
+    original_client = httpx.Client
+    monkeypatch.setattr(httpx, "Client", lambda *a, **k: original_client(transport=mt, **k))
+
+    payload = {"op": "put", "things": {f"T{i}": {"value": str(i)} for i in range(1, 6)}}
+    status, body = eb_conn.send_payload(str(p), payload)
+    assert status == 200
+    assert json.loads(body) == {"chunks": 3, "ok": 3, "failed": []}
+    assert len(seen) == 4
+    assert seen.count(["T3", "T4"]) == 2
+
+
+def test_targets_override_settings_and_filter_things(tmp_path, monkeypatch):
+    import httpx
+    from app.modules.sw.easyberry.config import target_config, target_names
+
+    cfg = {
+        "settings": {"url": "http://prod", "username": "u", "password": "p", "context": "put", "token": "t"},
+        "targets": [
+            {"name": "prod"},
+            {"name": "analytics", "settings": {"url": "http://analytics", "token": "t2"}, "things": ["T2"]},
+        ],
+    }
+    p = tmp_path / "cfg.json"
+    p.write_text(json.dumps(cfg))
+    assert target_names(cfg) == ["prod", "analytics"]
+    eff = target_config(cfg, "analytics")
+    assert eff["settings"]["url"] == "http://analytics"
+    assert eff["settings"]["username"] == "u"
+
+    seen = {}
+
+    def handler(request: httpx.Request):
+        seen[request.url.host] = (request.headers.get("Authorization"), json.loads(request.content.decode())["things"])
+        return httpx.Response(200, content="ok")
+
+    mt = httpx.MockTransport(handler)
+    original_client = httpx.Client
+    monkeypatch.setattr(httpx, "Client", lambda *a, **k: original_client(transport=mt, **k))
+
+    class DummyDB:
+        def get_pollers(self):
+            return [{"things": [{"name": "T1", "value": 1}, {"name": "T2", "value": 2}]}]
+
+    eb_conn.send_once(str(p), DummyDB(), target="prod")
+    eb_conn.send_once(str(p), DummyDB(), target="analytics")
+    assert seen["prod"] == ("Bearer t", {"T1": {"value": "1"}, "T2": {"value": "2"}})
+    assert seen["analytics"] == ("Bearer t2", {"T2": {"value": "2"}})
+
+
+def test_shared_clients_use_configured_timeout(tmp_path, monkeypatch):
+    import httpx
+    from app.modules.sw.easyberry.outbox import Outbox
+
+    p = tmp_path / "cfg.json"
+    p.write_text(json.dumps({
+        "settings": {"url": "http://x", "context": "put", "token": "t", "timeout": 2.5},
+        "chunking": {"chunk_size": 1},
+    }))
+    timeouts = []
+    mt = httpx.MockTransport(lambda request: httpx.Response(200, content="ok"))
+    original_client = httpx.Client
+
+    def client(*a, **k):
+        timeouts.append(k.get("timeout"))
+        return original_client(transport=mt, **k)
+
+    monkeypatch.setattr(httpx, "Client", client)
+    assert eb_conn.send_payload(str(p), {"op": "put", "things": {"A": {}, "B": {}}})[0] == 200
+    ob = Outbox(str(tmp_path / "outbox.db"))
+    ob.append({"op": "put", "things": {"A": {"value": "1"}}})
+    assert eb_conn.drain_outbox(str(p), ob) == 1
+    ob.close()
+    assert timeouts and all(t == 2.5 for t in timeouts)
@@ -0,0 +1,68 @@
+from app.modules.sw.easyberry.cov import CovBus, exceeds_deadband
+from app.modules.sw.easyberry.store import Database
+
+
+def make_db():
+    db = Database()
+    db.load_from_dict({"pollers": [{"id": "p1", "things": [
+        {"mbid": "1", "name": "temp", "register_index": 0, "deadband": 0.5},
+        {"mbid": "2", "name": "flow", "register_index": 1, "deadband_pct": 10},
+        {"mbid": "3", "name": "state", "register_index": 2},
+    ]}]})
+    return db
+
+
+def test_deadband_rules():
+    assert exceeds_deadband(None, 1)
+    assert not exceeds_deadband(10, 10.4, deadband=0.5)
+    assert exceeds_deadband(10, 10.6, deadband=0.5)
+    assert not exceeds_deadband(100, 109, deadband_pct=10)
+    assert exceeds_deadband(100, 111, deadband_pct=10)
+    assert exceeds_deadband("on", "off")
+    assert not exceeds_deadband(5, 5)
+
+
+def test_bus_publishes_only_significant_changes():
+    db = make_db()
+    bus = CovBus(db)
+    sub = bus.subscribe("test")
+    db.update_from_poll_result("p1", [20, 100, 1])
+    first = sub.get(timeout=0.1)
+    assert {c["name"] for c in first["changes"]} == {"temp", "flow", "state"}
+
+    db.update_from_poll_result("p1", [20.2, 105, 1])   # all within deadband / unchanged
+    assert sub.get(timeout=0.05) is None
+
+    db.update_from_poll_result("p1", [21, 105, 0])
+    batch = sub.get(timeout=0.1)
+    changes = {c["name"]: c for c in batch["changes"]}
+    assert set(changes) == {"temp", "state"}
+    assert changes["temp"]["prev"] == 20 and changes["temp"]["value"] == 21
+    sub.close()
+    assert bus.publish not in db._listeners
+
+
+def test_full_queue_drops_oldest_batch():
+    db = make_db()
+    bus = CovBus(db)
+    sub = bus.subscribe("slow", max_batches=2)
+    for v in range(4):
+        db.update_from_poll_result("p1", [v, 0, 0])
+    assert sub.stats()["dropped"] == 2
+    assert sub.get(timeout=0.1)["changes"][0]["value"] == 2
+
+
+def test_sse_stream_delivers_batches_and_unsubscribes():
+    import json
+    from app.api.v1.easyberry import _change_stream
+
+    db = make_db()
+    bus = CovBus(db)
+    stream = _change_stream(bus.subscribe("sse-test"), keepalive=0.05)
+    assert next(stream) == ": keepalive\n\n"
+    db.update_from_poll_result("p1", [20, 100, 1])
+    event = next(stream)
+    assert event.startswith("data: ")
+    assert {c["name"] for c in json.loads(event[6:])["changes"]} == {"temp", "flow", "state"}
+    stream.close()
+    assert bus.publish not in db._listeners
@@ -0,0 +1,90 @@
+import time
+
+from app.modules.sw.easyberry.historian import Historian
+from app.modules.sw.easyberry.store import Database
+
+
+def test_record_flush_and_query(tmp_path):
+    h = Historian(str(tmp_path / "hist.db"), flush_interval=60)
+    h.start()
+    try:
+        now = time.time()
+        h.record("p1", [{"mbid": "1", "name": "T1", "value": 10, "ts": now - 2}])
+        h.record("p1", [{"mbid": "1", "name": "T1", "value": 11, "ts": now - 1},
+                        {"mbid": "2", "name": None, "value": 5, "ts": now - 1}])
+        assert h.flush() == 3
+        assert [s["value"] for s in h.query("T1")] == [10, 11]
+        assert [s["value"] for s in h.query("T1", start=now - 1.5)] == [11]
+        # things without a name are keyed by mbid
+        assert h.query("2")[0]["value"] == 5
+    finally:
+        h.stop()
+
+
+def test_retention_compaction(tmp_path):
+    h = Historian(str(tmp_path / "hist.db"), flush_interval=60, retention_seconds=3600)
+    h.start()
+    try:
+        now = time.time()
+        h.record(None, [{"name": "T1", "value": 1, "ts": now - 7200},
+                        {"name": "T1", "value": 2, "ts": now}])
+        h.flush()
+        assert h.compact() == 1
+        assert [s["value"] for s in h.query("T1")] == [2]
+    finally:
+        h.stop()
+
+
+def test_database_listener_feeds_historian(tmp_path):
+    db = Database()
+    db.load_from_dict({"pollers": [{"id": "p1", "things": [{"mbid": "1001", "name": "A", "register_index": 0}]}]})
+    h = Historian(str(tmp_path / "hist.db"), flush_interval=60)
+    h.start()
+    db.add_listener(h.record)
+    try:
+        db.update_from_poll_result("p1", [42])
+        h.flush()
+        assert h.query("A")[0]["value"] == 42
+    finally:
+        h.stop()
+
+
+def test_compaction_gives_space_back(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "hist.db")
+    # a file created before incremental auto-vacuum was set up is converted on start
+    legacy = sqlite3.connect(path)
+    legacy.execute("PRAGMA journal_mode=WAL")
+    legacy.execute("CREATE TABLE samples (thing TEXT NOT NULL, ts REAL NOT NULL, value)")
+    legacy.close()
+
+    h = Historian(path, flush_interval=60, retention_seconds=3600)
+    h.start()
+    try:
+        old = time.time() - 7200
+        h.record(None, [{"name": f"T{i}", "value": "x" * 200, "ts": old} for i in range(5000)])
+        h.flush()
+        c = sqlite3.connect(path)
+        assert c.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        c.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        c.close()
+        before = h._db_bytes()
+        assert h.compact() == 5000
+        assert h._db_bytes() < before / 4
+    finally:
+        h.stop()
+
+
+def test_size_budget_counts_the_wal(tmp_path):
+    h = Historian(str(tmp_path / "hist.db"), flush_interval=60, retention_seconds=None, max_bytes=200 * 1024)
+    h.start()
+    try:
+        now = time.time()
+        h.record(None, [{"name": "T", "value": "x" * 200, "ts": now - 5000 + i} for i in range(5000)])
+        h.flush()
+        assert h.compact() > 0
+        assert h._db_bytes() <= 200 * 1024
+        assert h.query("T", limit=10000)[-1]["ts"] == now - 1
+    finally:
+        h.stop()
@@ -0,0 +1,87 @@
+import json
+
+import httpx
+
+from app.modules.sw.easyberry import connector
+from app.modules.sw.easyberry.outbox import Outbox
+
+
+def _write_cfg(tmp_path):
+    cfg_path = tmp_path / "cfg.json"
+    cfg = {"settings": {"url": "http://testserver", "username": "u", "password": "p", "context": "put", "token": "t"}}
+    cfg_path.write_text(json.dumps(cfg))
+    return str(cfg_path)
+
+
+def test_outbox_persists_in_order_and_limits_backlog(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    ob = Outbox(path, max_entries=2)
+    ob.append({"n": 1})
+    ob.append({"n": 2})
+    ob.append({"n": 3})
+    ob.close()
+    # reopen: entries survive and the oldest one was dropped by the backlog limit
+    ob = Outbox(path, max_entries=2)
+    assert [p["n"] for _, p in ob.peek()] == [2, 3]
+    ob.close()
+
+
+def test_drain_replays_in_order_and_stops_on_failure(tmp_path, monkeypatch):
+    cfg_path = _write_cfg(tmp_path)
+    received = []
+    state = {"up": False}
+
+    def handler(request: httpx.Request):
+        if not state["up"]:
+            return httpx.Response(503)
+        received.append(json.loads(request.content.decode())["n"])
+        return httpx.Response(200, content="ok")
+
+    mt = httpx.MockTransport(handler)
+    original_client = httpx.Client
+    monkeypatch.setattr(connector.httpx, "Client", lambda *a, **k: original_client(transport=mt, **k))
+
+    ob = Outbox(str(tmp_path / "outbox.db"))
+    for n in range(3):
+        ob.append({"op": "put", "n": n})
+    assert connector.drain_outbox(cfg_path, ob) == 0
+    assert ob.depth() == 3
+
+    state["up"] = True
+    assert connector.drain_outbox(cfg_path, ob, batch_size=2) == 3
+    assert received == [0, 1, 2]
+    assert ob.depth() == 0
+    ob.close()
+
+
+def test_drain_merges_pending_puts_into_one_upload(tmp_path, monkeypatch):
+    cfg_path = _write_cfg(tmp_path)
+    bodies = []
+
+    def handler(request: httpx.Request):
+        body = json.loads(request.content.decode())
+        bodies.append(body)
+        # a merge containing the bad thing is refused; alone, only the bad entry is
+        return httpx.Response(400 if "BAD" in body["things"] else 200, content="ok")
+
+    mt = httpx.MockTransport(handler)
+    original_client = httpx.Client
+    monkeypatch.setattr(connector.httpx, "Client", lambda *a, **k: original_client(transport=mt, **k))
+
+    ob = Outbox(str(tmp_path / "outbox.db"))
+    ob.append({"op": "put", "things": {"A": {"value": "1"}, "B": {"value": "1"}}})
+    ob.append({"op": "put", "things": {"A": {"value": "2"}}})
+    ob.append({"op": "put", "things": {"C": {"value": "3"}}})
+    assert connector.drain_outbox(cfg_path, ob) == 3
+    # one request, later values win
+    assert bodies == [{"op": "put", "things": {"A": {"value": "2"}, "B": {"value": "1"}, "C": {"value": "3"}}}]
+    assert ob.depth() == 0
+
+    bodies.clear()
+    ob.append({"op": "put", "things": {"A": {"value": "4"}}})
+    ob.append({"op": "put", "things": {"BAD": {"value": "x"}}})
+    assert connector.drain_outbox(cfg_path, ob) == 1
+    # the refused merge was resent entry by entry and only the bad entry discarded
+    assert len(bodies) == 3
+    assert ob.depth() == 0
+    ob.close()
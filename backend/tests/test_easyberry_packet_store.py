@@ -0,0 +1,34 @@
+from app.modules.sw.easyberry.packet_store import EasyberryPacketStore
+
+
+def test_byte_budget_evicts_oldest():
+    store = EasyberryPacketStore(maxlen=100, max_bytes=4000, body_limit=0)
+    for i in range(10):
+        store.add("http://x", "a" * 1000, "ok", status=200)
+    stats = store.stats()
+    assert stats["bytes"] <= 4000
+    items = store.get_last(limit=100)
+    assert 0 < len(items) < 10
+    # ids are monotonically increasing and the newest entries survive
+    ids = [it["id"] for it in items]
+    assert ids == sorted(ids) and ids[-1] == 10
+
+
+def test_truncation_and_compression_roundtrip():
+    store = EasyberryPacketStore(body_limit=12, compress=True)
+    store.add("http://x", "0123456789abcdefgh", '{"ok":true}', status=200)
+    it = store.get_last(limit=1)[0]
+    assert it["request"].startswith("0123456789ab... [truncated 6 chars]")
+    assert it["response"] == '{"ok":true}'
+    assert "_size" not in it
+
+
+def test_headers_only_kept_in_debug_mode():
+    store = EasyberryPacketStore()
+    store.add("http://x", "{}", "{}", request_headers={"a": "b"}, response_headers={"c": "d"})
+    assert store.get_last(limit=1)[0]["request_headers"] is None
+    debug = EasyberryPacketStore(capture_headers=True)
+    debug.add("http://x", "{}", "{}", request_headers={"a": "b"}, content_type="application/json")
+    it = debug.get_last(limit=1)[0]
+    assert it["request_headers"] == {"a": "b"}
+    assert it["content_type"] == "application/json"
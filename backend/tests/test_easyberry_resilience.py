@@ -0,0 +1,104 @@
+import json
+
+import httpx
+import pytest
+
+from app.modules.sw.easyberry import transport
+from app.modules.sw.easyberry.resilience import (
+    CircuitBreaker, CircuitOpenError, RetryPolicy, parse_retry_after,
+)
+
+
+def _write_cfg(tmp_path, **sections):
+    cfg_path = tmp_path / "cfg.json"
+    cfg = {"settings": {"url": "http://testserver/api", "context": "v1/put", "token": "t"}}
+    cfg.update(sections)
+    cfg_path.write_text(json.dumps(cfg))
+    return str(cfg_path)
+
+
+def _client(handler):
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def test_retry_after_and_backoff_bounds():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("garbage") is None
+    p = RetryPolicy(base_delay=1.0, max_delay=4.0)
+    for attempt in range(1, 6):
+        assert 0.0 <= p.delay(attempt) <= min(4.0, 2 ** (attempt - 1))
+    assert p.delay(1, retry_after=100) == 4.0
+
+
+def test_send_put_retries_transient_status(tmp_path):
+    path = _write_cfg(tmp_path, retry={"max_attempts": 3, "base_delay": 0})
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(503 if len(calls) < 3 else 200, content="ok")
+
+    status, _ = transport.send_put(path, {"op": "put", "things": {}}, client=_client(handler))
+    assert status == 200
+    assert len(calls) == 3
+
+
+def test_send_put_does_not_retry_client_errors(tmp_path):
+    path = _write_cfg(tmp_path, retry={"max_attempts": 3, "base_delay": 0})
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(400)
+
+    status, _ = transport.send_put(path, {"op": "put", "things": {}}, client=_client(handler))
+    assert status == 400
+    assert len(calls) == 1
+
+
+def test_circuit_opens_and_fails_fast(tmp_path):
+    path = _write_cfg(tmp_path, retry={"max_attempts": 1},
+                      circuit_breaker={"failure_threshold": 2, "reset_timeout": 60})
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        raise httpx.ConnectError("down")
+
+    client = _client(handler)
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            transport.send_put(path, {"op": "put", "things": {}}, client=client)
+    with pytest.raises(CircuitOpenError):
+        transport.send_put(path, {"op": "put", "things": {}}, client=client)
+    assert len(calls) == 2
+
+
+def test_half_open_probe_closes_circuit():
+    br = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    br.record_failure()
+    assert br.state == "open"
+    assert br.allow()        # probe
+    assert not br.allow()    # only one probe in flight
+    br.record_success()
+    assert br.state == "closed"
+
+
+def test_stop_event_cuts_retry_backoff_short(tmp_path):
+    import threading
+    import time
+
+    path = _write_cfg(tmp_path, retry={"max_attempts": 5, "base_delay": 30, "max_delay": 30})
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(503, headers={"retry-after": "30"})
+
+    stop = threading.Event()
+    threading.Timer(0.1, stop.set).start()
+    t0 = time.monotonic()
+    status, _ = transport.send_put(path, {"op": "put", "things": {}}, client=_client(handler), stop_event=stop)
+    assert status == 503
+    assert len(calls) == 1
+    assert time.monotonic() - t0 < 5
@@ -0,0 +1,34 @@
+import threading
+import time
+
+from app.modules.sw.easyberry.scheduler import UploadScheduler
+
+
+def test_change_triggers_send_after_min_interval():
+    s = UploadScheduler(min_interval=0.05, max_interval=None, flush_on_poll=True)
+    s.mark_sent()
+    s.notify("p1", [{"mbid": "1"}])
+    t0 = time.monotonic()
+    assert s.wait()
+    assert time.monotonic() - t0 >= 0.04
+
+
+def test_heartbeat_without_changes():
+    s = UploadScheduler(min_interval=0.0, max_interval=0.05)
+    s.mark_sent()
+    t0 = time.monotonic()
+    assert s.wait()
+    assert time.monotonic() - t0 >= 0.04
+
+
+def test_stop_event_interrupts_wait():
+    s = UploadScheduler(min_interval=0.0, max_interval=None)
+    ev = threading.Event()
+    threading.Timer(0.05, ev.set).start()
+    assert s.wait(ev, poll=0.01) is False
+
+
+def test_from_config_absent_keeps_fixed_loop():
+    assert UploadScheduler.from_config({"duration": 20}) is None
+    s = UploadScheduler.from_config({"duration": 20, "upload": {"min_interval": 2}})
+    assert s.min_interval == 2.0 and s.max_interval == 20.0
@@ -0,0 +1,59 @@
+import json
+import threading
+import time
+
+import jwt
+
+from app.modules.sw.easyberry import token_manager
+from app.modules.sw.easyberry.token_manager import TokenManager
+
+
+def _make_jwt(exp):
+    return jwt.encode({"sub": "u", "exp": int(exp)}, "secret-key-for-tests-only-0123456789", algorithm="HS256")
+
+
+def _write_cfg(tmp_path, token):
+    p = tmp_path / "cfg.json"
+    p.write_text(json.dumps({"settings": {"url": "http://x", "username": "u", "password": "p", "token": token}}))
+    return str(p)
+
+
+def test_valid_token_is_served_from_memory(tmp_path, monkeypatch):
+    tok = _make_jwt(time.time() + 3600)
+    calls = []
+    monkeypatch.setattr(token_manager, "request_token", lambda path, target=None: calls.append(path) or "new")
+    tm = TokenManager(_write_cfg(tmp_path, tok))
+    assert tm.get_token() == tok
+    assert calls == []
+
+
+def test_expiring_token_refreshes_single_flight(tmp_path, monkeypatch):
+    fresh = _make_jwt(time.time() + 3600)
+    calls = []
+
+    def fake_request(path, target=None):
+        calls.append(path)
+        time.sleep(0.05)
+        return fresh
+
+    monkeypatch.setattr(token_manager, "request_token", fake_request)
+    tm = TokenManager(_write_cfg(tmp_path, _make_jwt(time.time() + 10)), refresh_margin=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tm.get_token())) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [fresh] * 5
+    assert len(calls) == 1
+
+
+def test_background_refresh_survives_an_overlapping_stop(tmp_path):
+    # a restarted uploader starts before the previous one closes: the late stop must not kill the thread
+    tm = TokenManager(_write_cfg(tmp_path, _make_jwt(time.time() + 3600)))
+    tm.start()
+    tm.start()
+    tm.stop()
+    assert tm._thread is not None and tm._thread.is_alive()
+    tm.stop()
+    assert tm._thread is None
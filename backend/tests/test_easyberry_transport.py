@@ -37,3 +37,34 @@ def test_send_put_uses_token_and_endpoint(tmp_path, monkeypatch):
     status, body = transport.send_put(str(cfg_path), payload)
     assert status == 200
     assert "ok" in body
+
+
+def test_send_put_gzip_compact(tmp_path, monkeypatch):
+    import gzip
+
+    cfg_path = tmp_path / "cfg.json"
+    cfg = {
+        "settings": {
+            "url": "http://testserver",
+            "username": "u",
+            "password": "p",
+            "context": "put",
+            "encoding": "json-compact",
+            "compression": "gzip",
+        }
+    }
+    cfg_path.write_text(json.dumps(cfg))
+
+    def handler(request: httpx.Request):
+        assert request.headers.get("Content-Encoding") == "gzip"
+        raw = gzip.decompress(request.content)
+        assert b" " not in raw
+        assert json.loads(raw)["things"]["T"]["value"] == "1"
+        return httpx.Response(200, content="ok")
+
+    mt = httpx.MockTransport(handler)
+    original_client = transport.httpx.Client
+    monkeypatch.setattr(transport.httpx, "Client", lambda *a, **k: original_client(transport=mt, **k))
+
+    status, _ = transport.send_put(str(cfg_path), {"op": "put", "things": {"T": {"value": "1"}}})
+    assert status == 200
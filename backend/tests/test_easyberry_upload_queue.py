@@ -0,0 +1,52 @@
+from app.modules.sw.easyberry.upload_queue import UploadQueue, payload_from_batch
+
+
+def _change(name, value):
+    return {"mbid": name, "name": name, "value": value, "ts": 1.0}
+
+
+def test_size_triggered_batch_merges_latest_value():
+    q = UploadQueue(batch_size=2, batch_interval=60)
+    q.offer("p1", [_change("A", 1)])
+    q.offer("p1", [_change("A", 2), _change("B", 3)])
+    batch = q.get_batch(timeout=1)
+    assert {k: v[0] for k, v in batch.items()} == {"A": 2, "B": 3}
+    assert payload_from_batch(batch)["things"]["A"] == {"value": "2"}
+    assert q.stats()["depth"] == 0
+
+
+def test_time_triggered_batch_and_timeout():
+    q = UploadQueue(batch_size=100, batch_interval=0.05)
+    assert q.get_batch(timeout=0.05) == {}
+    q.offer("p1", [_change("A", 1)])
+    assert list(q.get_batch(timeout=1)) == ["A"]
+
+
+def test_full_queue_policies():
+    q = UploadQueue(max_batches=1, policy="merge")
+    q.offer("p1", [_change("A", 1)])
+    q.offer("p1", [_change("A", 5), _change("B", 2)])
+    st = q.stats()
+    assert st["depth"] == 1 and st["merged"] == 1 and st["pending_things"] == 2
+
+    q = UploadQueue(max_batches=1, policy="drop_newest")
+    q.offer("p1", [_change("A", 1)])
+    q.offer("p1", [_change("A", 5)])
+    assert q.stats()["dropped"] == 1
+    assert q.get_batch(timeout=2)["A"][0] == 1
+
+
+def test_queue_state_is_exported_as_metrics():
+    from app.core.metrics import registry
+
+    q = UploadQueue(max_batches=1, policy="drop_newest", name="metrics-test")
+    q.offer("p1", [_change("A", 1), _change("B", 2)])
+    q.offer("p1", [_change("C", 3)])
+    text = registry.render()
+    assert 'easyberry_upload_queue_depth{target="metrics-test"} 1' in text
+    assert 'easyberry_upload_queue_pending_things{target="metrics-test"} 2' in text
+    assert 'easyberry_upload_queue_dropped_total{target="metrics-test"} 1' in text
+    q.get_batch(timeout=2)
+    text = registry.render()
+    assert 'easyberry_upload_queue_depth{target="metrics-test"} 0' in text
+    assert 'easyberry_upload_queue_oldest_timestamp_seconds{target="metrics-test"} 0' in text
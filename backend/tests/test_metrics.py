@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+
+from app.core.metrics import Registry
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_registry_renders_prometheus_text():
+    reg = Registry()
+    c = reg.counter("things_total", "Things seen", ("poller",))
+    g = reg.gauge("lag_seconds", "Lag")
+    h = reg.histogram("rtt_seconds", "RTT", ("device",), buckets=(0.01, 0.1))
+    c.labels("1-a").inc()
+    c.labels("1-a").inc(2)
+    g.set(0.5)
+    for v in (0.005, 0.05, 5.0):
+        h.labels('h"1').observe(v)
+    text = reg.render()
+    assert "# TYPE things_total counter" in text
+    assert 'things_total{poller="1-a"} 3' in text
+    assert "lag_seconds 0.5" in text
+    assert 'rtt_seconds_bucket{device="h\\"1",le="0.01"} 1' in text
+    assert 'rtt_seconds_bucket{device="h\\"1",le="0.1"} 2' in text
+    assert 'rtt_seconds_bucket{device="h\\"1",le="+Inf"} 3' in text
+    assert 'rtt_seconds_count{device="h\\"1"} 3' in text
+
+
+def test_registry_returns_existing_metric():
+    reg = Registry()
+    assert reg.counter("x_total", "x") is reg.counter("x_total", "x")
+
+
+def test_metrics_endpoint():
+    r = client.get("/api/v1/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert "# TYPE modbus_request_seconds histogram" in r.text
@@ -1,6 +1,7 @@
 import struct
 import socket
 from app.modules.sw.modbus import TcpModbusClient
+from app.modules.sw.modbus.connect import Connector
 
 
 class FakeSocket:
@@ -58,3 +59,162 @@ def test_read_holding_registers_monkeypatch(monkeypatch):
     client.connect()
     regs = client.read_holding_registers(address=0, count=3)
     assert regs == [1, 2, 3]
+
+
+def test_rtt_estimator_bounds_and_backoff():
+    from app.modules.sw.modbus.modbus_tcp_client import RttEstimator
+
+    est = RttEstimator(initial=3.0, floor=0.2, ceiling=3.0)
+    assert est.timeout() == 3.0
+    for _ in range(20):
+        est.observe(0.01)
+    # fast device: clamped to the floor instead of waiting the full 3 s
+    assert est.timeout() == 0.2
+    est.on_timeout()
+    est.on_timeout()
+    assert abs(est.timeout() - 0.8) < 1e-9
+    est.observe(0.01)
+    assert est.timeout() == 0.2
+
+    slow = RttEstimator(initial=1.0, floor=0.2, ceiling=10.0)
+    for rtt in (2.0, 2.5, 1.8, 2.2):
+        slow.observe(rtt)
+    assert 2.0 < slow.timeout() <= 10.0
+
+
+class DripSocket(FakeSocket):
+    """Returns one byte per recv after a delay, so only the transaction deadline ends the read."""
+
+    def recv(self, n: int) -> bytes:
+        import time
+        time.sleep(0.05)
+        return super().recv(1)
+
+
+def test_transaction_deadline_spans_chunked_reads(monkeypatch):
+    import socket as _socket
+    import time
+    import pytest
+
+    monkeypatch.setattr(_socket, "socket", lambda *a, **k: DripSocket())
+    client = TcpModbusClient(host="127.0.0.1", port=502, timeout=0.3, unit_id=1, retries=1, min_timeout=0.1)
+    client.connect()
+    t0 = time.monotonic()
+    with pytest.raises(OSError):
+        client.read_holding_registers(address=0, count=10)
+    # 7 + 21 bytes at 50 ms each would take ~1.4 s without a single deadline
+    assert time.monotonic() - t0 < 0.8
+
+
+class LateFrameSocket(FakeSocket):
+    """Answers every request, but first replays the reply to an earlier transaction."""
+
+    stale_tid_offset = 1
+    connects = 0
+
+    def connect(self, addr):
+        LateFrameSocket.connects += 1
+
+    def sendall(self, data: bytes):
+        super().sendall(data)
+        tid = struct.unpack(">H", data[0:2])[0]
+        stale_tid = (tid - self.stale_tid_offset) & 0xFFFF
+        stale = struct.pack(">HHHB", stale_tid, 0, 5, data[6]) + struct.pack(">BBH", 3, 2, 0xBEEF)
+        self._recv_queue.insert(0, stale)
+
+
+def test_late_reply_is_drained_without_reconnect(monkeypatch):
+    import socket as _socket
+
+    LateFrameSocket.connects = 0
+    monkeypatch.setattr(_socket, "socket", lambda *a, **k: LateFrameSocket())
+    client = TcpModbusClient(host="127.0.0.1", port=502, timeout=1.0, unit_id=1, retries=1)
+    client.connect()
+    assert client.read_holding_registers(address=0, count=3) == [1, 2, 3]
+    assert client.read_holding_registers(address=0, count=2) == [1, 2]
+    assert LateFrameSocket.connects == 1
+
+
+def test_unrelated_transaction_id_reconnects(monkeypatch):
+    import socket as _socket
+    import pytest
+    from app.modules.sw.modbus.modbus_tcp_client import ModbusDesyncError
+
+    class FarOffSocket(LateFrameSocket):
+        stale_tid_offset = 1000
+
+    LateFrameSocket.connects = 0
+    monkeypatch.setattr(_socket, "socket", lambda *a, **k: FarOffSocket())
+    client = TcpModbusClient(host="127.0.0.1", port=502, timeout=1.0, unit_id=1, retries=1)
+    client.connector = Connector()
+    client.connect()
+    with pytest.raises(ModbusDesyncError):
+        client.read_holding_registers(address=0, count=3)
+    # the reconnect happens on the connector's thread, not the caller's
+    assert client.connector.wait(client, 1.0)
+    assert LateFrameSocket.connects == 2
+
+
+class SlowFakeSocket(FakeSocket):
+    def sendall(self, data: bytes):
+        import time
+        time.sleep(0.04)
+        super().sendall(data)
+
+
+def test_busy_time_excludes_waiting_for_the_connection(monkeypatch):
+    import threading
+    import time
+    import socket as _socket
+
+    monkeypatch.setattr(_socket, "socket", lambda *a, **k: SlowFakeSocket())
+    client = TcpModbusClient(host="127.0.0.1", port=502, timeout=1.0)
+    client.connect()
+    busy, wall = [], []
+
+    def read():
+        client.take_busy()
+        t0 = time.monotonic()
+        client.read_holding_registers(0, 1)
+        wall.append(time.monotonic() - t0)
+        busy.append(client.take_busy())
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(2)
+    # the last caller queued behind three others, but the device was busy ~40 ms for each
+    assert max(wall) > 0.12
+    assert all(0.03 < b < 0.08 for b in busy)
+
+
+class StalledSendSocket(FakeSocket):
+    """sendall times out after writing part of the request."""
+
+    connects = 0
+
+    def connect(self, addr):
+        StalledSendSocket.connects += 1
+
+    def sendall(self, data: bytes):
+        raise socket.timeout("timed out")
+
+
+def test_send_timeout_is_a_desync_and_reconnects(monkeypatch):
+    import pytest
+    import socket as _socket
+    from app.modules.sw.modbus.modbus_tcp_client import ModbusDesyncError
+
+    monkeypatch.setattr(_socket, "socket", lambda *a, **k: StalledSendSocket())
+    StalledSendSocket.connects = 0
+    client = TcpModbusClient(host="127.0.0.1", port=502, timeout=0.5, retries=1)
+    client.connect()
+    with pytest.raises(ModbusDesyncError):
+        client.read_holding_registers(0, 1)
+    assert not client.is_connected()
+    assert StalledSendSocket.connects == 1
+    # no connector: the next request reconnects on its own
+    with pytest.raises(ModbusDesyncError):
+        client.read_holding_registers(0, 1)
+    assert StalledSendSocket.connects == 2
@@ -0,0 +1,220 @@
+import threading
+import time
+
+from app.modules.sw.modbus.connect import Connector
+from app.modules.sw.modbus.polling import ModbusManager, Poller
+
+
+class FakeClient:
+    """Client stand-in whose connect takes `delay` seconds and fails while `dead`."""
+
+    def __init__(self, host, delay=0.0, dead=False, gate=None):
+        self.host = host
+        self.port = 502
+        self.timeout = 1.0
+        self.delay = delay
+        self.dead = dead
+        self.gate = gate
+        self.attempts = 0
+        self._connected = False
+
+    def is_connected(self):
+        return self._connected
+
+    def ensure_connected(self):
+        self.attempts += 1
+        if self.gate is not None:
+            self.gate.enter()
+        try:
+            time.sleep(self.delay)
+            if self.dead:
+                raise ConnectionError(f"{self.host} unreachable")
+            self._connected = True
+        finally:
+            if self.gate is not None:
+                self.gate.leave()
+
+    def read_holding_registers(self, address, count, unit_id=None):
+        return [1] * count
+
+
+class Gate:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def enter(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def leave(self):
+        with self.lock:
+            self.active -= 1
+
+
+def test_connects_in_parallel_with_bounded_concurrency():
+    conn = Connector(max_parallel=3)
+    gate = Gate()
+    clients = [FakeClient(f"h{i}", delay=0.1, gate=gate) for i in range(9)]
+    t0 = time.monotonic()
+    for c in clients:
+        conn.request(c)
+    # request() only queues: it returned before any 100 ms connect finished
+    assert not any(c.is_connected() for c in clients)
+    for c in clients:
+        assert conn.wait(c, 2.0)
+    assert gate.peak == 3
+    # three rounds of three, not nine serial connects
+    assert time.monotonic() - t0 < 0.9
+
+
+def test_dead_host_is_retried_in_background_until_it_comes_up():
+    conn = Connector(max_parallel=2, retry_min=0.05, retry_max=0.1)
+    dead = FakeClient("dead", dead=True)
+    conn.request(dead)
+    assert not conn.wait(dead, 1.0)
+    assert conn.stats()["dead:502"]["state"] == "down"
+    # while down, ready() does not queue a second connect
+    assert not conn.ready(dead)
+    dead.dead = False
+    deadline = time.monotonic() + 2.0
+    while not dead.is_connected() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert dead.is_connected()
+    assert dead.attempts >= 2
+    assert conn.stats()["dead:502"]["state"] == "up"
+
+
+def test_get_client_does_not_wait_for_unreachable_host(monkeypatch):
+    from app.modules.sw.modbus import modbus_tcp_client
+
+    def slow_connect(self):
+        time.sleep(0.5)
+        raise ConnectionError("unreachable")
+
+    monkeypatch.setattr(modbus_tcp_client.TcpModbusClient, "_open_socket", slow_connect)
+    manager = ModbusManager(connector=Connector(max_parallel=2, retry_min=5.0))
+    t0 = time.monotonic()
+    clients = [manager.get_client("tcp", host=f"10.0.0.{i}", timeout=0.5) for i in range(4)]
+    # less than a single connect; inline connects would take 2 s
+    assert time.monotonic() - t0 < 0.5
+    assert not any(c.is_connected() for c in clients)
+    manager.close_all()
+    assert manager.connector.stats() == {}
+
+
+def test_poller_of_reachable_device_is_not_held_up_by_dead_one():
+    conn = Connector(max_parallel=2, retry_min=5.0)
+    dead = FakeClient("dead", delay=0.5, dead=True)
+    live = FakeClient("live")
+    conn.request(dead)
+    conn.request(live)
+    got = []
+    p = Poller(live, "holding", 0, 2, 0.05, lambda r, e: got.append((r, e)), name="live", connector=conn)
+    q = Poller(dead, "holding", 0, 2, 0.05, lambda r, e: None, name="dead", connector=conn)
+    q.start()
+    p.start()
+    try:
+        deadline = time.monotonic() + 1.0
+        while not got and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert got and got[0] == ([1, 1], None)
+        # the live poller got its reply while the dead host's first connect was still running
+        assert conn.stats()["dead:502"]["state"] == "connecting"
+    finally:
+        p.stop()
+        q.stop()
+        p.join(2)
+        q.join(2)
+
+
+def test_transactions_do_not_wait_for_a_connect_in_progress(monkeypatch):
+    from app.modules.sw.modbus import modbus_tcp_client
+
+    entered = threading.Event()
+    release = threading.Event()
+
+    def slow_connect(self):
+        entered.set()
+        release.wait(2.0)
+        raise ConnectionError("unreachable")
+
+    monkeypatch.setattr(modbus_tcp_client.TcpModbusClient, "_open_socket", slow_connect)
+    client = modbus_tcp_client.TcpModbusClient(host="10.0.0.1", timeout=2.0)
+    # managed client: reconnects belong to the connector, never to the transaction
+    client.connector = Connector(retry_min=5.0)
+    t = threading.Thread(target=lambda: _swallow(client.ensure_connected))
+    t.start()
+    try:
+        assert entered.wait(1.0)
+        try:
+            client.read_holding_registers(0, 1)
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("expected ConnectionError")
+        # failed fast while the connect was still blocked
+        assert t.is_alive()
+    finally:
+        release.set()
+        t.join(2)
+
+
+def test_abort_during_connect_discards_the_socket(monkeypatch):
+    import socket
+    from app.modules.sw.modbus import modbus_tcp_client
+
+    a, b = socket.socketpair()
+    client = modbus_tcp_client.TcpModbusClient(host="10.0.0.1")
+
+    def racing_connect(self):
+        self.abort()
+        return a
+
+    monkeypatch.setattr(modbus_tcp_client.TcpModbusClient, "_open_socket", racing_connect)
+    try:
+        client.connect()
+    except ConnectionError:
+        pass
+    assert not client.is_connected()
+    assert a.fileno() == -1
+    b.close()
+
+
+def _swallow(fn):
+    try:
+        fn()
+    except Exception:
+        pass
+
+
+def test_standalone_client_reconnects_lazily(monkeypatch):
+    import socket
+
+    from app.modules.sw.modbus import modbus_tcp_client
+
+    opened = []
+
+    def fake_open(self):
+        a, b = socket.socketpair()
+        opened.append(b)
+        return a
+
+    monkeypatch.setattr(modbus_tcp_client.TcpModbusClient, "_open_socket", fake_open)
+    client = modbus_tcp_client.TcpModbusClient(host="10.0.0.1", timeout=0.2)
+    client.connect()
+    # the connection breaks, as after a socket error
+    client.close()
+    assert not client.is_connected()
+    try:
+        client.read_holding_registers(0, 1)
+    except Exception:
+        # the fake peer never answers; what matters is the reconnect
+        pass
+    assert len(opened) == 2
+    assert client.is_connected()
+    for s in opened:
+        s.close()
+    client.close()
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from app.modules.sw.modbus.dispatch import CallbackDispatcher
+from app.modules.sw.modbus.modbus_tcp_client import MockModbusClient
+from app.modules.sw.modbus.polling import Poller, StatusStore
+
+
+def test_slow_consumer_does_not_delay_others():
+    d = CallbackDispatcher(workers=2)
+    fast_done = threading.Event()
+    release = threading.Event()
+    d.register("slow", lambda: release.wait(2.0))
+    d.register("fast", fast_done.set)
+    try:
+        d.submit("slow")
+        d.submit("fast")
+        assert fast_done.wait(0.5)
+    finally:
+        release.set()
+        d.stop()
+
+
+def test_overflow_policies():
+    d = CallbackDispatcher(workers=1)
+    release = threading.Event()
+    seen = []
+    d.register("blocker", lambda: release.wait(2.0))
+    d.register("latest", seen.append, max_queue=1, policy="drop_oldest")
+    d.register("first", seen.append, max_queue=1, policy="drop_newest")
+    try:
+        d.submit("blocker")
+        time.sleep(0.05)
+        for i in range(3):
+            d.submit("latest", f"latest-{i}")
+        assert d.submit("first", "first-0")
+        assert not d.submit("first", "first-1")
+        release.set()
+        deadline = time.time() + 1.0
+        while len(seen) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        d.stop()
+    assert sorted(seen) == ["first-0", "latest-2"]
+    stats = d.stats()
+    assert stats["latest"]["dropped"] == 2
+    assert stats["first"]["dropped"] == 1
+
+
+def test_slow_callback_keeps_poll_schedule():
+    d = CallbackDispatcher(workers=1)
+    reads = []
+
+    class Client(MockModbusClient):
+        def read_holding_registers(self, address, count, unit_id=None):
+            reads.append(time.monotonic())
+            return [len(reads)] * count
+
+    poller = Poller(Client(), "holding", 0, 1, 0.05, lambda r, e: time.sleep(1.0),
+                    poller_id="dispatch-test", status_store=StatusStore(), dispatcher=d)
+    poller.start()
+    time.sleep(0.4)
+    poller.stop()
+    poller.join(1.0)
+    d.stop()
+    # an inline 1 s callback would have allowed a single read
+    assert len(reads) >= 5
+
+
+def test_unregister_keeps_consumer_re_registered_under_same_name():
+    d = CallbackDispatcher(workers=1)
+    old, new = [], []
+    d.register("callback:p", old.append)
+    d.register("callback:p", new.append)
+    d.unregister("callback:p", old.append)
+    assert d.submit("callback:p", 1)
+    d.unregister("callback:p", new.append)
+    assert not d.submit("callback:p", 2)
+    d.stop()
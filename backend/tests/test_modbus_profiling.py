@@ -0,0 +1,44 @@
+import time
+
+from app.modules.sw.modbus.modbus_tcp_client import MockModbusClient
+from app.modules.sw.modbus.polling import Poller, StatusStore
+from app.modules.sw.modbus.profiling import StageProfiler, profiler
+
+
+def test_disabled_profiler_returns_no_cycle():
+    p = StageProfiler()
+    assert p.cycle("x") is None
+    assert p.summary() == {}
+
+
+def test_stage_summary():
+    p = StageProfiler(window=10)
+    p.enable()
+    for _ in range(3):
+        c = p.cycle("1-a")
+        c.mark("io")
+        c.mark("database")
+        c.done()
+    s = p.summary()["1-a"]
+    assert set(s) == {"io", "database", "total"}
+    assert s["io"]["count"] == 3
+    assert s["total"]["max_us"] >= s["io"]["p50_us"]
+
+
+def test_poller_records_stages():
+    profiler.reset()
+    profiler.enable()
+    try:
+        poller = Poller(MockModbusClient(), "holding", 0, 2, 0.05, lambda r, e: None,
+                        poller_id="prof-test", status_store=StatusStore())
+        poller.start()
+        deadline = time.time() + 2.0
+        while time.time() < deadline and "prof-test" not in profiler.summary():
+            time.sleep(0.02)
+        poller.stop()
+        poller.join(1.0)
+    finally:
+        profiler.enable(False)
+    stages = profiler.summary("prof-test")["prof-test"]
+    for stage in ("io", "status", "database", "callback", "total"):
+        assert stage in stages
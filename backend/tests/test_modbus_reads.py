@@ -0,0 +1,99 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.api.v1 import modbus as modbus_api
+from app.main import app
+from app.modules.sw.modbus.reads import Reader, RegisterCache
+
+
+class CountingClient:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def read_holding_registers(self, address, count, unit_id=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return [address + i for i in range(count)]
+
+    read_input_registers = read_holding_registers
+
+
+def test_fresh_cache_answers_without_device_io():
+    cache = RegisterCache()
+    client = CountingClient()
+    cache.record(client, "holding", 0, (10, 11, 12, 13))
+    cache.record(client, "holding", 4, (14, 15))
+    r = Reader(cache).read(client, "holding", 2, 4, max_age=5.0)
+    # stitched from both poll blocks
+    assert r["values"] == [12, 13, 14, 15]
+    assert r["source"] == "cache"
+    assert client.calls == 0
+
+
+def test_stale_or_uncovered_range_is_read_live_and_cached():
+    cache = RegisterCache()
+    client = CountingClient()
+    cache.record(client, "holding", 0, (10, 11), ts=time.time() - 10)
+    reader = Reader(cache)
+    r = reader.read(client, "holding", 0, 2, max_age=1.0)
+    assert r["source"] == "live" and r["values"] == [0, 1]
+    assert reader.read(client, "holding", 0, 2, max_age=1.0)["source"] == "cache"
+    # another function is a separate address space
+    assert reader.read(client, "input", 0, 2, max_age=1.0)["source"] == "live"
+    assert client.calls == 2
+
+
+def test_concurrent_identical_misses_share_one_transaction():
+    client = CountingClient(delay=0.2)
+    reader = Reader(RegisterCache())
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(reader.read(client, "holding", 5, 3, max_age=0)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(2)
+    assert client.calls == 1
+    assert len(results) == 8
+    assert all(r["values"] == [5, 6, 7] for r in results)
+    assert sorted(r["source"] for r in results).count("live") == 1
+
+
+def test_bulk_read_endpoint(monkeypatch):
+    api = TestClient(app)
+    token = api.post("/api/v1/auth/login", json={"username": "admin", "password": "Admin2026"}).json()["access_token"]
+    client = CountingClient()
+    monkeypatch.setattr(modbus_api, "example_device_client", lambda d: client if d == "plc" else None)
+
+    r = api.post("/api/v1/modbus/read", headers={"Authorization": f"Bearer {token}"}, json={
+        "max_age": 0,
+        "reads": [{"device": "plc", "address": 1, "count": 2}, {"device": "other", "address": 0}],
+    })
+    assert r.status_code == 200
+    first, second = r.json()["results"]
+    assert first["values"] == [1, 2] and first["source"] == "live"
+    assert "not being polled" in second["error"]
+
+    r = api.get("/api/v1/modbus/read/plc", params={"address": 0, "count": 200},
+                headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 400
+
+
+def test_adhoc_ranges_and_old_blocks_are_evicted():
+    cache = RegisterCache(max_age=60.0, max_adhoc=3)
+    client = CountingClient()
+    cache.record(client, "holding", 0, (1, 2), ts=time.time() - 120)
+    cache.record(client, "holding", 100, (5, 6))
+    reader = Reader(cache)
+    for a in range(10, 20):
+        reader.read(client, "holding", a, 1, max_age=0)
+    # the expired poll block is gone, the live poll block and the 3 newest API ranges remain
+    assert cache.size(client) == 4
+    assert cache.lookup(client, "holding", 100, 2, max_age=5.0)[0] == [5, 6]
+    assert cache.lookup(client, "holding", 19, 1, max_age=5.0)[0] == [19]
+    assert cache.lookup(client, "holding", 10, 1, max_age=5.0) is None
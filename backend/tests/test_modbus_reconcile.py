@@ -0,0 +1,156 @@
+import copy
+import time
+
+from app.modules.sw.modbus.polling import ModbusManager, build_poller, poller_specs
+from app.modules.sw.modbus.reconcile import reconcile
+
+
+def make_cfg():
+    return {"devices": [
+        {"id": "a", "hw_mode": "mock", "unit_id": 1, "pollers": [
+            {"id": "p1", "address": 0, "count": 2, "interval": 5},
+            {"id": "p2", "address": 10, "count": 2, "interval": 5},
+        ]},
+        {"id": "b", "hw_mode": "mock", "unit_id": 2, "pollers": [
+            {"id": "p3", "address": 0, "count": 2, "interval": 5},
+        ]},
+    ]}
+
+
+def start_all(manager, cfg):
+    pollers = [build_poller(manager, pid, spec) for pid, spec in poller_specs(cfg).items()]
+    for p in pollers:
+        p.start()
+    return pollers
+
+
+def test_reconcile_touches_only_changed_pollers():
+    manager = ModbusManager()
+    cfg = make_cfg()
+    running = start_all(manager, cfg)
+    by_id = {p._poller_id: p for p in running}
+
+    new_cfg = copy.deepcopy(cfg)
+    new_cfg["devices"][0]["pollers"][0]["interval"] = 2          # retune 1-p1
+    del new_cfg["devices"][0]["pollers"][1]                      # stop 1-p2
+    new_cfg["devices"][0]["pollers"].append({"id": "p4", "count": 1})  # start 1-p4
+    new_cfg["devices"][1]["retries"] = 3                          # replace 2-p3 (device changed)
+
+    try:
+        pollers, summary = reconcile(manager, running, new_cfg)
+        assert summary["retuned"] == ["1-p1"]
+        assert summary["stopped"] == ["1-p2"]
+        assert summary["started"] == ["1-p4"]
+        assert summary["replaced"] == ["2-p3"]
+        now = {p._poller_id: p for p in pollers}
+        # retuned poller is the same running thread with the new interval
+        assert now["1-p1"] is by_id["1-p1"] and now["1-p1"].interval == 2.0
+        assert by_id["1-p2"].stopped()
+        assert by_id["2-p3"].stopped() and now["2-p3"] is not by_id["2-p3"]
+        assert all(p.is_alive() for p in pollers)
+
+        pollers, summary = reconcile(manager, pollers, new_cfg)
+        assert sorted(summary["unchanged"]) == ["1-p1", "1-p4", "2-p3"]
+    finally:
+        for p in pollers + running:
+            p.stop()
+
+
+def test_replaced_poller_keeps_its_callback():
+    from app.modules.sw.modbus.dispatch import dispatcher
+
+    manager = ModbusManager()
+    cfg = make_cfg()
+    cfg["devices"][1]["pollers"][0]["interval"] = 0.05
+    running = start_all(manager, cfg)
+    new_cfg = copy.deepcopy(cfg)
+    new_cfg["devices"][1]["retries"] = 3
+    pollers = []
+    try:
+        pollers, summary = reconcile(manager, running, new_cfg)
+        assert summary["replaced"] == ["2-p3"]
+        old = next(p for p in running if p._poller_id == "2-p3")
+        old.join(2)
+        before = dispatcher.stats()["callback:2-p3"]["delivered"]
+        time.sleep(0.3)
+        assert dispatcher.stats()["callback:2-p3"]["delivered"] > before
+    finally:
+        for p in pollers + running:
+            p.stop()
+
+
+def test_invalid_overrun_rejected():
+    cfg = make_cfg()
+    cfg["devices"][0]["pollers"][0]["overrun"] = "bogus"
+    try:
+        poller_specs(cfg)
+    except ValueError as e:
+        assert "bogus" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_shortened_interval_applies_without_waiting_out_the_old_one():
+    manager = ModbusManager()
+    cfg = make_cfg()
+    running = start_all(manager, cfg)
+    new_cfg = copy.deepcopy(cfg)
+    new_cfg["devices"][0]["pollers"][0]["interval"] = 0.05
+    pollers = running
+    try:
+        time.sleep(0.1)
+        p1 = next(p for p in running if p._poller_id == "1-p1")
+        before = p1.lag_stats.snapshot()["cycles"]
+        pollers, summary = reconcile(manager, running, new_cfg)
+        assert summary["retuned"] == ["1-p1"]
+        # the old 5 s wait is cut short; several 50 ms cycles follow
+        time.sleep(0.5)
+        assert p1.lag_stats.snapshot()["cycles"] >= before + 3
+    finally:
+        for p in pollers + running:
+            p.stop()
+
+
+def test_concurrent_reload_and_stop_leave_no_orphans(tmp_path, monkeypatch):
+    import json
+    import threading
+
+    from app.modules.sw.modbus import polling
+
+    def write(n):
+        cfg = {"devices": [{"id": "orph", "hw_mode": "mock", "unit_id": 7, "pollers": [
+            {"id": f"q{i}", "address": i, "count": 1, "interval": 5} for i in range(n)]}]}
+        (tmp_path / "polling_config.json").write_text(json.dumps(cfg), encoding="utf-8")
+
+    monkeypatch.chdir(tmp_path)
+    for round_ in range(5):
+        write(5)
+        assert polling.start_example_polling()
+        write(10)
+        threads = [threading.Thread(target=polling.reload_example_polling), threading.Thread(target=polling.stop_example_polling)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        polling.stop_example_polling()
+        alive = [t for t in threading.enumerate()
+                 if isinstance(t, polling.Poller) and t._poller_id.startswith("7-q") and not t.stopped()]
+        assert alive == [], round_
+
+
+def test_example_poller_status_reports_running_pollers(tmp_path, monkeypatch):
+    import json
+
+    from app.modules.sw.modbus import polling
+
+    cfg = {"devices": [{"id": "st", "hw_mode": "mock", "unit_id": 8, "pollers": [{"id": "s0", "interval": 5}]}]}
+    (tmp_path / "polling_config.json").write_text(json.dumps(cfg), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    assert polling.start_example_polling()
+    try:
+        status = polling.example_poller_status()
+        assert list(status) == ["8-s0"]
+        assert status["8-s0"]["overrun"] == "skip" and "cycles" in status["8-s0"]
+    finally:
+        polling.stop_example_polling()
+    assert polling.example_poller_status() == {}
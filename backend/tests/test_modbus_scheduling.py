@@ -0,0 +1,156 @@
+import threading
+import time
+
+from app.modules.sw.modbus.modbus_tcp_client import MockModbusClient
+from app.modules.sw.modbus.polling import Poller, StatusStore
+from app.modules.sw.modbus.scheduling import (DeviceGuard, PriorityLock, get_device_guard, plan_next,
+                                              transaction_priority)
+
+
+def test_on_time_cycle_keeps_grid():
+    assert plan_next("skip", 10.0, 10.5, 1.0) == (11.0, 0)
+
+
+def test_overrun_policies():
+    # scheduled at 10 with interval 1, the cycle ended at 13.5: slots 11, 12, 13 were missed
+    assert plan_next("skip", 10.0, 13.5, 1.0) == (14.0, 3)
+    assert plan_next("coalesce", 10.0, 13.5, 1.0) == (13.5, 3)
+    assert plan_next("stretch", 10.0, 13.5, 1.0) == (14.5, 3)
+    assert plan_next("catchup", 10.0, 13.5, 1.0) == (11.0, 3)
+
+
+def test_device_guard_stretches_and_recovers():
+    clock = [0.0]
+    g = DeviceGuard("dev", window=1.0, high=0.8, low=0.5, step=2.0, max_factor=4.0, clock=lambda: clock[0])
+    for _ in range(3):
+        clock[0] += 1.0
+        g.record(0.95)
+    assert g.factor == 4.0
+    for _ in range(3):
+        clock[0] += 1.0
+        g.record(0.1)
+    assert g.factor == 1.0
+
+
+def test_guard_shared_per_client():
+    c = MockModbusClient()
+    assert get_device_guard(c) is get_device_guard(c)
+    assert get_device_guard(c) is not get_device_guard(MockModbusClient())
+
+
+class SlowClient(MockModbusClient):
+    def read_holding_registers(self, address, count, unit_id=None):
+        time.sleep(0.12)
+        return [0] * count
+
+
+def test_slow_reads_do_not_burst():
+    calls = []
+    poller = Poller(SlowClient(), "holding", 0, 1, 0.05, lambda r, e: calls.append(time.monotonic()),
+                    poller_id="sched-test", status_store=StatusStore(), overrun="skip")
+    poller.start()
+    time.sleep(0.6)
+    poller.stop()
+    poller.join(1.0)
+    stats = poller.lag_stats.snapshot()
+    assert stats["overruns"] >= 1
+    # with skip the poller never starts a cycle late by more than one interval
+    assert stats["max_lag"] < 0.05
+
+
+class CountingStore(StatusStore):
+    def __init__(self):
+        super().__init__()
+        self.updates = 0
+        self.touches = 0
+
+    def update(self, poller_id, **kw):
+        self.updates += 1
+        super().update(poller_id, **kw)
+
+    def touch(self, poller_id):
+        self.touches += 1
+        super().touch(poller_id)
+
+
+def test_unchanged_replies_take_fast_path():
+    store = CountingStore()
+    poller = Poller(MockModbusClient(), "holding", 0, 4, 0.02, lambda r, e: None,
+                    poller_id="unchanged-test", status_store=store)
+    updates_after_init = store.updates
+    poller.start()
+    time.sleep(0.2)
+    poller.stop()
+    poller.join(1.0)
+    # mock registers never change: one full write, everything else only touches freshness
+    assert store.updates - updates_after_init == 1
+    assert store.touches >= 3
+
+
+def _contend(lock, arrivals, hold=0.05):
+    """Hold `lock`, queue one waiter per (class, delay) in `arrivals`, release; return grant order."""
+    order = []
+
+    def worker(name):
+        with transaction_priority(name):
+            with lock:
+                order.append(name)
+
+    lock.acquire("write")
+    threads = []
+    for name, delay in arrivals:
+        t = threading.Thread(target=worker, args=(name,))
+        t.start()
+        threads.append(t)
+        time.sleep(delay)
+    time.sleep(hold)
+    lock.release()
+    for t in threads:
+        t.join(2)
+    return order
+
+
+def test_priority_lock_serves_urgent_classes_first():
+    lock = PriorityLock(aging=60.0)
+    order = _contend(lock, [("diagnostic", 0.02), ("slow", 0.02), ("fast", 0.02), ("write", 0.02)])
+    assert order == ["write", "fast", "slow", "diagnostic"]
+
+
+def test_priority_lock_ages_long_waiters_up():
+    lock = PriorityLock(aging=0.05)
+    # the diagnostic read has waited several aging steps when the write arrives
+    order = _contend(lock, [("diagnostic", 0.3), ("write", 0.0)])
+    assert order == ["diagnostic", "write"]
+
+
+def test_priority_lock_is_reentrant():
+    lock = PriorityLock()
+    with lock:
+        with lock:
+            assert lock._count == 2
+    assert lock._owner is None
+
+
+def test_reloaded_things_get_values_on_next_unchanged_poll():
+    import copy
+    from app.modules.sw.easyberry.store import database
+
+    saved = copy.deepcopy(database.get_pollers())
+    cfg = {"pollers": [{"id": "reload-test", "things": [{"mbid": "rt-0", "name": "rt0", "register_index": 0}]}]}
+    database.load_from_dict(copy.deepcopy(cfg))
+    poller = Poller(MockModbusClient(), "holding", 0, 2, 0.02, lambda r, e: None,
+                    poller_id="reload-test", status_store=StatusStore(), full_refresh=60.0)
+    poller.start()
+    try:
+        time.sleep(0.1)
+        assert database.get_thing_by_mbid("rt-0")[1]["value"] == 0
+        cfg["pollers"][0]["things"].append({"mbid": "rt-1", "name": "rt1", "register_index": 1})
+        database.load_from_dict(cfg)
+        # registers are unchanged, but the new thing must not wait for full_refresh
+        time.sleep(0.1)
+        new = database.get_thing_by_mbid("rt-1")[1]
+        assert new.get("value") == 0 and "updated_at" in new
+    finally:
+        poller.stop()
+        poller.join(1.0)
+        database.load_from_dict({"pollers": saved})
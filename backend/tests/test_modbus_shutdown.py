@@ -0,0 +1,107 @@
+import json
+import socketserver
+import struct
+import threading
+import time
+
+import pytest
+
+from app.modules.sw.modbus import polling
+from app.modules.sw.modbus.modbus_tcp_client import TcpModbusClient
+
+SILENT_UNIT = 99
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Minimal Modbus TCP server: FC3/FC4 reads return zeros; unit SILENT_UNIT never answers."""
+
+    def handle(self):
+        sock = self.request
+        buf = b""
+        while True:
+            try:
+                chunk = sock.recv(1024)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buf += chunk
+            while len(buf) >= 12:
+                tid, _, length, unit = struct.unpack(">HHHB", buf[:7])
+                pdu, buf = buf[7:6 + length], buf[6 + length:]
+                if unit == SILENT_UNIT:
+                    continue
+                function, _, count = struct.unpack(">BHH", pdu[:5])
+                body = struct.pack(">BB", function, count * 2) + b"\x00\x00" * count
+                sock.sendall(struct.pack(">HHHB", tid, 0, len(body) + 1, unit) + body)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+@pytest.fixture
+def modbus_server():
+    server = _Server(("127.0.0.1", 0), _Handler)
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_abort_interrupts_blocked_read(modbus_server):
+    client = TcpModbusClient(host="127.0.0.1", port=modbus_server, timeout=5.0, unit_id=SILENT_UNIT)
+    client.connect()
+    errors = []
+
+    def read():
+        try:
+            client.read_holding_registers(0, 1)
+        except Exception as e:
+            errors.append(e)
+
+    t = threading.Thread(target=read)
+    t.start()
+    time.sleep(0.1)
+    t0 = time.monotonic()
+    client.abort()
+    t.join(1.0)
+    assert not t.is_alive()
+    # well under the 5 s read timeout the abort is meant to cut short
+    assert time.monotonic() - t0 < 1.0
+    assert isinstance(errors[0], ConnectionError)
+    # no silent reconnect after abort
+    assert not client.is_connected()
+
+
+def test_restart_of_100_pollers_is_fast(modbus_server, tmp_path, monkeypatch):
+    devices = []
+    for d in range(10):
+        unit = SILENT_UNIT if d == 9 else d + 1
+        devices.append({"id": f"dev{d}", "host": "127.0.0.1", "port": modbus_server, "unit_id": unit,
+                        "timeout": 3.0, "pollers": [{"id": f"p{i}", "address": i, "count": 2, "interval": 0.5}
+                                                    for i in range(10)]})
+    (tmp_path / "polling_config.json").write_text(json.dumps({"devices": devices}), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    assert polling.start_example_polling()
+    try:
+        # let live pollers finish a cycle and the silent device's pollers block in recv
+        time.sleep(0.3)
+        old = list(polling._example_pollers)
+        assert len(old) == 100
+        assert polling.default_store.get_all()["1-p0"].get("last_value") == [0, 0]
+
+        t0 = time.monotonic()
+        assert polling.stop_example_polling()
+        assert polling.start_example_polling()
+        elapsed = time.monotonic() - t0
+
+        assert not any(p.is_alive() for p in old)
+        # acceptance target: stop and restart 100 pollers (one device silent) within 100 ms
+        assert elapsed < 0.1, f"stop-to-start took {elapsed:.3f}s"
+        assert all(p.is_alive() for p in polling._example_pollers)
+    finally:
+        polling.stop_example_polling()
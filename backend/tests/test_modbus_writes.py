@@ -0,0 +1,129 @@
+import threading
+import time
+
+from app.modules.sw.modbus import polling
+from app.modules.sw.modbus.reads import register_cache
+from app.modules.sw.modbus.writes import coalesce, get_write_queue, wait_writes
+
+
+class RecordingClient:
+    host = "plc"
+    port = 502
+    timeout = 1.0
+
+    def __init__(self, delay=0.0, fail_at=None):
+        self.delay = delay
+        self.fail_at = fail_at
+        self.sent = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def write_single_register(self, address, value, unit_id=None):
+        self.gate.wait(2)
+        self.sent.append(("fc6", address, [value]))
+        return True
+
+    def write_multiple_registers(self, address, values, unit_id=None):
+        self.gate.wait(2)
+        time.sleep(self.delay)
+        if self.fail_at is not None and address <= self.fail_at < address + len(values):
+            raise ConnectionError("device busy")
+        self.sent.append(("fc16", address, list(values)))
+        return True
+
+    def read_holding_registers(self, address, count, unit_id=None):
+        # the device ignores writes
+        return [0] * count
+
+
+def test_coalesce_merges_adjacent_and_splits_at_fc16_limit():
+    assert coalesce({5: 1, 3: 7, 4: 8, 10: 2}) == [(3, [7, 8, 1]), (10, [2])]
+    runs = coalesce({a: a for a in range(200)})
+    assert [(start, len(v)) for start, v in runs] == [(0, 123), (123, 77)]
+
+
+def test_writes_queued_while_busy_collapse_to_last_value():
+    client = RecordingClient()
+    q = get_write_queue(client)
+    client.gate.clear()
+    first = q.submit({0: 1})
+    # the worker is now blocked sending register 0; these pile up behind it
+    time.sleep(0.05)
+    second = q.submit({10: 1, 11: 1})
+    third = q.submit({11: 5, 12: 6})
+    client.gate.set()
+    assert first.wait(2) and second.wait(2) and third.wait(2)
+    assert client.sent == [("fc6", 0, [1]), ("fc16", 10, [1, 5, 6])]
+    assert second.ok and third.ok
+    assert q.coalesced == 1
+
+
+def test_empty_submit_finishes_at_once():
+    client = RecordingClient()
+    ticket = get_write_queue(client).submit({})
+    assert ticket.done and ticket.ok
+    assert client.sent == []
+
+
+def test_write_endpoint_rejects_empty_writes(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.api.v1 import modbus as modbus_api
+    from app.main import app
+
+    api = TestClient(app)
+    token = api.post("/api/v1/auth/login", json={"username": "admin", "password": "Admin2026"}).json()["access_token"]
+    monkeypatch.setattr(modbus_api, "example_device_client", lambda d: RecordingClient())
+    r = api.post("/api/v1/modbus/write/plc", headers={"Authorization": f"Bearer {token}"}, json={"writes": []})
+    assert r.status_code == 400
+
+
+def test_failed_run_reports_errors_per_register():
+    client = RecordingClient(fail_at=21)
+    ticket = get_write_queue(client).submit({20: 1, 21: 2, 30: 3, 31: 4})
+    assert ticket.wait(2)
+    assert not ticket.ok
+    assert set(ticket.errors) == {20, 21}
+    assert client.sent == [("fc16", 30, [3, 4])]
+
+
+def test_reads_wait_for_pending_writes():
+    client = RecordingClient(delay=0.2)
+    get_write_queue(client).submit({0: 1, 1: 2})
+    t0 = time.monotonic()
+    assert wait_writes(client, 2.0)
+    assert time.monotonic() - t0 >= 0.15
+    assert client.sent
+
+
+def test_write_through_updates_cached_values(monkeypatch):
+    client = RecordingClient()
+    register_cache.record(client, "holding", 0, (0, 0, 0, 0))
+    poller = polling.Poller(client, "holding", 0, 4, 1.0, lambda r, e: None, poller_id="wt")
+    poller._last_values = (0, 0, 0, 0)
+    monkeypatch.setattr(polling, "_example_pollers", [poller])
+
+    assert get_write_queue(client).submit({1: 7, 2: 8}).wait(2)
+    assert register_cache.lookup(client, "holding", 0, 4, max_age=5.0)[0] == [0, 7, 8, 0]
+    assert polling.default_store.get_all()["wt"]["last_value"] == [0, 7, 8, 0]
+    # the poller's own state is left to its thread
+    assert poller._last_values == (0, 0, 0, 0)
+    assert poller._written.is_set()
+
+
+def test_poll_after_write_through_is_processed_in_full(monkeypatch):
+    client = RecordingClient()
+    store = polling.StatusStore()
+    poller = polling.Poller(client, "holding", 0, 4, 0.02, lambda r, e: None, poller_id="wt-full",
+                            status_store=store, full_refresh=60.0)
+    monkeypatch.setattr(polling, "_example_pollers", [poller])
+    poller.start()
+    try:
+        time.sleep(0.1)
+        assert get_write_queue(client).submit({1: 7}).wait(2)
+        # the reply matches the last one, but must still replace the written-through value
+        time.sleep(0.1)
+        assert store.get_all()["wt-full"]["last_value"] == [0, 0, 0, 0]
+    finally:
+        poller.stop()
+        poller.join(1.0)